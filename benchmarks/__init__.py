@@ -0,0 +1,7 @@
+"""
+性能測定スクリプトのパッケージです。
+
+各スクリプトは一時的なテスト用データベースを作成して実行するため、運用中のデータベースには影響しません。
+
+    python -m benchmarks.bench_monthly_records
+"""
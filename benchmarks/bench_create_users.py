@@ -0,0 +1,77 @@
+"""
+ユーザ一括登録の方法を比較する性能測定スクリプトです。
+
+1 行ずつ登録する従来の create_users と、パスワードを並列にハッシュ化して 1 回のトランザクションで一括登録する
+--bulk の所要時間を出力します。--bulk は新規登録と、同じファイルを再度読み込んだ場合の更新を計測します。
+--fast-hasher を指定すると高速なハッシュ関数を使用し、データベースへの書き込みの所要時間だけを比較できます。
+
+    python -m benchmarks.bench_create_users --users 200 --workers 4
+"""
+import argparse
+import os
+import tempfile
+from io import StringIO
+
+from benchmarks.common import measure, report, setup_django, teardown_django
+
+
+def write_users(path: str, users: int):
+    """ユーザの CSV ファイルを作成します。
+
+    Args:
+        path (str): ファイルのパス
+        users (int): ユーザ数
+    """
+    with open(path, 'w', encoding='utf_8_sig') as f:
+        for i in range(users):
+            f.write('user{0:05d},password{0:05d},姓{0},名{0}\n'.format(i))
+
+
+def main():
+    """性能測定を実行します。
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--fast-hasher', dest='fast_hasher', action='store_true',
+                        help='use MD5 password hasher to measure database writes only')
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+
+    old_name = setup_django()
+    try:
+        from django.contrib.auth.models import User
+        from django.core.management import call_command
+        from django.test import override_settings
+
+        if args.fast_hasher:
+            override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']).enable()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'users.csv')
+            write_users(path, args.users)
+            print('{} users, {} workers (cpu count {})'.format(args.users, args.workers, os.cpu_count()))
+
+            def create(*options):
+                User.objects.all().delete()
+                call_command('create_users', path, *options, stdout=StringIO())
+
+            report('create_users (per row)', measure(create, args.repeat))
+            report('create_users --bulk --workers 1', measure(
+                lambda: create('--bulk', '--workers', '1'), args.repeat
+            ))
+            report('create_users --bulk --workers {}'.format(args.workers), measure(
+                lambda: create('--bulk', '--workers', str(args.workers)), args.repeat
+            ))
+            report('create_users --bulk (update)', measure(
+                lambda: call_command('create_users', path, '--bulk', '--workers', str(args.workers), stdout=StringIO()),
+                args.repeat
+            ))
+            if User.objects.count() != args.users:
+                raise AssertionError('user count mismatch')
+    finally:
+        teardown_django(old_name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+打刻記録と休暇申請の複合インデックスの有無で、主要な問い合わせの実行計画と実行時間を比較する性能測定スクリプトです。
+
+    python -m benchmarks.bench_indexes --users 500 --years 3
+"""
+import argparse
+import datetime
+import random
+
+from benchmarks.common import (create_dataset, measure, report, setup_django,
+                               teardown_django)
+
+
+def create_time_off_requests(usernames: list, begin: datetime.date, end: datetime.date):
+    """休暇申請の合成データを作成します。
+
+    Args:
+        usernames (list): ユーザ ID のリスト
+        begin (datetime.date): 期間の最初の日
+        end (datetime.date): 期間の翌日
+    """
+    from worktime.models import TimeOffRequest
+
+    rng = random.Random(2)
+    days = (end - begin).days
+    objects = []
+    for username in usernames:
+        for offset in rng.sample(range(days), min(days, days // 20)):
+            objects.append(TimeOffRequest(
+                date=begin + datetime.timedelta(days=offset),
+                username=username,
+                display_name=rng.choice(['有給休暇', '午前休', '午後休']),
+                attendance=False,
+                accepted=rng.random() < 0.9
+            ))
+    TimeOffRequest.objects.bulk_create(objects, batch_size=5000)
+
+
+def get_queries(usernames: list, end: datetime.date) -> dict:
+    """計測対象の問い合わせを生成します。
+
+    Args:
+        usernames (list): ユーザ ID のリスト
+        end (datetime.date): データ期間の翌日
+
+    Returns:
+        dict: 名称をキーにした QuerySet の dict
+    """
+    from django.db.models import Count, Max, Min, Q
+
+    from worktime.models import TimeOffRequest, TimeRecord
+    from worktime.utils import get_month_range
+
+    username = usernames[len(usernames) // 2]
+    last = end - datetime.timedelta(days=1)
+    begin, month_end = get_month_range(last.year, last.month)
+    return {
+        'recent punches': TimeRecord.objects.filter(
+            username=username
+        ).order_by('-date', '-time')[:10],
+        'monthly punches (1 user)': TimeRecord.objects.filter(
+            date__gte=begin, date__lt=month_end, username=username
+        ).values('date').annotate(
+            begin_record=Min('time', filter=Q(action='begin')),
+            end_record=Max('time', filter=Q(action='end'))
+        ).order_by(),
+        'monthly punches (all users)': TimeRecord.objects.filter(
+            date__gte=begin, date__lt=month_end, username__in=usernames
+        ).values('username', 'date').annotate(
+            begin_record=Min('time', filter=Q(action='begin')),
+            end_record=Max('time', filter=Q(action='end'))
+        ).order_by(),
+        'time off requests (1 user, 1 year)': TimeOffRequest.objects.filter(
+            date__gte=begin - datetime.timedelta(days=365), date__lt=month_end, username=username
+        ).values('display_name').annotate(count=Count('id')),
+        'time off request exists': TimeOffRequest.objects.filter(
+            date=last, username=username
+        ),
+    }
+
+
+def run(label: str, queries: dict, repeat: int):
+    """問い合わせの実行計画と実行時間を出力します。
+
+    Args:
+        label (str): 計測条件の名称
+        queries (dict): 名称をキーにした QuerySet の dict
+        repeat (int): 繰り返し回数
+    """
+    print('=== ' + label + ' ===')
+    for name, queryset in queries.items():
+        print('--- ' + name)
+        print(queryset.explain())
+        report(name, measure(lambda: list(queryset.all()), repeat))
+
+
+def main():
+    """性能測定を実行します。
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    old_name = setup_django()
+    try:
+        from django.db import connection
+
+        from worktime.models import TimeOffRequest, TimeRecord
+
+        usernames, begin, end = create_dataset(args.users, args.years)
+        create_time_off_requests(usernames, begin, end)
+        print('{} time records, {} time off requests'.format(
+            TimeRecord.objects.count(), TimeOffRequest.objects.count()
+        ))
+        queries = get_queries(usernames, end)
+
+        # 複合インデックスを削除して計測
+        # SQLite は制約の削除時にモデル定義からテーブルを再作成するため、定義を一時的に空にする
+        definitions = {}
+        with connection.schema_editor() as schema_editor:
+            for model in (TimeRecord, TimeOffRequest):
+                definitions[model] = (model._meta.indexes, model._meta.constraints)
+                for index in model._meta.indexes:
+                    schema_editor.remove_index(model, index)
+                model._meta.indexes = []
+                constraints = model._meta.constraints
+                model._meta.constraints = []
+                for constraint in constraints:
+                    schema_editor.remove_constraint(model, constraint)
+        for model, (indexes, constraints) in definitions.items():
+            model._meta.indexes = indexes
+            model._meta.constraints = constraints
+        with connection.cursor() as cursor:
+            if connection.vendor in ('sqlite', 'postgresql'):
+                cursor.execute('ANALYZE')
+        run('before (single-column indexes)', queries, args.repeat)
+
+        # 複合インデックスを作成して計測
+        with connection.schema_editor() as schema_editor:
+            for model in (TimeRecord, TimeOffRequest):
+                for index in model._meta.indexes:
+                    schema_editor.add_index(model, index)
+                for constraint in model._meta.constraints:
+                    schema_editor.add_constraint(model, constraint)
+        with connection.cursor() as cursor:
+            if connection.vendor in ('sqlite', 'postgresql'):
+                cursor.execute('ANALYZE')
+        run('after (composite indexes)', queries, args.repeat)
+    finally:
+        teardown_django(old_name)
+
+
+if __name__ == '__main__':
+    main()
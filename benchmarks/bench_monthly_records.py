@@ -0,0 +1,101 @@
+"""
+get_monthly_records の相関サブクエリ版と範囲集計版を比較する性能測定スクリプトです。
+
+    python -m benchmarks.bench_monthly_records --users 500 --years 3
+"""
+import argparse
+import random
+
+from benchmarks.common import (create_dataset, measure, report, setup_django,
+                               teardown_django)
+
+
+def legacy_get_monthly_records(username: str, year: int, month: int) -> list:
+    """相関サブクエリで打刻記録を取得する従来の実装です。
+
+    Args:
+        username (str): ユーザ ID
+        year (int): 西暦年
+        month (int): 月
+
+    Returns:
+        list: 打刻記録のリスト(日付順)
+    """
+    from django.db.models import Max, Min, OuterRef, Q, Subquery
+
+    from worktime.models import BusinessCalendar, TimeOffRequest, TimeRecord
+    from worktime.queries import apply_time_off_request
+    from worktime.rules import worktime_calculation
+
+    subquery = TimeRecord.objects.filter(date=OuterRef('date'), username=username).values('date').annotate(
+        begin_record=Min('time', filter=Q(action='begin')),
+        end_record=Max('time', filter=Q(action='end'))
+    )
+    queryset_records = BusinessCalendar.objects.filter(date__year=year, date__month=month).order_by('date').annotate(
+        begin_record=Subquery(subquery.values('begin_record')),
+        end_record=Subquery(subquery.values('end_record')),
+    ).values(
+        'date',
+        'holiday',
+        'attendance',
+        'begin',
+        'end',
+        'leave',
+        'back',
+        'begin_record',
+        'end_record',
+    )
+    records = list(queryset_records.values())
+    time_off_requests = {}
+    for record in TimeOffRequest.objects.filter(date__year=year, date__month=month, username=username).values(
+        'id', 'date', 'display_name', 'attendance', 'begin', 'end', 'leave', 'back', 'accepted'
+    ):
+        time_off_requests[record['date']] = record
+    for record in records:
+        apply_time_off_request(record, time_off_requests.get(record['date']))
+        record.update(worktime_calculation(record))
+    return records
+
+
+def main():
+    """性能測定を実行します。
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--samples', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    old_name = setup_django()
+    try:
+        from worktime.queries import get_monthly_records
+
+        usernames, begin, end = create_dataset(args.users, args.years)
+        months = []
+        for months_index in range(begin.year * 12 + begin.month - 1, end.year * 12 + end.month - 1):
+            months.append((months_index // 12, months_index % 12 + 1))
+        rng = random.Random(1)
+        samples = [(rng.choice(usernames), *rng.choice(months))
+                   for _ in range(args.samples)]
+        print('{} users, {} months, {} samples'.format(
+            len(usernames), len(months), len(samples)
+        ))
+
+        # 結果が一致することを確認
+        for username, year, month in samples:
+            if legacy_get_monthly_records(username, year, month) != get_monthly_records(username, year, month):
+                raise AssertionError(f'{username} {year}-{month} mismatch')
+
+        report('correlated subquery', measure(
+            lambda: [legacy_get_monthly_records(*sample) for sample in samples], args.repeat
+        ))
+        report('range-bounded group by', measure(
+            lambda: [get_monthly_records(*sample) for sample in samples], args.repeat
+        ))
+    finally:
+        teardown_django(old_name)
+
+
+if __name__ == '__main__':
+    main()
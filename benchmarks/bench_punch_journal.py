@@ -0,0 +1,82 @@
+"""
+打刻の直接登録とジャーナルへの追記で、打刻 1 件あたりの応答時間と一括登録の処理時間を比較する性能測定スクリプトです。
+
+    python -m benchmarks.bench_punch_journal --users 300 --punches 3000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.common import setup_django, teardown_django
+
+
+def report_latency(label: str, seconds: list):
+    """打刻ごとの応答時間の計測結果を出力します。
+
+    Args:
+        label (str): 計測対象の名称
+        seconds (list): 打刻ごとの応答時間 (秒) のリスト
+    """
+    seconds = sorted(seconds)
+    print('{:<32} p50 {:>8.3f} ms  p99 {:>8.3f} ms  total {:>8.3f} s'.format(
+        label,
+        seconds[len(seconds) // 2] * 1000,
+        seconds[min(len(seconds) - 1, int(len(seconds) * 0.99))] * 1000,
+        sum(seconds)
+    ))
+
+
+def main():
+    """性能測定を実行します。
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=300)
+    parser.add_argument('--punches', type=int, default=3000)
+    args = parser.parse_args()
+
+    old_name = setup_django()
+    try:
+        import timecard.settings
+        from worktime import journal
+        from worktime.models import TimeRecord
+        from worktime.punches import build_time_record, save_punch
+
+        def punch(index):
+            return build_time_record('user{:05d}'.format(index % args.users), {
+                'action': 'begin', 'latitude': '', 'longitude': '', 'accuracy': '', 'ua': 'bench'
+            })
+
+        # 直接登録
+        seconds = []
+        for index in range(args.punches):
+            started = time.perf_counter()
+            save_punch(punch(index))
+            seconds.append(time.perf_counter() - started)
+        report_latency('direct save', seconds)
+        TimeRecord.objects.all().delete()
+
+        # ジャーナルへの追記と一括登録
+        with tempfile.TemporaryDirectory() as directory:
+            timecard.settings.PUNCH_JOURNAL = os.path.join(directory, 'journal.sqlite3')
+            seconds = []
+            for index in range(args.punches):
+                started = time.perf_counter()
+                save_punch(punch(index))
+                seconds.append(time.perf_counter() - started)
+            report_latency('journal append', seconds)
+            started = time.perf_counter()
+            flushed = journal.flush_punches()
+            elapsed = time.perf_counter() - started
+            print('{:<32} {} punches in {:.3f} s ({:.3f} ms/punch)'.format(
+                'journal flush', flushed, elapsed, elapsed / flushed * 1000
+            ))
+            assert TimeRecord.objects.count() == args.punches
+            journal.connections.connection.close()
+            del journal.connections.connection
+    finally:
+        teardown_django(old_name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+始業時の打刻の集中を想定して、打刻画面のフォーム送信と非同期の打刻 API の応答時間を比較する性能測定スクリプトです。
+
+ASGI アプリケーションに対して、ユーザごとの同時打刻を指定した並列数で送信し、応答時間の p50 と p99 を出力します。
+フォーム送信はリダイレクト先の打刻画面の再表示までを 1 回の打刻として計測します。
+
+    python -m benchmarks.bench_record_api --users 300 --concurrency 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.common import setup_django, teardown_django
+
+
+def percentile(values: list, rate: float) -> float:
+    """パーセンタイル値を取得します。
+
+    Args:
+        values (list): 値のリスト
+        rate (float): 割合 (0 から 1)
+
+    Returns:
+        float: パーセンタイル値
+    """
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * rate))]
+
+
+async def punch_all(clients: list, concurrency: int, punch) -> tuple[list, float]:
+    """すべてのユーザの打刻を並列に送信します。
+
+    Args:
+        clients (list): ログイン済のクライアントのリスト
+        concurrency (int): 同時に送信する最大数
+        punch: クライアントを受け取り打刻を送信するコルーチン関数
+
+    Returns:
+        tuple[list, float]: 打刻ごとの応答時間 (秒) のリストと全体の所要時間 (秒)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    seconds = []
+
+    async def run(client):
+        async with semaphore:
+            started = time.perf_counter()
+            await punch(client)
+            seconds.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[run(client) for client in clients])
+    return seconds, time.perf_counter() - started
+
+
+def report_latency(label: str, seconds: list, elapsed: float):
+    """応答時間の計測結果を出力します。
+
+    Args:
+        label (str): 計測対象の名称
+        seconds (list): 打刻ごとの応答時間 (秒) のリスト
+        elapsed (float): 全体の所要時間 (秒)
+    """
+    print('{:<24} p50 {:>8.1f} ms  p99 {:>8.1f} ms  mean {:>8.1f} ms  {:>7.1f} punches/s'.format(
+        label,
+        percentile(seconds, 0.5) * 1000,
+        percentile(seconds, 0.99) * 1000,
+        statistics.mean(seconds) * 1000,
+        len(seconds) / elapsed
+    ))
+
+
+def main():
+    """性能測定を実行します。
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=300)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--recent', type=int, default=200, help='existing time records per user')
+    args = parser.parse_args()
+
+    old_name = setup_django()
+    try:
+        import datetime
+
+        from django.contrib.auth.models import User
+        from django.test import AsyncClient
+
+        from worktime.models import TimeRecord
+
+        # ユーザと過去の打刻記録
+        users = User.objects.bulk_create([
+            User(username='user{:05d}'.format(i), last_name='姓', first_name=str(i))
+            for i in range(args.users)
+        ])
+        today = datetime.date.today()
+        TimeRecord.objects.bulk_create([
+            TimeRecord(
+                date=today - datetime.timedelta(days=day), time=datetime.time(9, 0),
+                username=user.username, action='begin'
+            )
+            for user in users for day in range(1, args.recent + 1)
+        ], batch_size=5000)
+        data = {'action': 'begin', 'latitude': '35.681236', 'longitude': '139.767125', 'accuracy': '10', 'ua': 'bench'}
+
+        async def form_view(client):
+            response = await client.post('/worktime/record/', data, follow=True)
+            assert response.status_code == 200, response.status_code
+
+        async def api(client):
+            response = await client.post('/worktime/api/record/', data)
+            assert response.status_code == 201, response.status_code
+
+        async def run():
+            clients = []
+            for user in users:
+                client = AsyncClient()
+                await client.aforce_login(user)
+                clients.append(client)
+            for label, punch in [('form view (record/)', form_view), ('async api (api/record/)', api)]:
+                seconds, elapsed = await punch_all(clients, args.concurrency, punch)
+                report_latency(label, seconds, elapsed)
+
+        asyncio.run(run())
+    finally:
+        teardown_django(old_name)
+
+
+if __name__ == '__main__':
+    main()
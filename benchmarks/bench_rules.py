@@ -0,0 +1,239 @@
+"""
+worktime_calculation と minutes_to_hours の 1 件あたりの処理時間を測定するマイクロベンチマークです。
+
+    python -m benchmarks.bench_rules --count 1000000
+"""
+import argparse
+import datetime
+import os
+import random
+from decimal import ROUND_CEILING, Decimal
+
+import django
+
+from benchmarks.common import measure, report
+
+
+def legacy_worktime_calculation(obj) -> dict:
+    """時刻の差を都度計算する従来の実装です。
+
+    Args:
+        obj: 打刻記録オブジェクト
+
+    Raises:
+        ValueError: 打刻エラー
+
+    Returns:
+        dict: 計算結果の dict
+    """
+
+    # 初期化
+    result = {
+        'work': obj['begin_record'] is not None or obj['end_record'] is not None,
+        'behind':  0,
+        'early': 0,
+        'overtime': 0,
+        'error': None
+    }
+
+    # 本日の日付
+    today = datetime.datetime.now().date()
+
+    # データチェック
+    try:
+        if obj['date'] < today:
+            if obj['begin_record'] is None and obj['end_record'] is None:
+                if obj['attendance']:
+                    # 過去日で打刻なし
+                    raise ValueError('打刻がありません')
+                else:
+                    # 非営業日で打刻なし (正常)
+                    return result
+            elif obj['begin_record'] is not None and obj['end_record'] is None:
+                # 不完全打刻
+                raise ValueError('退勤がありません')
+            elif obj['begin_record'] is None and obj['end_record'] is not None:
+                # 不完全打刻
+                raise ValueError('出勤がありません')
+            else:
+                # 過去日で出退勤打刻の両方あるが前後矛盾
+                if obj['end_record'] < obj['begin_record']:
+                    raise ValueError('出勤と退勤の順序が不正です')
+        elif obj['date'] == today:
+            if obj['begin_record'] is None and obj['end_record'] is None:
+                # 本日で打刻なし (正常)
+                return result
+            elif obj['begin_record'] is not None and obj['end_record'] is None:
+                # 本日で退勤なし (正常)
+                return result
+            elif obj['begin_record'] is None and obj['end_record'] is not None:
+                # 不完全打刻
+                raise ValueError('出勤がありません')
+            else:
+                # 本日で出退勤打刻の両方あるが前後矛盾
+                if obj['end_record'] < obj['begin_record']:
+                    raise ValueError('出勤と退勤の順序が不正です')
+        else:
+            if obj['begin_record'] is not None or obj['end_record'] is not None:
+                # 未到来日で打刻あり
+                raise ValueError('未来日の打刻です')
+            else:
+                # 未到来日で打刻なし (正常)
+                return result
+
+    except ValueError as e:
+        result['error'] = e.args[0]
+        return result
+
+    # 非営業日の場合はすべて時間外として計算
+    if not obj['attendance']:
+        result['overtime'] = legacy_delta(obj['begin_record'], obj['end_record'])
+        return result
+
+    # 標準勤務時間と実働時間の算出
+    if obj['leave'] is not None and obj['back'] is not None:
+        section1_total = legacy_delta(obj['begin'], obj['leave'])
+        section1_record = max(0, legacy_delta(
+            max(obj['begin'], obj['begin_record']),
+            min(obj['end_record'], obj['leave'])
+        ))
+        section2_total = legacy_delta(obj['back'], obj['end'])
+        section2_record = max(0, legacy_delta(
+            max(obj['back'], obj['begin_record']),
+            min(obj['end_record'], obj['end'])
+        ))
+    else:
+        section1_total = legacy_delta(obj['begin'], obj['end'])
+        section1_record = max(0, legacy_delta(
+            max(obj['begin'], obj['begin_record']),
+            min(obj['end_record'], obj['end'])
+        ))
+        section2_total = 0
+        section2_record = 0
+
+    # 不足時間の算出
+    result['behind'] = (section1_total - section1_record) + \
+        (section2_total - section2_record)
+
+    # 早出時間の算出
+    result['early'] = max(0, legacy_delta(
+        obj['begin_record'],
+        min(obj['end_record'], obj['begin'])
+    ))
+
+    # 残業時間の算出
+    result['overtime'] = max(0, legacy_delta(
+        max(obj['end'], obj['begin_record']),
+        obj['end_record']
+    ))
+
+    # 結果返却
+    return result
+
+
+
+def legacy_delta(time1: datetime.time, time2: datetime.time) -> int:
+    """時刻の差を分で取得する従来の実装です。
+
+    Args:
+        time1 (datetime.time): 1個目の時刻
+        time2 (datetime.time): 2個目の時刻
+
+    Returns:
+        int: 1個目の時刻から2個目の時刻までの分数
+    """
+    seconds1 = time1.hour * 60 + time1.minute
+    seconds2 = time2.hour * 60 + time2.minute
+    return seconds2 - seconds1
+
+
+def legacy_minutes_to_hours(minutes: int, quantize: str, rounding_mode) -> Decimal:
+    """整数の分から時間の単位に変換する従来の実装です。
+
+    Args:
+        minutes (int): 分
+        quantize (str): 精度
+        rounding_mode: 丸めモード
+
+    Returns:
+        Decimal: 時間単位の値
+    """
+    return (Decimal(minutes) / Decimal(60)).quantize(Decimal(quantize), rounding=rounding_mode)
+
+
+def create_records(count: int) -> list:
+    """過去日の打刻記録の合成データを作成します。
+
+    Args:
+        count (int): 件数
+
+    Returns:
+        list: 勤務時間の分数を含む打刻記録のリスト
+    """
+    from worktime.rules import get_schedule_minutes
+
+    rng = random.Random(0)
+    date = datetime.datetime.now().date() - datetime.timedelta(days=1)
+    schedule = {
+        'begin': datetime.time(9, 0),
+        'end': datetime.time(17, 30),
+        'leave': datetime.time(12, 0),
+        'back': datetime.time(13, 0),
+    }
+    schedule.update(get_schedule_minutes(**schedule))
+    records = []
+    for _ in range(count):
+        record = {
+            'date': date,
+            'attendance': True,
+            'begin_record': datetime.time(rng.randrange(8, 10), rng.randrange(60)),
+            'end_record': datetime.time(rng.randrange(16, 20), rng.randrange(60)),
+        }
+        record.update(schedule)
+        records.append(record)
+    return records
+
+
+def main():
+    """性能測定を実行します。
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--count', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'timecard.settings')
+    django.setup()
+
+    from worktime.rules import MINUTES_FIELDS, worktime_calculation
+    from worktime.utils import minutes_to_hours
+
+    records = create_records(args.count)
+    time_records = [{key: value for key, value in record.items() if key not in MINUTES_FIELDS} for record in records]
+    for record, time_record in zip(records[:1000], time_records[:1000]):
+        if worktime_calculation(record) != legacy_worktime_calculation(time_record):
+            raise AssertionError('results differ')
+
+    # 勤務時間の計算
+    report('legacy (datetime.time)', measure(
+        lambda: [legacy_worktime_calculation(record) for record in time_records], args.repeat
+    ))
+    report('rules (times converted per call)', measure(
+        lambda: [worktime_calculation(record) for record in time_records], args.repeat
+    ))
+    report('rules (stored minutes)', measure(
+        lambda: [worktime_calculation(record) for record in records], args.repeat
+    ))
+
+    # 時間単位への変換
+    minutes = [i % 10000 for i in range(args.count)]
+    report('legacy minutes_to_hours', measure(
+        lambda: [legacy_minutes_to_hours(value, '0.1', ROUND_CEILING) for value in minutes], args.repeat
+    ))
+    report('minutes_to_hours', measure(
+        lambda: [minutes_to_hours(value, '0.1', ROUND_CEILING) for value in minutes], args.repeat
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+勤務スケジュールの割当の解決方法を比較する性能測定スクリプトです。
+
+ユーザと日付ごとに割当を問い合わせる方法と、割当の索引 (ScheduleIndex) を一度だけ作成して二分探索で解決する方法を比較し、
+勤務スケジュールを適用した場合としない場合の get_records_bulk の所要時間を出力します。
+日ごとの問い合わせは時間がかかるため、抽出したユーザと日付の組で計測して全体の所要時間を推計します。
+
+    python -m benchmarks.bench_schedules --users 1000 --months 12
+"""
+import argparse
+import datetime
+import random
+
+from benchmarks.common import (create_dataset, measure, report, setup_django,
+                               teardown_django)
+
+
+def query_schedule(username: str, date: datetime.date) -> int:
+    """ユーザと日付に割り当てた勤務スケジュールを 1 回の問い合わせで取得する方法です。
+
+    Args:
+        username (str): ユーザ ID
+        date (datetime.date): 日付
+
+    Returns:
+        int: 勤務スケジュール ID (割当がない場合は None)
+    """
+    from django.db.models import Q
+
+    from worktime.models import ScheduleAssignment
+
+    return ScheduleAssignment.objects.filter(
+        Q(valid_to__isnull=True) | Q(valid_to__gte=date), username=username, valid_from__lte=date
+    ).values_list('schedule_id', flat=True).first()
+
+
+def create_schedules(usernames: list, begin: datetime.date, end: datetime.date, rate: float, seed: int = 0):
+    """勤務スケジュールと割当の合成データを作成します。
+
+    早番、遅番、週末勤務の 3 種類の勤務スケジュールを作成し、指定した割合のユーザに 3 か月ごとに切り替えて割り当てます。
+
+    Args:
+        usernames (list): ユーザ ID のリスト
+        begin (datetime.date): 期間の開始日
+        end (datetime.date): 期間の終了日 (範囲に含まれません)
+        rate (float): 割り当てるユーザの割合
+        seed (int): 乱数の種
+    """
+    from worktime.models import (ScheduleAssignment, WorkSchedule,
+                                 WorkSchedulePattern)
+
+    rng = random.Random(seed)
+    schedules = []
+    for display_name, hours, days in [
+        ('早番', (7, 15), range(5)),
+        ('遅番', (13, 21), range(5)),
+        ('週末勤務', (10, 18), [3, 4, 5, 6, 7]),
+    ]:
+        schedule = WorkSchedule.objects.create(display_name=display_name)
+        for day in range(8):
+            if day in days:
+                WorkSchedulePattern.objects.create(
+                    schedule=schedule, day=day, attendance=True,
+                    begin=datetime.time(hours[0], 0), end=datetime.time(hours[1], 0),
+                    leave=datetime.time(hours[0] + 4, 0), back=datetime.time(hours[0] + 5, 0)
+                )
+            else:
+                WorkSchedulePattern.objects.create(schedule=schedule, day=day, attendance=False)
+        schedules.append(schedule)
+
+    assignments = []
+    for username in usernames:
+        if rate <= rng.random():
+            continue
+        months = begin.year * 12 + begin.month - 1
+        while True:
+            valid_from = datetime.date(months // 12, months % 12 + 1, 1)
+            months += 3
+            valid_to = datetime.date(months // 12, months % 12 + 1, 1) - datetime.timedelta(days=1)
+            if end <= valid_to:
+                assignments.append(ScheduleAssignment(username=username, schedule=rng.choice(schedules), valid_from=valid_from))
+                break
+            assignments.append(ScheduleAssignment(
+                username=username, schedule=rng.choice(schedules), valid_from=valid_from, valid_to=valid_to
+            ))
+    ScheduleAssignment.objects.bulk_create(assignments, batch_size=5000)
+
+
+def main():
+    """性能測定を実行します。
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--months', type=int, default=12)
+    parser.add_argument('--rate', type=float, default=0.5, help='rate of users with schedule assignments')
+    parser.add_argument('--samples', type=int, default=5000, help='user and date pairs for per-day queries')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    old_name = setup_django()
+    try:
+        from worktime import caches
+        from worktime.queries import get_records_bulk
+        from worktime.reference import WORK_SCHEDULE, get_calendars
+        from worktime.schedules import apply_schedules, build_schedule_index
+
+        usernames, begin, end = create_dataset(args.users, 1)
+        months = begin.year * 12 + begin.month - 1 + 12 - args.months
+        begin = datetime.date(months // 12, months % 12 + 1, 1)
+        calendars = get_calendars((begin, end))
+        pairs = [(username, calendar['date']) for username in usernames for calendar in calendars]
+        print('{} users, {} months, {} user-days'.format(len(usernames), args.months, len(pairs)))
+
+        # 勤務スケジュールなし
+        report('get_records_bulk, no schedules', measure(
+            lambda: get_records_bulk(usernames, (begin, end), 'numpy'), args.repeat
+        ))
+
+        create_schedules(usernames, begin, end, args.rate)
+        caches.invalidate(WORK_SCHEDULE)
+        index = build_schedule_index()
+
+        # 索引と日ごとの問い合わせの結果が一致することを確認
+        samples = random.Random(1).sample(pairs, min(args.samples, len(pairs)))
+        for username, date in samples[:200]:
+            if query_schedule(username, date) != index.lookup(username, date):
+                raise AssertionError(f'{username} {date} mismatch')
+
+        result = measure(lambda: [query_schedule(*pair) for pair in samples], 1)
+        report('query per user-day ({} samples)'.format(len(samples)), result)
+        print('{:<40} {:>10.4f} s (estimated)'.format(
+            'query per user-day (all)', result['min'] * len(pairs) / len(samples)
+        ))
+        report('build interval index', measure(build_schedule_index, args.repeat))
+        report('index lookup per user-day (all)', measure(
+            lambda: [index.lookup(*pair) for pair in pairs], args.repeat
+        ))
+        report('apply_schedules (all)', measure(
+            lambda: apply_schedules(usernames, calendars, index), args.repeat
+        ))
+        report('get_records_bulk, with schedules', measure(
+            lambda: get_records_bulk(usernames, (begin, end), 'numpy'), args.repeat
+        ))
+    finally:
+        teardown_django(old_name)
+
+
+if __name__ == '__main__':
+    main()
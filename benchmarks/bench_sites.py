@@ -0,0 +1,90 @@
+"""
+打刻位置に対応する勤務場所の検索を、空間インデックス、NumPy の全件比較、geodesic の全件比較で比較する性能測定スクリプトです。
+
+    python -m benchmarks.bench_sites --sites 10000 --punches 100000
+"""
+import argparse
+import random
+
+import numpy
+
+from benchmarks.common import measure, report
+
+
+def main():
+    """性能測定を実行します。
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sites', type=int, default=10000)
+    parser.add_argument('--punches', type=int, default=100000)
+    parser.add_argument('--linear', type=int, default=10, help='punches measured by the linear geodesic scan')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    from geopy.distance import geodesic
+
+    from worktime.geo import SiteIndex, chord_to_arc, to_cartesian
+
+    # 日本国内に勤務場所を配置し、打刻の多くは勤務場所の近くとする
+    rng = random.Random(0)
+    sites = [
+        (site_id, rng.uniform(31.0, 43.0), rng.uniform(130.0, 145.0), rng.choice([50.0, 100.0, 300.0]))
+        for site_id in range(args.sites)
+    ]
+    latitudes = []
+    longitudes = []
+    for _ in range(args.punches):
+        if rng.random() < 0.9:
+            site = rng.choice(sites)
+            latitudes.append(site[1] + rng.gauss(0, 0.001))
+            longitudes.append(site[2] + rng.gauss(0, 0.001))
+        else:
+            latitudes.append(rng.uniform(31.0, 43.0))
+            longitudes.append(rng.uniform(130.0, 145.0))
+
+    # NumPy の全件比較
+    site_points = to_cartesian([site[1] for site in sites], [site[2] for site in sites])
+    radius = numpy.array([site[3] for site in sites])
+
+    def brute_force(count):
+        points = to_cartesian(latitudes[:count], longitudes[:count])
+        results = []
+        for begin in range(0, count, 256):
+            distances = chord_to_arc(numpy.linalg.norm(points[begin:begin + 256, None, :] - site_points[None, :, :], axis=2))
+            inside = distances < radius
+            columns = numpy.where(
+                inside.any(axis=1), numpy.where(inside, distances, numpy.inf).argmin(axis=1), distances.argmin(axis=1)
+            )
+            results.extend(columns.tolist())
+        return results
+
+    # geodesic の全件比較
+    def linear(count):
+        results = []
+        for latitude, longitude in zip(latitudes[:count], longitudes[:count]):
+            matches = []
+            for site_id, site_latitude, site_longitude, site_radius in sites:
+                distance = geodesic((latitude, longitude), (site_latitude, site_longitude)).m
+                matches.append((distance >= site_radius, distance, site_id))
+            results.append(min(matches)[2])
+        return results
+
+    # 結果の一致を確認
+    index = SiteIndex(sites)
+    sample = min(1000, args.punches)
+    matches = [match[0] for match in index.match(latitudes[:sample], longitudes[:sample])]
+    if matches != brute_force(sample):
+        raise AssertionError('results differ')
+
+    report('build index ({} sites)'.format(args.sites), measure(lambda: SiteIndex(sites), args.repeat))
+    report('index ({} punches)'.format(args.punches), measure(
+        lambda: index.match(latitudes, longitudes), args.repeat
+    ))
+    report('numpy brute force ({} punches)'.format(args.punches), measure(
+        lambda: brute_force(args.punches), 1
+    ))
+    report('geodesic linear ({} punches)'.format(args.linear), measure(lambda: linear(args.linear), 1))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+月次勤務集計を Python、NumPy、SQL の各計算方法で比較する性能測定スクリプトです。
+
+    python -m benchmarks.bench_sql_rules --users 500 --years 1
+"""
+import argparse
+
+from benchmarks.common import (create_dataset, measure, report, setup_django,
+                               teardown_django)
+
+
+def main():
+    """性能測定を実行します。
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--years', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    old_name = setup_django()
+    try:
+        from worktime.queries import get_monthly_summaries
+
+        usernames, begin, end = create_dataset(args.users, args.years)
+        months = []
+        for months_index in range(begin.year * 12 + begin.month - 1, end.year * 12 + end.month - 1):
+            months.append((months_index // 12, months_index % 12 + 1))
+
+        # 結果の一致を確認
+        for year, month in months:
+            expected = get_monthly_summaries(usernames, year, month)
+            for engine in ['numpy', 'sql']:
+                if get_monthly_summaries(usernames, year, month, engine) != expected:
+                    raise AssertionError('results differ: {} {}-{}'.format(engine, year, month))
+
+        # 全ユーザの全月の集計
+        for engine in ['python', 'numpy', 'sql']:
+            report('{} months x {} users ({})'.format(len(months), len(usernames), engine), measure(
+                lambda: [get_monthly_summaries(usernames, year, month, engine) for year, month in months],
+                args.repeat
+            ))
+    finally:
+        teardown_django(old_name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+勤務実績の計算を worktime_calculation の逐次評価と NumPy の一括評価で比較する性能測定スクリプトです。
+
+    python -m benchmarks.bench_vectorized --users 500 --years 1
+"""
+import argparse
+
+from benchmarks.common import (create_dataset, measure, report, setup_django,
+                               teardown_django)
+
+
+def main():
+    """性能測定を実行します。
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--years', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    old_name = setup_django()
+    try:
+        from worktime.queries import get_records_bulk
+        from worktime.rules import worktime_calculation
+        from worktime.vectorized import calculate_records
+
+        usernames, begin, end = create_dataset(args.users, args.years)
+
+        # 計算前の打刻記録を取得
+        results = get_records_bulk(usernames, (begin, end))
+        records = [record for records in results.values() for record in records]
+        print('{} user-days'.format(len(records)))
+
+        # 結果の一致を確認
+        if get_records_bulk(usernames, (begin, end), 'numpy') != results:
+            raise AssertionError('results differ')
+
+        # 計算のみの実行時間
+        report('calculation (python)', measure(
+            lambda: [worktime_calculation(record) for record in records], args.repeat
+        ))
+        report('calculation (numpy)', measure(
+            lambda: calculate_records([dict(record) for record in records]), args.repeat
+        ))
+
+        # 問い合わせを含む実行時間
+        report('get_records_bulk (python)', measure(
+            lambda: get_records_bulk(usernames, (begin, end), 'python'), args.repeat
+        ))
+        report('get_records_bulk (numpy)', measure(
+            lambda: get_records_bulk(usernames, (begin, end), 'numpy'), args.repeat
+        ))
+    finally:
+        teardown_django(old_name)
+
+
+if __name__ == '__main__':
+    main()
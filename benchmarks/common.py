@@ -0,0 +1,132 @@
+"""
+性能測定スクリプトの共通処理です。
+"""
+import datetime
+import os
+import random
+import statistics
+import time
+
+import django
+
+
+def setup_django():
+    """Django を初期化して一時的なテスト用データベースを作成します。
+
+    Returns:
+        str: 元のデータベース名 (teardown_django に渡します)
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'timecard.settings')
+    django.setup()
+    from django.db import connection
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    return old_name
+
+
+def teardown_django(old_name: str):
+    """一時的なテスト用データベースを破棄します。
+
+    Args:
+        old_name (str): 元のデータベース名
+    """
+    from django.db import connection
+    connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def measure(func, repeat: int = 5) -> dict:
+    """関数の実行時間を計測します。
+
+    Args:
+        func: 計測する関数 (引数なし)
+        repeat (int): 繰り返し回数
+
+    Returns:
+        dict: 最小値と中央値 (秒) の dict
+    """
+    seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - started)
+    return {'min': min(seconds), 'median': statistics.median(seconds)}
+
+
+def report(label: str, result: dict):
+    """計測結果を出力します。
+
+    Args:
+        label (str): 計測対象の名称
+        result (dict): measure の結果
+    """
+    print('{:<40} min {:>10.4f} s  median {:>10.4f} s'.format(
+        label, result['min'], result['median']
+    ))
+
+
+def create_dataset(users: int, years: int, seed: int = 0) -> tuple[list, datetime.date, datetime.date]:
+    """営業日カレンダと打刻記録の合成データを作成します。
+
+    平日は 9:00-17:00 (休憩 12:00-13:00) の営業日とし、各ユーザは営業日に出勤と退勤を 1 回ずつ打刻します。
+
+    Args:
+        users (int): ユーザ数
+        years (int): 年数 (今月を最終月とします)
+        seed (int): 乱数の種
+
+    Returns:
+        tuple[list, datetime.date, datetime.date]: ユーザ ID のリストと期間 (終了日は範囲に含まれません)
+    """
+    from worktime.models import BusinessCalendar, TimeRecord
+
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    end = datetime.date(today.year + (today.month // 12), today.month % 12 + 1, 1)
+    begin = datetime.date(end.year - years, end.month, 1)
+    usernames = ['user{:05d}'.format(i) for i in range(users)]
+
+    # 営業日カレンダ
+    calendars = []
+    date = begin
+    while date < end:
+        if date.weekday() < 5:
+            calendars.append(BusinessCalendar(
+                date=date,
+                attendance=True,
+                holiday='',
+                begin=datetime.time(9, 0),
+                end=datetime.time(17, 0),
+                leave=datetime.time(12, 0),
+                back=datetime.time(13, 0)
+            ))
+        else:
+            calendars.append(BusinessCalendar(
+                date=date, attendance=False, holiday='定休日'
+            ))
+        calendars[-1].update_schedule_minutes()
+        date += datetime.timedelta(days=1)
+    BusinessCalendar.objects.bulk_create(calendars)
+
+    # 打刻記録
+    records = []
+    for calendar in calendars:
+        if not calendar.attendance or today <= calendar.date:
+            continue
+        for username in usernames:
+            records.append(TimeRecord(
+                date=calendar.date,
+                time=datetime.time(8, rng.randrange(30, 60)),
+                username=username,
+                action='begin'
+            ))
+            records.append(TimeRecord(
+                date=calendar.date,
+                time=datetime.time(rng.randrange(16, 20), rng.randrange(0, 60)),
+                username=username,
+                action='end'
+            ))
+        if 50000 <= len(records):
+            TimeRecord.objects.bulk_create(records, batch_size=5000)
+            records = []
+    TimeRecord.objects.bulk_create(records, batch_size=5000)
+    return usernames, begin, end
@@ -0,0 +1,17 @@
+import os
+from pathlib import Path
+DEBUG = True
+ALLOWED_HOSTS = ['*']
+SECRET_KEY = 'abcdef123456'
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATABASES = { 'default': { 'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / 'db.sqlite3', } }
+STATICFILES_DIRS = ( os.path.join(Path(__file__).resolve().parent.parent, 'static'), )
+SESSION_COOKIE_AGE = 3600
+CALENDAR_MONTHS = 12
+YEAR_FIRST_MONTH = 4
+ENABLE_CHECK_LOCATION = True
+ENABLE_RECORD_SOUND = True
+ENABLE_RECORD_VIBRATE = True
+LOCATION_ORIGIN = (0, 0)
+MAX_ACCURACY = 1000
+MAX_DISTANCE = 1000
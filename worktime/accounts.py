@@ -0,0 +1,228 @@
+"""
+CSV ファイルからユーザを一括で登録し、パスワードを一括で変更する処理です。
+
+CSV ファイルは 1 行ずつ読み込み、batch_size 行ごとにパスワードをハッシュ化します。
+パスワードのハッシュ化は 1 件ごとに時間がかかるため、workers に 2 以上を指定すると複数のプロセスで並列に実行します。
+データベースへの書き込みは、打刻などの書き込みを長時間妨げないようハッシュ化の完了後に 1 回のトランザクションで行います。
+不正な行は書き込まずにエラーとして返します。
+"""
+import concurrent.futures
+import csv
+import itertools
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from worktime.utils import invalidate_user_directory
+
+# 一括登録で更新するユーザの項目
+USER_FIELDS = ['password', 'last_name', 'first_name']
+
+# プロセスに一度に渡すパスワードの件数
+HASH_CHUNK_SIZE = 8
+
+
+def setup_worker():
+    """パスワードをハッシュ化するプロセスで Django を初期化します。
+    """
+    django.setup()
+
+
+def read_rows(path: str):
+    """CSV ファイルを 1 行ずつ読み込みます。空の行は読み飛ばします。
+
+    Args:
+        path (str): ファイルのパス (UTF-8)
+
+    Yields:
+        tuple[int, list]: 行番号と項目のリスト
+    """
+    with open(path, 'r', encoding='utf_8_sig', newline='') as f:
+        reader = csv.reader(f)
+        for columns in reader:
+            if columns:
+                yield reader.line_num, columns
+
+
+def batched(iterable, size: int):
+    """iterable を指定した件数ごとのリストに分割します。
+
+    Args:
+        iterable: 分割する iterable
+        size (int): 件数
+
+    Yields:
+        list: 要素のリスト
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def hash_passwords(passwords: list, executor: concurrent.futures.Executor = None) -> list:
+    """パスワードをハッシュ化します。
+
+    Args:
+        passwords (list): パスワードのリスト
+        executor (concurrent.futures.Executor): ハッシュ化を実行するプロセスプール (省略時は現在のプロセスで実行)
+
+    Returns:
+        list: ハッシュ化したパスワードのリスト
+    """
+    if executor is None:
+        return [make_password(password) for password in passwords]
+    return list(executor.map(make_password, passwords, chunksize=HASH_CHUNK_SIZE))
+
+
+def create_executor(workers: int) -> concurrent.futures.Executor:
+    """パスワードをハッシュ化するプロセスプールを作成します。
+
+    Args:
+        workers (int): プロセス数
+
+    Returns:
+        concurrent.futures.Executor: プロセスプール (workers が 1 以下の場合は None)
+    """
+    if workers is None or workers <= 1:
+        return None
+    return concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=setup_worker)
+
+
+def validate_user(columns: list) -> User:
+    """CSV の行からユーザを作成し、値を検査します。
+
+    Args:
+        columns (list): ID,パスワード,姓,名 の順の項目のリスト
+
+    Raises:
+        ValidationError: 値の不正
+
+    Returns:
+        User: 保存前のユーザ (パスワードは平文)
+    """
+    if len(columns) < 4:
+        raise ValidationError('4 columns are required.')
+    user = User(username=columns[0], password=columns[1], last_name=columns[2], first_name=columns[3])
+    for field in ['username', 'last_name', 'first_name']:
+        User._meta.get_field(field).clean(getattr(user, field), user)
+    return user
+
+
+def save_users(path: str, workers: int = None, batch_size: int = 1000) -> tuple[int, int, list]:
+    """CSV ファイルのユーザを一括で登録します。登録済のユーザはパスワードと氏名を更新します。
+
+    Args:
+        path (str): ファイルのパス (ID,パスワード,姓,名 の順の UTF-8 の CSV)
+        workers (int): パスワードをハッシュ化するプロセス数
+        batch_size (int): 1 回にハッシュ化して書き込む件数
+
+    Returns:
+        tuple[int, int, list]: 登録した件数、更新した件数、行番号とユーザ ID とエラーメッセージのタプルのリスト
+    """
+    errors = []
+    usernames = set()
+    users = []
+    executor = create_executor(workers)
+    try:
+        for rows in batched(read_rows(path), batch_size):
+            batch = []
+            for line, columns in rows:
+                try:
+                    user = validate_user(columns)
+                except ValidationError as e:
+                    errors.append((line, columns[0], ' '.join(e.messages)))
+                    continue
+                if user.username in usernames:
+                    errors.append((line, user.username, 'Duplicate username in the file.'))
+                    continue
+                usernames.add(user.username)
+                batch.append(user)
+            for user, password in zip(batch, hash_passwords([user.password for user in batch], executor)):
+                user.password = password
+            users += batch
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    # ハッシュ化の完了後に 1 回のトランザクションで一括登録 (登録済のユーザは更新)
+    updated = 0
+    with transaction.atomic():
+        for batch in batched(users, batch_size):
+            ids = dict(User.objects.filter(
+                username__in=[user.username for user in batch]
+            ).values_list('username', 'id'))
+            existing = []
+            new = []
+            for user in batch:
+                if user.username in ids:
+                    user.id = ids[user.username]
+                    existing.append(user)
+                else:
+                    new.append(user)
+            User.objects.bulk_update(existing, USER_FIELDS)
+            User.objects.bulk_create(
+                new, update_conflicts=True, unique_fields=['username'], update_fields=USER_FIELDS
+            )
+            updated += len(existing)
+
+        # 一括登録ではシグナルが発生しないため、ユーザ一覧のキャッシュを無効化
+        invalidate_user_directory()
+    errors.sort()
+    return len(users) - updated, updated, errors
+
+
+def change_passwords(path: str, workers: int = None, batch_size: int = 1000) -> tuple[int, list]:
+    """CSV ファイルのユーザのパスワードを一括で変更します。
+
+    Args:
+        path (str): ファイルのパス (ID,パスワード の順の UTF-8 の CSV)
+        workers (int): パスワードをハッシュ化するプロセス数
+        batch_size (int): 1 回にハッシュ化して書き込む件数
+
+    Returns:
+        tuple[int, list]: 変更した件数、行番号とユーザ ID とエラーメッセージのタプルのリスト
+    """
+    errors = []
+    usernames = set()
+    users = []
+    executor = create_executor(workers)
+    try:
+        for rows in batched(read_rows(path), batch_size):
+            valid_rows = []
+            for line, columns in rows:
+                if len(columns) < 2:
+                    errors.append((line, columns[0], '2 columns are required.'))
+                elif columns[0] in usernames:
+                    errors.append((line, columns[0], 'Duplicate username in the file.'))
+                else:
+                    usernames.add(columns[0])
+                    valid_rows.append((line, columns[0], columns[1]))
+
+            # 登録済のユーザだけを変更
+            ids = dict(User.objects.filter(
+                username__in=[username for _, username, _ in valid_rows]
+            ).values_list('username', 'id'))
+            batch = []
+            for line, username, password in valid_rows:
+                if username in ids:
+                    batch.append(User(id=ids[username], username=username, password=password))
+                else:
+                    errors.append((line, username, 'User does not exist.'))
+            for user, password in zip(batch, hash_passwords([user.password for user in batch], executor)):
+                user.password = password
+            users += batch
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    # ハッシュ化の完了後に 1 回のトランザクションで一括更新
+    with transaction.atomic():
+        User.objects.bulk_update(users, ['password'], batch_size=batch_size)
+    errors.sort()
+    return len(users), errors
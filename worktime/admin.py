@@ -3,13 +3,42 @@
 """
 from django.contrib import admin
 from django.contrib.admin.sites import AdminSite
-from django.utils import dateformat
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.auth.models import User
+from django.db.models import Case, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Concat, Trim
+from django.utils import dateformat, timezone
 
 import timecard.settings
-from worktime.models import (BusinessCalendar, StandardWorkPattern,
-                             TimeOffPattern, TimeOffRequest, TimeRecord)
+from worktime.geo import get_locations
+from worktime.models import (BusinessCalendar, Holiday, ScheduleAssignment,
+                             StandardWorkPattern, TimeOffPattern,
+                             TimeOffRequest, TimeRecord, WorkSchedule,
+                             WorkSchedulePattern, WorkSite)
+from worktime.paginators import EstimatedCountPaginator
+from worktime.reference import is_virtual_calendar
+from worktime.signals import notify_worktime_changed
 from worktime.utils import truncate_text
 
+
+def annotate_display_username(queryset):
+    """ユーザ ID に対応する氏名を user_display_name として付加します。
+
+    Args:
+        queryset: username 項目を持つモデルのクエリセット
+
+    Returns:
+        氏名を付加したクエリセット
+    """
+    users = User.objects.filter(username=OuterRef('username')).annotate(
+        name=Case(
+            When(Q(last_name='') & Q(first_name=''), then='username'),
+            default=Trim(Concat('last_name', Value(' '), 'first_name'))
+        )
+    ).values('name')[:1]
+    return queryset.annotate(user_display_name=Subquery(users))
+
+
 # Admin 画面のタイトル
 AdminSite.site_header = 'システム管理'
 AdminSite.site_title = 'システム管理'
@@ -83,14 +112,19 @@ class BusinessCalendarAdmin(admin.ModelAdmin):
     """
 
     def has_add_permission(self, request, obj=None):
-        """追加を無効化します。
+        """勤務パターンと祝日から営業日カレンダを求める場合を除き、追加を無効化します。
         """
-        return False
+        return is_virtual_calendar() and super().has_add_permission(request)
 
     def has_delete_permission(self, request, obj=None):
-        """削除を無効化します。
+        """勤務パターンと祝日から営業日カレンダを求める場合を除き、削除を無効化します。
         """
-        return False
+        return is_virtual_calendar() and super().has_delete_permission(request, obj)
+
+    def get_readonly_fields(self, request, obj=None):
+        """登録済の日だけ日付を変更不可にします。
+        """
+        return ['date'] if obj is not None else []
 
     def formatted_date(self, obj):
         """フォーマット指定した日付文字列を取得します。
@@ -103,6 +137,13 @@ class BusinessCalendarAdmin(admin.ModelAdmin):
         """
         return dateformat.format(obj.date, 'Y/m/d (D)')
 
+    def save_model(self, request, obj, form, change):
+        """個別に変更した日を記録して保存します。
+        """
+        if not change or set(form.changed_data) - {'customized'}:
+            obj.customized = True
+        super().save_model(request, obj, form, change)
+
     # 設定
     formatted_date.short_description = '日付'
     list_display = [
@@ -112,14 +153,136 @@ class BusinessCalendarAdmin(admin.ModelAdmin):
         'begin',
         'end',
         'leave',
-        'back'
+        'back',
+        'customized'
     ]
     ordering = ['date']
-    list_filter = ['date']
-    readonly_fields = ['date']
+    list_filter = ['date', 'customized']
+    actions = None
+
+
+@admin.register(Holiday)
+class HolidayAdmin(admin.ModelAdmin):
+    """祝日の管理モデルです。
+
+    Args:
+        admin (ModelAdmin): 継承するモデル
+    """
+
+    # 設定
+    list_display = ['date', 'name']
+    ordering = ['date']
+    date_hierarchy = 'date'
+
+
+@admin.register(WorkSite)
+class WorkSiteAdmin(admin.ModelAdmin):
+    """勤務場所の管理モデルです。
+
+    Args:
+        admin (ModelAdmin): 継承するモデル
+    """
+
+    # 設定
+    list_display = ['name', 'latitude', 'longitude', 'radius']
+    ordering = ['name']
+    search_fields = ['name']
+
+
+class WorkSchedulePatternInline(admin.TabularInline):
+    """勤務スケジュールの勤務パターンの管理モデルです。
+
+    Args:
+        admin (TabularInline): 継承するモデル
+    """
+
+    # 設定
+    model = WorkSchedulePattern
+    fields = ['day', 'attendance', 'begin', 'end', 'leave', 'back']
+    ordering = ['day']
+    extra = 0
+    max_num = len(timecard.settings.DAY_OF_WEEK)
+
+
+@admin.register(WorkSchedule)
+class WorkScheduleAdmin(admin.ModelAdmin):
+    """勤務スケジュールの管理モデルです。
+
+    Args:
+        admin (ModelAdmin): 継承するモデル
+    """
+
+    # 設定
+    inlines = [WorkSchedulePatternInline]
+    list_display = ['id', 'display_name']
+    ordering = ['id']
     actions = None
 
 
+@admin.register(ScheduleAssignment)
+class ScheduleAssignmentAdmin(admin.ModelAdmin):
+    """勤務スケジュールの割当の管理モデルです。
+
+    Args:
+        admin (ModelAdmin): 継承するモデル
+    """
+
+    def display_username(self, obj):
+        """氏名を取得します。
+
+        Args:
+            obj: 勤務スケジュールの割当のオブジェクト
+
+        Returns:
+            str: 氏名
+        """
+        if hasattr(obj, 'user_display_name'):
+            return obj.user_display_name
+        return obj.display_username()
+
+    def get_queryset(self, request):
+        """一覧のクエリセットに氏名を付加します。
+
+        Args:
+            request: リクエスト情報
+
+        Returns:
+            クエリセット
+        """
+        return annotate_display_username(super().get_queryset(request))
+
+    # 設定
+    display_username.short_description = '氏名'
+    display_username.admin_order_field = 'user_display_name'
+    list_display = ['username', 'display_username', 'schedule', 'valid_from', 'valid_to']
+    list_select_related = ['schedule']
+    ordering = ['username', 'valid_from']
+    list_filter = ['schedule']
+    search_fields = ['username']
+    actions = None
+
+
+class TimeRecordChangeList(ChangeList):
+    """打刻記録の一覧です。
+
+    表示するページの位置情報をまとめて判定します。
+
+    Args:
+        ChangeList: 継承するクラス
+    """
+
+    def get_results(self, request):
+        """表示するページの打刻記録を取得します。
+
+        Args:
+            request: リクエスト情報
+        """
+        super().get_results(request)
+        self.result_list = list(self.result_list)
+        for record, location in zip(self.result_list, get_locations(self.result_list)):
+            record.location_text = location
+
+
 @admin.register(TimeRecord)
 class TimeRecordAdmin(admin.ModelAdmin):
     """打刻記録の管理モデルです。
@@ -142,8 +305,21 @@ class TimeRecordAdmin(admin.ModelAdmin):
         Returns:
             str: 氏名
         """
+        if hasattr(obj, 'user_display_name'):
+            return obj.user_display_name
         return obj.display_username()
 
+    def get_queryset(self, request):
+        """一覧のクエリセットに氏名を付加します。
+
+        Args:
+            request: リクエスト情報
+
+        Returns:
+            クエリセット
+        """
+        return annotate_display_username(super().get_queryset(request))
+
     def display_action(self, obj):
         """打刻種別の表示用文字列を取得します。
 
@@ -164,8 +340,21 @@ class TimeRecordAdmin(admin.ModelAdmin):
         Returns:
             str: 位置情報
         """
+        if hasattr(obj, 'location_text'):
+            return obj.location_text
         return obj.location()
 
+    def get_changelist(self, request, **kwargs):
+        """一覧のクラスを取得します。
+
+        Args:
+            request: リクエスト情報
+
+        Returns:
+            一覧のクラス
+        """
+        return TimeRecordChangeList
+
     def change_view(self, request, object_id, form_url="", extra_context=None):
         """詳細画面に拡張コンテキストを追加します。
 
@@ -181,10 +370,17 @@ class TimeRecordAdmin(admin.ModelAdmin):
         extra_context = extra_context or {}
         extra_context['LOCATION_ORIGIN'] = timecard.local_settings.LOCATION_ORIGIN
         extra_context['MAX_DISTANCE'] = timecard.local_settings.MAX_DISTANCE
+
+        # 勤務場所で判定した打刻記録は勤務場所を基点として表示
+        record = TimeRecord.objects.filter(pk=object_id).select_related('site').first()
+        if record and record.site:
+            extra_context['LOCATION_ORIGIN'] = (record.site.latitude, record.site.longitude)
+            extra_context['MAX_DISTANCE'] = record.site.radius
         return super().change_view(request, object_id, form_url, extra_context=extra_context)
 
     # 設定
     display_username.short_description = '氏名'
+    display_username.admin_order_field = 'user_display_name'
     display_action.short_description = '種別'
     display_location.short_description = '位置情報'
     readonly_fields = [
@@ -194,6 +390,7 @@ class TimeRecordAdmin(admin.ModelAdmin):
         'time',
         'display_action',
         'display_location',
+        'site',
         'ua'
     ]
     exclude = [
@@ -212,8 +409,11 @@ class TimeRecordAdmin(admin.ModelAdmin):
         'created_at'
     ]
     ordering = ['date', 'time']
-    list_filter = ['date']
+    list_filter = ['date', 'location_status']
+    date_hierarchy = 'date'
     search_fields = ['username']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     actions = None
 
 
@@ -239,8 +439,21 @@ class TimeOffRequestAdmin(admin.ModelAdmin):
         Returns:
             str: 氏名
         """
+        if hasattr(obj, 'user_display_name'):
+            return obj.user_display_name
         return obj.display_username()
 
+    def get_queryset(self, request):
+        """一覧のクエリセットに氏名を付加します。
+
+        Args:
+            request: リクエスト情報
+
+        Returns:
+            クエリセット
+        """
+        return annotate_display_username(super().get_queryset(request))
+
     def display_contact(self, obj):
         """連絡欄を取得します。
 
@@ -254,6 +467,7 @@ class TimeOffRequestAdmin(admin.ModelAdmin):
 
     # 設定
     display_username.short_description = '氏名'
+    display_username.admin_order_field = 'user_display_name'
     display_contact.short_description = '連絡欄'
     readonly_fields = [
         'username',
@@ -278,7 +492,10 @@ class TimeOffRequestAdmin(admin.ModelAdmin):
     ]
     ordering = ['date', 'username']
     list_filter = ['date', 'accepted']
+    date_hierarchy = 'date'
     search_fields = ['username']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     actions = ['action_accept']
 
     def action_accept(self, request, queryset):
@@ -288,6 +505,9 @@ class TimeOffRequestAdmin(admin.ModelAdmin):
             request: リクエスト情報
             queryset: 選択されたレコード
         """
-        queryset.update(accepted=True)
+        targets = list(queryset.filter(accepted=False).values_list('username', 'date'))
+        queryset.update(accepted=True, updated_at=timezone.now())
+        for username, date in targets:
+            notify_worktime_changed([username], [date])
 
     action_accept.short_description = '選択された 休暇申請 の承認'
@@ -13,3 +13,9 @@ class WorktimeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'worktime'
     verbose_name = 'T-RECS'
+
+    def ready(self):
+        """シグナル処理とシステムチェックを登録します。
+        """
+        import worktime.checks
+        import worktime.signals
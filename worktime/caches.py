@@ -0,0 +1,191 @@
+"""
+Django のキャッシュを使用した、バージョン付きのキャッシュ処理です。
+
+キャッシュするデータには名前ごとにバージョンを割り当て、データはバージョンを含むキーで保存します。
+データを変更した場合はバージョンを更新するだけで、古いデータは参照されなくなります。
+同じバージョンのデータはプロセス内にも保持し、共有キャッシュからの読み込みを省略します。
+プロセス内に保持するデータは LOCAL_MAX_ENTRIES 件までとし、最も長く参照されていないデータから破棄します。
+"""
+import collections
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+# キャッシュキーの接頭辞
+KEY_PREFIX = 'worktime'
+
+# データの有効期限 (秒)
+TIMEOUT = 86400
+
+# プロセス内に保持する最大の件数
+LOCAL_MAX_ENTRIES = 4096
+
+# プロセス内に保持するデータ ((名前, キー): (バージョン, データ)、参照順)
+local_values = collections.OrderedDict()
+local_lock = threading.Lock()
+
+# トランザクション内で無効にしたデータの名前 (スレッドごと)
+changed = threading.local()
+
+# 名前ごとのキャッシュのヒット数とミス数
+hits = collections.Counter()
+misses = collections.Counter()
+
+
+def get_version(name: str) -> str:
+    """データの現在のバージョンを取得します。
+
+    Args:
+        name (str): データの名前
+
+    Returns:
+        str: バージョン
+    """
+    key = '{}:{}:version'.format(KEY_PREFIX, name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def get_values(name: str, keys: list, builder) -> dict:
+    """キャッシュから複数のデータを取得します。
+
+    キャッシュにないデータは builder にキーのリストを渡して一括で作成し、キャッシュに保存します。
+    未確定のデータを保存しないよう、トランザクション内でデータを無効にした後はキャッシュに保存しません。
+
+    Args:
+        name (str): データの名前
+        keys (list): データのキー (文字列) のリスト
+        builder: キーのリストを受け取り、キーとデータの dict を返す関数
+
+    Returns:
+        dict: キーとデータの dict (データは呼び出し元で変更しないでください)
+    """
+    version = get_version(name)
+    results = {}
+    missing = []
+    for key in keys:
+        value = local_values.get((name, key))
+        if value is not None and value[0] == version:
+            results[key] = value[1]
+            with local_lock:
+                if (name, key) in local_values:
+                    local_values.move_to_end((name, key))
+        else:
+            missing.append(key)
+
+    # 共有キャッシュから読み込み
+    if missing:
+        cache_keys = {'{}:{}:{}:{}'.format(KEY_PREFIX, name, version, key): key for key in missing}
+        for cache_key, value in cache.get_many(list(cache_keys)).items():
+            results[cache_keys[cache_key]] = value
+            set_local_value(name, cache_keys[cache_key], version, value)
+        missing = [key for key in missing if key not in results]
+    hits[name] += len(keys) - len(missing)
+    misses[name] += len(missing)
+
+    # キャッシュにないデータを作成
+    if missing:
+        values = builder(missing)
+        results.update(values)
+        if not is_changed(name):
+            cache.set_many({
+                '{}:{}:{}:{}'.format(KEY_PREFIX, name, version, key): values[key] for key in missing
+            }, TIMEOUT)
+            for key in missing:
+                set_local_value(name, key, version, values[key])
+    return results
+
+
+def set_local_value(name: str, key: str, version: str, value):
+    """プロセス内にデータを保持します。
+
+    LOCAL_MAX_ENTRIES 件を超えた場合は、最も長く参照されていないデータを破棄します。
+
+    Args:
+        name (str): データの名前
+        key (str): データのキー
+        version (str): バージョン
+        value: データ
+    """
+    with local_lock:
+        local_values[(name, key)] = (version, value)
+        local_values.move_to_end((name, key))
+        while LOCAL_MAX_ENTRIES < len(local_values):
+            local_values.popitem(last=False)
+
+
+def is_changed(name: str) -> bool:
+    """実行中のトランザクション内でデータを無効にしたか判定します。
+
+    Args:
+        name (str): データの名前
+
+    Returns:
+        bool: 無効にした場合は True
+    """
+    names = getattr(changed, 'names', None)
+    if not names:
+        return False
+    if not connection.in_atomic_block:
+        names.clear()
+        return False
+    return name in names
+
+
+def mark_changed(name: str):
+    """実行中のトランザクション内でデータを無効にしたことを記録します。
+
+    Args:
+        name (str): データの名前
+    """
+    if connection.in_atomic_block:
+        if not hasattr(changed, 'names'):
+            changed.names = set()
+        changed.names.add(name)
+
+
+def get_value(name: str, builder, key: str = ''):
+    """キャッシュからデータを取得します。
+
+    Args:
+        name (str): データの名前
+        builder: データを作成する関数
+        key (str): データのキー
+
+    Returns:
+        キャッシュされたデータ (呼び出し元で変更しないでください)
+    """
+    return get_values(name, [key], lambda keys: {key: builder()})[key]
+
+
+def invalidate(name: str):
+    """データのバージョンを更新し、キャッシュされたデータを無効にします。
+
+    トランザクションの確定前に他の処理が古いデータを保存する場合に備え、確定後にも再度更新します。
+
+    Args:
+        name (str): データの名前
+    """
+    def update():
+        cache.set('{}:{}:version'.format(KEY_PREFIX, name), uuid.uuid4().hex, None)
+        getattr(changed, 'names', set()).discard(name)
+
+    update()
+    mark_changed(name)
+    transaction.on_commit(update)
+
+
+def get_statistics() -> dict:
+    """プロセス内のキャッシュのヒット数とミス数を取得します。
+
+    Returns:
+        dict: 名前ごとの hits と misses の dict
+    """
+    return {
+        name: {'hits': hits[name], 'misses': misses[name]} for name in sorted(set(hits) | set(misses))
+    }
@@ -0,0 +1,33 @@
+"""
+アプリケーションの設定を検査するシステムチェックです。
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# プロセスごとにデータを保持するキャッシュのバックエンド
+LOCAL_CACHE_BACKENDS = [
+    'django.core.cache.backends.locmem.LocMemCache',
+]
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs) -> list:
+    """運用環境で共有キャッシュが設定されていることを検査します。
+
+    キャッシュの無効化はバージョンとキーをキャッシュに保存して他のプロセスに伝えるため、
+    複数のプロセスで動作する運用環境ではプロセス間で共有するキャッシュが必要です。
+
+    Args:
+        app_configs: 検査するアプリケーション
+
+    Returns:
+        list: 検査結果のリスト
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    if settings.DEBUG or backend not in LOCAL_CACHE_BACKENDS:
+        return []
+    return [Error(
+        'The default cache backend {} is local to each process.'.format(backend),
+        hint='Set CACHES in local_settings.py to a cache shared by all processes, such as Memcached or Redis.',
+        id='worktime.E001',
+    )]
@@ -4,7 +4,7 @@
 from django import forms
 from django.contrib.auth.forms import AuthenticationForm, PasswordChangeForm
 
-from worktime.models import TimeOffPattern
+from worktime.reference import get_time_off_patterns
 
 
 class CustomAuthenticationForm(AuthenticationForm):
@@ -52,6 +52,7 @@ class TimeRecordForm(forms.Form):
     longitude = forms.CharField(widget=forms.HiddenInput, required=False)
     accuracy = forms.CharField(widget=forms.HiddenInput, required=False)
     ua = forms.CharField(widget=forms.HiddenInput, required=False)
+    idempotency_key = forms.CharField(widget=forms.HiddenInput, required=False, max_length=64)
 
 
 class TimeOffListForm(forms.Form):
@@ -93,7 +94,7 @@ class TimeOffRequestForm(forms.Form):
         """
         super().__init__(*args, **kwargs)
         self.fields['pattern_id'].choices = [
-            (obj.id, obj.display_name) for obj in TimeOffPattern.objects.all()
+            (obj.id, obj.display_name) for obj in get_time_off_patterns().values()
         ]
 
         # Bootstrap 対応
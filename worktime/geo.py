@@ -0,0 +1,369 @@
+"""
+打刻位置の距離判定を行うモジュールです。
+
+多数の地点の距離は NumPy の haversine 公式で一括計算し、判定の閾値付近の地点だけを geopy の geodesic で再計算します。
+勤務場所が登録されている場合は、格子状の空間インデックスで各地点に最も近い勤務場所を検索して判定します。
+"""
+import collections
+import itertools
+
+import numpy
+from django.apps import apps
+from geopy.distance import geodesic
+
+import timecard.settings
+from worktime import caches
+
+# 地球の平均半径 (m)
+EARTH_RADIUS = 6371008.8
+
+# haversine 公式による距離の geodesic に対する最大の相対誤差
+HAVERSINE_ERROR = 0.006
+
+# 位置判定の結果
+INSIDE = 'inside'
+OUTSIDE = 'outside'
+LOW_ACCURACY = 'low_accuracy'
+UNKNOWN = 'unknown'
+LOCATION_STATUSES = [
+    (INSIDE, '圏内'),
+    (OUTSIDE, '圏外'),
+    (LOW_ACCURACY, '低精度'),
+    (UNKNOWN, '計算不可'),
+]
+LOCATION_LABELS = dict(LOCATION_STATUSES)
+
+# 勤務場所の空間インデックスのキャッシュの名前
+WORK_SITE = 'work_site'
+
+
+def haversine_distances(latitudes, longitudes, origin: tuple) -> numpy.ndarray:
+    """各地点から基点までの球面上の距離を一括で計算します。
+
+    Args:
+        latitudes: 緯度の配列
+        longitudes: 経度の配列
+        origin (tuple): 基点の位置 (緯度, 経度)
+
+    Returns:
+        numpy.ndarray: 距離 (m) の配列
+    """
+    latitudes = numpy.radians(numpy.asarray(latitudes, dtype=numpy.float64))
+    longitudes = numpy.radians(numpy.asarray(longitudes, dtype=numpy.float64))
+    origin_latitude, origin_longitude = numpy.radians(origin[0]), numpy.radians(origin[1])
+    a = numpy.sin((latitudes - origin_latitude) / 2) ** 2 + numpy.cos(latitudes) * numpy.cos(origin_latitude) * numpy.sin((longitudes - origin_longitude) / 2) ** 2
+    return 2 * EARTH_RADIUS * numpy.arcsin(numpy.sqrt(numpy.minimum(a, 1)))
+
+
+def get_distances(points: list, origin: tuple, threshold: float) -> list:
+    """各地点から基点までの距離を一括で計算します。
+
+    haversine 公式で計算した距離が閾値の誤差範囲内にある地点だけ、geodesic で正確な距離を再計算します。
+    このため閾値との大小関係は geodesic で計算した場合と一致します。
+
+    Args:
+        points (list): 地点 (緯度, 経度) のリスト
+        origin (tuple): 基点の位置 (緯度, 経度)
+        threshold (float): 判定の閾値 (m)
+
+    Returns:
+        list: 距離 (m) のリスト (計算できない地点は None)
+    """
+    if not points:
+        return []
+    latitudes, longitudes = zip(*points)
+    distances = haversine_distances(latitudes, longitudes, origin)
+    results = distances.tolist()
+    near = numpy.flatnonzero(numpy.abs(distances - threshold) <= distances * HAVERSINE_ERROR)
+    for index in near.tolist():
+        try:
+            results[index] = geodesic(origin, points[index]).m
+        except ValueError:
+            results[index] = None
+    for index in numpy.flatnonzero(~numpy.isfinite(distances)).tolist():
+        results[index] = None
+    return results
+
+
+def to_cartesian(latitudes, longitudes) -> numpy.ndarray:
+    """緯度と経度を地球の中心を原点とする球面上の直交座標に変換します。
+
+    Args:
+        latitudes: 緯度の配列
+        longitudes: 経度の配列
+
+    Returns:
+        numpy.ndarray: 直交座標 (m) の配列 (要素数 x 3)
+    """
+    latitudes = numpy.radians(numpy.asarray(latitudes, dtype=numpy.float64))
+    longitudes = numpy.radians(numpy.asarray(longitudes, dtype=numpy.float64))
+    return EARTH_RADIUS * numpy.stack([
+        numpy.cos(latitudes) * numpy.cos(longitudes),
+        numpy.cos(latitudes) * numpy.sin(longitudes),
+        numpy.sin(latitudes)
+    ], axis=-1)
+
+
+def chord_to_arc(chords) -> numpy.ndarray:
+    """球面上の 2 点間の直線距離を大円距離に変換します。
+
+    Args:
+        chords: 直線距離 (m) の配列
+
+    Returns:
+        numpy.ndarray: 大円距離 (m) の配列 (haversine 公式の距離と同じ値)
+    """
+    return 2 * EARTH_RADIUS * numpy.arcsin(numpy.minimum(numpy.asarray(chords) / (2 * EARTH_RADIUS), 1))
+
+
+class SiteIndex:
+    """勤務場所の空間インデックスです。
+
+    勤務場所の中心を球面上の直交座標に変換し、一辺が cell_size の立方体の格子に登録します。
+    格子は一辺を FACTOR 倍ずつ大きくした階層を持ち、全体が 1 つの格子に収まるまで作成します。
+    検索する地点の格子から外側へ 1 層ずつ候補を広げ、未探索の格子に最も近い候補より近い勤務場所がないことが
+    確定した時点で検索を終了します。MAX_RINGS 層で確定しない場合は 1 つ上の階層で検索します。
+
+    Args:
+        sites (list): 勤務場所 (ID, 緯度, 経度, 半径) のリスト
+        cell_size (float): 最下層の格子の一辺 (m) (省略時は最大の半径と 1,000 m の大きい方)
+    """
+
+    # 上の階層の格子の一辺の倍率
+    FACTOR = 8
+
+    # 各階層で探索する最大の層数
+    MAX_RINGS = 2
+
+    # 一度に距離を計算する地点数
+    CHUNK_SIZE = 1024
+
+    def __init__(self, sites: list, cell_size: float = None):
+        self.ids = [site[0] for site in sites]
+        self.latitudes = numpy.array([site[1] for site in sites], dtype=numpy.float64)
+        self.longitudes = numpy.array([site[2] for site in sites], dtype=numpy.float64)
+        self.radius = numpy.array([site[3] for site in sites], dtype=numpy.float64)
+        self.points = to_cartesian(self.latitudes, self.longitudes).reshape(-1, 3)
+        self.max_radius = float(self.radius.max()) if sites else 0.0
+        self.cell_size = cell_size or max(self.max_radius, 1000.0)
+        self.shells = [
+            [offset for offset in itertools.product(range(-ring, ring + 1), repeat=3) if max(map(abs, offset)) == ring]
+            for ring in range(self.MAX_RINGS + 1)
+        ]
+
+        # 階層ごとの格子 (上の階層の格子は下の階層の格子の番号を FACTOR で割って求める)
+        self.levels = []
+        cells = numpy.floor(self.points / self.cell_size).astype(numpy.int64)
+        size = self.cell_size
+        while True:
+            grid = collections.defaultdict(list)
+            for index, cell in enumerate(cells.tolist()):
+                grid[tuple(cell)].append(index)
+            self.levels.append((size, {cell: numpy.array(indexes) for cell, indexes in grid.items()}))
+            if len(grid) <= 1:
+                break
+            cells = cells // self.FACTOR
+            size *= self.FACTOR
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, points: numpy.ndarray, cell: tuple) -> tuple:
+        """同じ格子にある地点の候補となる勤務場所と直線距離を取得します。
+
+        Args:
+            points (numpy.ndarray): 直交座標の配列
+            cell (tuple): 地点の最下層の格子
+
+        Returns:
+            tuple: 勤務場所の番号の配列と、地点ごとの直線距離の配列
+        """
+        for level, (size, grid) in enumerate(self.levels):
+            scale = self.FACTOR ** level
+            center = (cell[0] // scale, cell[1] // scale, cell[2] // scale)
+            found = []
+            for ring, shell in enumerate(self.shells):
+                for offset in shell:
+                    indexes = grid.get((center[0] + offset[0], center[1] + offset[1], center[2] + offset[2]))
+                    if indexes is not None:
+                        found.append(indexes)
+                if ring == 0 or not found:
+                    continue
+                candidates = numpy.concatenate(found)
+                chords = numpy.linalg.norm(points[:, None, :] - self.points[candidates][None, :, :], axis=2)
+
+                # 最上層はすべての勤務場所を探索済
+                if level == len(self.levels) - 1:
+                    return candidates, chords
+
+                # 未探索の格子までの距離より近い候補があり、半径内の勤務場所をすべて探索済であれば確定
+                bound = ring * size
+                if self.max_radius <= bound and (chords.min(axis=1) <= bound).all():
+                    return candidates, chords
+        candidates = numpy.arange(len(self.ids))
+        return candidates, numpy.linalg.norm(points[:, None, :] - self.points[None, :, :], axis=2)
+
+    def match(self, latitudes, longitudes) -> list:
+        """各地点に対応する勤務場所を検索します。
+
+        半径内にある勤務場所のうち最も近い勤務場所を、半径内にない場合は最も近い勤務場所を対応させます。
+        距離が半径の誤差範囲内にある場合は geodesic で正確な距離を再計算します。
+
+        Args:
+            latitudes: 緯度の配列
+            longitudes: 経度の配列
+
+        Returns:
+            list: 勤務場所の ID、距離 (m)、半径内の場合は True の組のリスト (勤務場所がない場合は None)
+        """
+        latitudes = numpy.asarray(latitudes, dtype=numpy.float64)
+        longitudes = numpy.asarray(longitudes, dtype=numpy.float64)
+        results = [None] * len(latitudes)
+        if not self.ids or not len(latitudes):
+            return results
+        points = to_cartesian(latitudes, longitudes).reshape(-1, 3)
+
+        # 格子ごとに地点をまとめて検索
+        groups = collections.defaultdict(list)
+        for index, cell in enumerate(numpy.floor(points / self.cell_size).astype(numpy.int64).tolist()):
+            groups[tuple(cell)].append(index)
+        for cell, indexes in groups.items():
+            for begin in range(0, len(indexes), self.CHUNK_SIZE):
+                targets = numpy.array(indexes[begin:begin + self.CHUNK_SIZE])
+                candidates, chords = self.search(points[targets], cell)
+                distances = chord_to_arc(chords)
+                radius = self.radius[candidates]
+
+                # 半径付近の距離を geodesic で再計算
+                for row, column in zip(*numpy.nonzero(numpy.abs(distances - radius) <= distances * HAVERSINE_ERROR)):
+                    site = candidates[column]
+                    distances[row, column] = geodesic(
+                        (latitudes[targets[row]], longitudes[targets[row]]),
+                        (self.latitudes[site], self.longitudes[site])
+                    ).m
+
+                # 半径内で最も近い勤務場所、なければ最も近い勤務場所を選択
+                inside = distances < radius
+                columns = numpy.where(
+                    inside.any(axis=1),
+                    numpy.where(inside, distances, numpy.inf).argmin(axis=1),
+                    distances.argmin(axis=1)
+                )
+                rows = numpy.arange(len(targets))
+                for target, site, distance, found in zip(
+                    targets.tolist(),
+                    candidates[columns].tolist(),
+                    distances[rows, columns].tolist(),
+                    inside[rows, columns].tolist()
+                ):
+                    results[target] = (self.ids[site], distance, found)
+        return results
+
+
+def build_site_index() -> SiteIndex:
+    """登録されている勤務場所の空間インデックスを作成します。
+
+    Returns:
+        SiteIndex: 勤務場所の空間インデックス
+    """
+    work_site = apps.get_model('worktime', 'WorkSite')
+    return SiteIndex(list(work_site.objects.order_by('id').values_list('id', 'latitude', 'longitude', 'radius')))
+
+
+def get_site_index() -> SiteIndex:
+    """キャッシュされた勤務場所の空間インデックスを取得します。
+
+    Returns:
+        SiteIndex: 勤務場所の空間インデックス
+    """
+    return caches.get_value(WORK_SITE, build_site_index)
+
+
+def judge_locations(records: list) -> list:
+    """複数の打刻記録の位置情報を一括で判定します。
+
+    勤務場所が登録されている場合は対応する勤務場所の半径で、登録されていない場合は
+    LOCATION_ORIGIN からの MAX_DISTANCE で判定します。
+
+    Args:
+        records (list): latitude, longitude, accuracy 属性を持つ打刻記録のリスト
+
+    Returns:
+        list: 距離 (m)、判定結果、勤務場所の ID の組のリスト (位置情報がない打刻記録は (None, None, None))
+    """
+    results = [(None, None, None)] * len(records)
+    targets = []
+    for index, record in enumerate(records):
+        if record.latitude and record.longitude and record.accuracy:
+            if record.accuracy < timecard.settings.MAX_ACCURACY:
+                targets.append(index)
+            else:
+                results[index] = (None, LOW_ACCURACY, None)
+    if not targets:
+        return results
+
+    # 勤務場所による判定
+    sites = get_site_index()
+    if len(sites):
+        matches = sites.match(
+            [records[index].latitude for index in targets], [records[index].longitude for index in targets]
+        )
+        for index, (site_id, distance, inside) in zip(targets, matches):
+            if not numpy.isfinite(distance):
+                results[index] = (None, UNKNOWN, None)
+            else:
+                results[index] = (distance, INSIDE if inside else OUTSIDE, site_id)
+        return results
+
+    # 基点による判定
+    distances = get_distances(
+        [(records[index].latitude, records[index].longitude) for index in targets],
+        timecard.settings.LOCATION_ORIGIN,
+        timecard.settings.MAX_DISTANCE
+    )
+    for index, distance in zip(targets, distances):
+        if distance is None:
+            results[index] = (None, UNKNOWN, None)
+        elif distance < timecard.settings.MAX_DISTANCE:
+            results[index] = (distance, INSIDE, None)
+        else:
+            results[index] = (distance, OUTSIDE, None)
+    return results
+
+
+def format_location(status: str, distance: float, accuracy: float) -> str:
+    """位置判定の結果の表示を編集します。
+
+    Args:
+        status (str): 判定結果
+        distance (float): 基点からの距離 (m)
+        accuracy (float): 誤差 (m)
+
+    Returns:
+        str: 表示情報 (判定結果がない場合は None)
+    """
+    if status == OUTSIDE:
+        return "圏外 {:,d} m (± {:,.1f} m)".format(int(distance), accuracy)
+    return LOCATION_LABELS.get(status)
+
+
+def get_locations(records: list) -> list:
+    """複数の打刻記録の位置情報の表示を一括で編集します。
+
+    判定結果が保存されている打刻記録は保存された結果を使用し、それ以外の打刻記録だけを判定します。
+
+    Args:
+        records (list): 打刻記録のオブジェクトのリスト
+
+    Returns:
+        list: 表示情報のリスト (位置情報がない打刻記録は None)
+    """
+    judged = iter(judge_locations([record for record in records if not record.location_status]))
+    results = []
+    for record in records:
+        if record.location_status:
+            distance, status = record.distance, record.location_status
+        else:
+            distance, status, site_id = next(judged)
+        results.append(format_location(status, distance, record.accuracy))
+    return results
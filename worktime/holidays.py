@@ -0,0 +1,190 @@
+"""
+祝日データの取込処理です。
+
+祝日は iCalendar (ics) 形式のファイルまたは URL から Holiday テーブルに取り込みます。
+URL から取り込む場合は ETag と Last-Modified を保存し、次回は変更がある場合だけ取得します。
+ics は 1 行ずつ読み込み、祝日の日付と名称だけを取り出します。
+取り込んだ祝日は worktime.reference.get_holidays で参照します。
+"""
+import datetime
+import zoneinfo
+
+import requests
+from django.db import transaction
+
+import timecard.settings
+from worktime.models import Holiday, HolidaySource
+from worktime.reference import invalidate_reference_data, is_virtual_calendar
+from worktime.signals import notify_worktime_changed
+
+# URL から取得する場合のタイムアウト (秒)
+DOWNLOAD_TIMEOUT = 30
+
+
+def unfold_lines(lines):
+    """ics の折り返された行を連結します。
+
+    Args:
+        lines: 行の iterable
+
+    Yields:
+        str: 連結した行
+    """
+    current = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if line[:1] in (' ', '\t'):
+            if current is not None:
+                current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def unescape_text(text: str) -> str:
+    """ics のテキスト値のエスケープを解除します。
+
+    Args:
+        text (str): テキスト値
+
+    Returns:
+        str: 解除した文字列
+    """
+    return text.replace('\\n', ' ').replace('\\N', ' ').replace('\\,', ',').replace('\\;', ';').replace('\\\\', '\\')
+
+
+def parse_date(params: list, value: str, zone: zoneinfo.ZoneInfo) -> datetime.date:
+    """ics の DTSTART の値を日付に変換します。
+
+    Args:
+        params (list): プロパティのパラメータのリスト
+        value (str): プロパティの値
+        zone (zoneinfo.ZoneInfo): 日付を判定するタイムゾーン
+
+    Returns:
+        datetime.date: 日付
+    """
+    if 'T' not in value:
+        return datetime.datetime.strptime(value[:8], '%Y%m%d').date()
+    moment = datetime.datetime.strptime(value.rstrip('Z')[:15], '%Y%m%dT%H%M%S')
+    if value.endswith('Z'):
+        moment = moment.replace(tzinfo=datetime.timezone.utc)
+    else:
+        tzids = [param[5:] for param in params if param.upper().startswith('TZID=')]
+        if not tzids:
+            return moment.date()
+        moment = moment.replace(tzinfo=zoneinfo.ZoneInfo(tzids[0]))
+    return moment.astimezone(zone).date()
+
+
+def parse_ics(lines, zone: str = None):
+    """ics のイベントから日付と名称を取り出します。
+
+    Args:
+        lines: ics の行の iterable
+        zone (str): 日付を判定するタイムゾーン (省略時は TIME_ZONE)
+
+    Yields:
+        tuple[datetime.date, str]: 日付と名称
+    """
+    zone = zoneinfo.ZoneInfo(zone or timecard.settings.TIME_ZONE)
+    date = None
+    name = None
+    in_event = False
+    for line in unfold_lines(lines):
+        prop, _, value = line.partition(':')
+        prop, *params = prop.split(';')
+        prop = prop.upper()
+        if prop == 'BEGIN' and value.upper() == 'VEVENT':
+            in_event = True
+            date = name = None
+        elif prop == 'END' and value.upper() == 'VEVENT':
+            if date is not None:
+                yield date, name or ''
+            in_event = False
+        elif in_event and prop == 'DTSTART':
+            date = parse_date(params, value, zone)
+        elif in_event and prop == 'SUMMARY':
+            name = unescape_text(value)
+
+
+def save_holidays(holidays: dict) -> tuple[int, int]:
+    """祝日を Holiday テーブルに保存します。
+
+    取り込んだ祝日の期間にあり、取り込んだデータにない祝日は削除します。
+    VIRTUAL_CALENDAR が True の場合は、変更された日の勤務実績の再計算を通知します。
+
+    Args:
+        holidays (dict): 日付と名称の dict
+
+    Returns:
+        tuple[int, int]: 保存した件数と削除した件数
+    """
+    if not holidays:
+        return 0, 0
+    with transaction.atomic():
+        stored = dict(Holiday.objects.filter(
+            date__gte=min(holidays), date__lte=max(holidays)
+        ).values_list('date', 'name'))
+        deleted, _ = Holiday.objects.filter(
+            date__in=[date for date in stored if date not in holidays]
+        ).delete()
+        Holiday.objects.bulk_create(
+            [Holiday(date=date, name=name) for date, name in holidays.items()],
+            update_conflicts=True,
+            unique_fields=['date'],
+            update_fields=['name'],
+        )
+
+        # 一括更新ではシグナルが発生しないため、キャッシュの無効化と再計算の通知を実行
+        invalidate_reference_data(Holiday)
+        dates = [date for date in set(stored) | set(holidays) if stored.get(date) != holidays.get(date)]
+        if dates and is_virtual_calendar():
+            notify_worktime_changed(None, dates)
+    return len(holidays), deleted
+
+
+def import_holidays(source: str, force: bool = False) -> tuple[int, int]:
+    """ファイルまたは URL から祝日を取り込みます。
+
+    URL の場合は前回の ETag と Last-Modified で条件付きの取得を行い、変更がなければ取り込みません。
+
+    Args:
+        source (str): ファイルのパスまたは URL
+        force (bool): 変更の有無にかかわらず取得する場合は True
+
+    Raises:
+        requests.RequestException: 取得の失敗
+        OSError: ファイルの読み込みの失敗
+
+    Returns:
+        tuple[int, int]: 保存した件数と削除した件数 (変更がない場合は None)
+    """
+    if not source.startswith(('http://', 'https://')):
+        with open(source, encoding='utf-8') as f:
+            return save_holidays(dict(parse_ics(f)))
+
+    # 条件付きで取得
+    stored = HolidaySource.objects.filter(source=source).first()
+    headers = {}
+    if stored is not None and not force:
+        if stored.etag:
+            headers['If-None-Match'] = stored.etag
+        if stored.last_modified:
+            headers['If-Modified-Since'] = stored.last_modified
+    with requests.get(source, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        if 'charset' not in response.headers.get('Content-Type', '').lower():
+            # 文字コードの指定がない text/* は ISO-8859-1 とみなされるため、ICS の既定の UTF-8 を使用 (RFC 5545)
+            response.encoding = 'utf-8'
+        result = save_holidays(dict(parse_ics(response.iter_lines(decode_unicode=True))))
+        HolidaySource.objects.update_or_create(source=source, defaults={
+            'etag': response.headers.get('ETag', ''),
+            'last_modified': response.headers.get('Last-Modified', ''),
+        })
+    return result
@@ -0,0 +1,213 @@
+"""
+打刻の書き込みを遅延するジャーナルです。
+
+PUNCH_JOURNAL にファイルを指定すると、打刻はデータベースに登録せずにローカルの SQLite ファイルへ追記され、
+追記が確定した時点で応答します。ジャーナルの打刻は flush_punch_journal コマンドで一括登録されます。
+一括登録の途中で停止した場合も、次回の実行で未登録の打刻を登録します。
+登録済の打刻を再登録しないように、ジャーナルの打刻には必ず冪等キーを設定し、一意制約に違反する打刻は無視します。
+"""
+import collections
+import datetime
+import json
+import sqlite3
+import threading
+import uuid
+
+from django.db import transaction
+
+import timecard.settings
+from worktime.models import TimeRecord
+from worktime.signals import notify_worktime_changed
+
+# ジャーナルに記録する打刻記録の項目
+JOURNAL_FIELDS = [
+    'date', 'time', 'username', 'action', 'latitude', 'longitude', 'accuracy',
+    'distance', 'location_status', 'site_id', 'ua', 'idempotency_key',
+]
+
+# スレッドごとのジャーナルの接続
+connections = threading.local()
+
+
+def get_journal_path() -> str:
+    """ジャーナルのファイルを取得します。
+
+    Returns:
+        str: ファイルのパス (ジャーナルを使用しない場合は None)
+    """
+    path = getattr(timecard.settings, 'PUNCH_JOURNAL', None)
+    return str(path) if path else None
+
+
+def get_connection(path: str) -> sqlite3.Connection:
+    """ジャーナルの接続を取得します。
+
+    Args:
+        path (str): ファイルのパス
+
+    Returns:
+        sqlite3.Connection: 接続
+    """
+    connection = getattr(connections, 'connection', None)
+    if connection is not None and connections.path == path:
+        return connection
+    if connection is not None:
+        connection.close()
+
+    # 追記の確定ごとにディスクへ同期
+    connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=FULL')
+    connection.execute(
+        'CREATE TABLE IF NOT EXISTS punch ('
+        ' seq INTEGER PRIMARY KEY AUTOINCREMENT,'
+        ' username TEXT NOT NULL,'
+        ' idempotency_key TEXT NOT NULL,'
+        ' data TEXT NOT NULL,'
+        ' UNIQUE (username, idempotency_key))'
+    )
+    connections.connection = connection
+    connections.path = path
+    return connection
+
+
+def to_entry(record: TimeRecord) -> str:
+    """打刻記録をジャーナルの形式に変換します。
+
+    Args:
+        record (TimeRecord): 打刻記録
+
+    Returns:
+        str: JSON 文字列
+    """
+    data = {field: getattr(record, field) for field in JOURNAL_FIELDS}
+    data['date'] = record.date.isoformat()
+    data['time'] = record.time.isoformat()
+    return json.dumps(data, ensure_ascii=False)
+
+
+def from_entry(entry: str) -> TimeRecord:
+    """ジャーナルの形式から打刻記録を作成します。
+
+    Args:
+        entry (str): JSON 文字列
+
+    Returns:
+        TimeRecord: 保存前の打刻記録
+    """
+    data = json.loads(entry)
+    data['date'] = datetime.date.fromisoformat(data['date'])
+    data['time'] = datetime.time.fromisoformat(data['time'])
+    return TimeRecord(**data)
+
+
+def find_stored_punch(record: TimeRecord) -> TimeRecord:
+    """打刻と同じユーザの同じ冪等キーの登録済の打刻記録を取得します。
+
+    Args:
+        record (TimeRecord): 保存前の打刻記録
+
+    Returns:
+        TimeRecord: 登録済の打刻記録 (登録されていない場合は None)
+    """
+    return TimeRecord.objects.filter(username=record.username, idempotency_key=record.idempotency_key).first()
+
+
+def append_punch(record: TimeRecord) -> tuple[TimeRecord, bool]:
+    """打刻記録をジャーナルに追記します。
+
+    同じユーザの同じ冪等キーの打刻がデータベースに登録済の場合、またはジャーナルにある場合は追記せず、
+    登録済またはジャーナルの打刻を返します。
+
+    Args:
+        record (TimeRecord): 保存前の打刻記録 (冪等キーがない場合は設定します)
+
+    Returns:
+        tuple[TimeRecord, bool]: 打刻記録と、新たに追記したかどうか
+    """
+    if not record.idempotency_key:
+        record.idempotency_key = uuid.uuid4().hex
+    else:
+        # ジャーナルから削除された後の再送は登録済の打刻を返す
+        stored = find_stored_punch(record)
+        if stored is not None:
+            return stored, False
+    connection = get_connection(get_journal_path())
+    cursor = connection.execute(
+        'INSERT OR IGNORE INTO punch (username, idempotency_key, data) VALUES (?, ?, ?)',
+        (record.username, record.idempotency_key, to_entry(record))
+    )
+    if cursor.rowcount:
+        return record, True
+    row = connection.execute(
+        'SELECT data FROM punch WHERE username = ? AND idempotency_key = ?',
+        (record.username, record.idempotency_key)
+    ).fetchone()
+    if row is None:
+        # 判定の直後にデータベースへ登録されてジャーナルから削除された場合
+        return find_stored_punch(record) or record, False
+    return from_entry(row[0]), False
+
+
+def read_punches(limit: int) -> list:
+    """ジャーナルの未登録の打刻を追記順に取得します。
+
+    Args:
+        limit (int): 最大件数
+
+    Returns:
+        list: 追記番号と打刻記録のタプルのリスト
+    """
+    connection = get_connection(get_journal_path())
+    rows = connection.execute('SELECT seq, data FROM punch ORDER BY seq LIMIT ?', (limit,)).fetchall()
+    return [(seq, from_entry(data)) for seq, data in rows]
+
+
+def remove_punches(last_seq: int):
+    """登録済の打刻をジャーナルから削除します。
+
+    Args:
+        last_seq (int): 登録済の最後の追記番号
+    """
+    connection = get_connection(get_journal_path())
+    connection.execute('DELETE FROM punch WHERE seq <= ?', (last_seq,))
+
+
+def count_punches() -> int:
+    """ジャーナルの未登録の打刻の件数を取得します。
+
+    Returns:
+        int: 件数
+    """
+    connection = get_connection(get_journal_path())
+    return connection.execute('SELECT COUNT(*) FROM punch').fetchone()[0]
+
+
+def flush_punches(batch_size: int = 1000) -> int:
+    """ジャーナルの未登録の打刻をデータベースに一括登録します。
+
+    登録済の打刻と同じ冪等キーの打刻は無視するため、途中で停止した場合も繰り返し実行できます。
+
+    Args:
+        batch_size (int): 1 回に登録する件数
+
+    Returns:
+        int: 処理した件数
+    """
+    total = 0
+    while True:
+        entries = read_punches(batch_size)
+        if not entries:
+            return total
+        records = [record for _, record in entries]
+        with transaction.atomic():
+            TimeRecord.objects.bulk_create(records, ignore_conflicts=True)
+
+            # 一括登録ではシグナルが発生しないため、日付ごとに変更を通知
+            usernames = collections.defaultdict(set)
+            for record in records:
+                usernames[record.date].add(record.username)
+            for date in sorted(usernames):
+                notify_worktime_changed(sorted(usernames[date]), [date])
+        remove_punches(entries[-1][0])
+        total += len(entries)
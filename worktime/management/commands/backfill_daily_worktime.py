@@ -0,0 +1,88 @@
+"""
+日次勤務実績の一括再計算 の CLI 管理コマンドです。
+"""
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from worktime.materialized import refresh_daily_worktimes
+from worktime.models import TimeRecord
+from worktime.queries import ENGINES
+from worktime.reference import get_first_calendar_date
+from worktime.utils import get_month_range, get_users, parse_year_month
+
+
+class Command(BaseCommand):
+    """過去の打刻記録から日次勤務実績を一括で再計算します。
+
+    Args:
+        BaseCommand: 基底コマンド
+    """
+    help = 'Recalculate daily worktime table for the specified months.'
+
+    def add_arguments(self, parser):
+        """実行時引数を設定します。
+
+        Args:
+            parser: コマンドライン解析クラス
+        """
+        parser.add_argument('--from', dest='month_from', type=str,
+                            help='first month (YYYY-MM)')
+        parser.add_argument('--to', dest='month_to', type=str,
+                            help='last month (YYYY-MM)')
+        parser.add_argument('--engine', choices=ENGINES, default='numpy',
+                            help='worktime calculation engine')
+
+    def get_months(self, year: int, month: int) -> int:
+        """年月の月数を計算します。
+
+        Args:
+            year (int): 西暦年
+            month (int): 月
+
+        Returns:
+            int: 月数
+        """
+        return year * 12 + month - 1
+
+    def handle(self, *args, **options):
+        """カスタムコマンドの処理を実行します。
+        """
+
+        # 対象期間を決定
+        today = datetime.datetime.now().date()
+        try:
+            if options['month_from']:
+                start_months = self.get_months(*parse_year_month(options['month_from']))
+            else:
+                min_date = get_first_calendar_date()
+                if min_date is None:
+                    self.stdout.write(self.style.WARNING('Calendar is empty.'))
+                    return
+                start_months = self.get_months(min_date.year, min_date.month)
+            if options['month_to']:
+                end_months = self.get_months(*parse_year_month(options['month_to']))
+            else:
+                end_months = self.get_months(today.year, today.month)
+        except ValueError as e:
+            raise CommandError(e)
+
+        # 対象の月をループ処理
+        users = list(get_users(False).keys())
+        for months in range(start_months, end_months + 1):
+            year = months // 12
+            month = (months % 12) + 1
+            begin, end = get_month_range(year, month)
+
+            # 登録済ユーザと打刻のあるユーザを対象とする
+            usernames = set(users)
+            usernames.update(TimeRecord.objects.filter(
+                date__gte=begin, date__lt=end
+            ).values_list('username', flat=True).distinct())
+            refresh_daily_worktimes(sorted(usernames), (begin, end), options['engine'])
+            self.stdout.write(self.style.SUCCESS(
+                '{:04d}-{:02d} {} users'.format(year, month, len(usernames))
+            ))
+
+        # 完了メッセージ
+        self.stdout.write(self.style.SUCCESS('Daily worktime recalculated.'))
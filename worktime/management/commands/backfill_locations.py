@@ -0,0 +1,58 @@
+"""
+打刻位置の一括判定 の CLI 管理コマンドです。
+"""
+from django.core.management.base import BaseCommand
+
+from worktime.geo import judge_locations
+from worktime.models import TimeRecord
+
+
+class Command(BaseCommand):
+    """保存済の打刻記録の勤務場所または基点からの距離と位置判定の結果を一括で計算します。
+
+    Args:
+        BaseCommand: 基底コマンド
+    """
+    help = 'Calculate distance and location status of existing time records.'
+
+    def add_arguments(self, parser):
+        """実行時引数を設定します。
+
+        Args:
+            parser: コマンドライン解析クラス
+        """
+        parser.add_argument('--all', action='store_true',
+                            help='recalculate all time records (e.g. after changing work sites or LOCATION_ORIGIN)')
+        parser.add_argument('--chunk-size', dest='chunk_size', type=int, default=10000,
+                            help='number of time records per update')
+
+    def handle(self, *args, **options):
+        """カスタムコマンドの処理を実行します。
+        """
+
+        # 対象の打刻記録
+        records = TimeRecord.objects.filter(
+            latitude__isnull=False, longitude__isnull=False, accuracy__isnull=False
+        )
+        if not options['all']:
+            records = records.filter(location_status__isnull=True)
+        records = records.only('id', 'latitude', 'longitude', 'accuracy').order_by('id')
+
+        # ID 順に分割して処理
+        last_id = 0
+        total = 0
+        while True:
+            chunk = list(records.filter(id__gt=last_id)[:options['chunk_size']])
+            if not chunk:
+                break
+            for record, (distance, status, site_id) in zip(chunk, judge_locations(chunk)):
+                record.distance = distance
+                record.location_status = status
+                record.site_id = site_id
+            TimeRecord.objects.bulk_update(chunk, ['distance', 'location_status', 'site'])
+            last_id = chunk[-1].id
+            total += len(chunk)
+            self.stdout.write(self.style.SUCCESS('{} records'.format(total)))
+
+        # 完了メッセージ
+        self.stdout.write(self.style.SUCCESS('Locations calculated.'))
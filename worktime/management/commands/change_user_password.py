@@ -1,13 +1,20 @@
 """
 ユーザのパスワードを非対話型で更新する CLI 管理コマンドです。
 """
+import os
+import time
+
 from django.contrib.auth.models import User
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+
+from worktime.accounts import change_passwords
 
 
 class Command(BaseCommand):
     """ユーザのパスワードを非対話型で更新します。
 
+    --file を指定すると、CSV ファイルのユーザのパスワードを複数のプロセスでハッシュ化して一括で更新します。
+
     Args:
         BaseCommand: 基底コマンド
     """
@@ -19,12 +26,23 @@ class Command(BaseCommand):
         Args:
             parser: コマンドライン解析クラス
         """
-        parser.add_argument('username', type=str)
-        parser.add_argument('password', type=str)
+        parser.add_argument('username', type=str, nargs='?')
+        parser.add_argument('password', type=str, nargs='?')
+        parser.add_argument('--file', type=str, default=None,
+                            help='csv file of username and password to change passwords in bulk')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='number of processes to hash passwords (with --file)')
+        parser.add_argument('--batch-size', dest='batch_size', type=int, default=1000,
+                            help='number of users per bulk update (with --file)')
 
     def handle(self, *args, **options):
         """カスタムコマンドの処理を実行します。
         """
+        if options['file'] is not None:
+            self.handle_bulk(options)
+            return
+        if options['username'] is None or options['password'] is None:
+            raise CommandError('Specify username and password, or --file.')
 
         # パスワードを設定
         username = options['username']
@@ -42,3 +60,21 @@ class Command(BaseCommand):
 
             # エラーメッセージ
             self.stdout.write(self.style.ERROR('Password change failed.'))
+
+    def handle_bulk(self, options):
+        """CSV ファイルのユーザのパスワードを一括で更新します。
+
+        Args:
+            options: 実行時引数
+        """
+        started = time.perf_counter()
+        changed, errors = change_passwords(options['file'], options['workers'], options['batch_size'])
+        for line, username, message in errors:
+            self.stdout.write(self.style.ERROR(
+                'line {}: {} error ({})'.format(line, username, message)
+            ))
+
+        # 完了メッセージ
+        self.stdout.write(self.style.SUCCESS('{} passwords changed, {} errors in {:.1f} s.'.format(
+            changed, len(errors), time.perf_counter() - started
+        )))
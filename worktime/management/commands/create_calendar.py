@@ -1,47 +1,34 @@
 """
 営業日カレンダ作成 の CLI 管理コマンドです。
 """
-import calendar
 import datetime
+import time
 
-import pytz
 import requests
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from django.db.models import Max
-from ics import Calendar
 
 import timecard.settings
-from worktime.models import BusinessCalendar, StandardWorkPattern
+from worktime.holidays import import_holidays
+from worktime.models import BusinessCalendar, Holiday
+from worktime.reference import (CALENDAR_FIELDS, derive_calendars,
+                                invalidate_reference_data)
+from worktime.signals import notify_worktime_changed
+from worktime.utils import parse_year_month
 
 
 class Command(BaseCommand):
     """営業日カレンダを生成します。
 
+    勤務パターンと取込済の祝日から対象期間のすべての日を生成し、1 回のトランザクションで一括登録します。
+    既存の日は生成した内容で更新しますが、システム管理の画面で個別に変更された日は更新しません。
+
     Args:
         BaseCommand: 基底コマンド
     """
     help = 'Create monthly calendar.'
 
-    def download_ics(self, url: str, zone: str) -> dict:
-        """ics 形式のイベントデータをダウンロードします。
-
-        Args:
-            url (str): URL
-            tz (str): タイムゾーン
-
-        Returns:
-            dict: ダウンロードしたイベントデータ
-        """
-        cal = Calendar(requests.get(url).text)
-        service_zone = pytz.timezone(zone)
-        events = {}
-        for event in cal.events:
-            if event.begin.datetime:
-                events[
-                    event.begin.astimezone(service_zone).strftime('%Y-%m-%d')
-                ] = event.name
-        return dict(sorted(events.items()))
-
     def get_months(self, date) -> int:
         """日付の月数を計算します。
 
@@ -53,100 +40,156 @@ class Command(BaseCommand):
         """
         return date.year * 12 + date.month - 1
 
-    def create_calendar(self, holidays: dict, year: int, month: int):
-        """指定した年月のカレンダを生成します。
+    def add_arguments(self, parser):
+        """実行時引数を設定します。
 
         Args:
-            holidays (dict): 祝日の日付と名称の dict
-            year (int): 西暦年
-            month (int): 月
+            parser: コマンドライン解析クラス
         """
+        parser.add_argument('--from', dest='month_from', type=str,
+                            help='first month (YYYY-MM)')
+        parser.add_argument('--to', dest='month_to', type=str,
+                            help='last month (YYYY-MM)')
+        parser.add_argument('--resync-pattern', dest='resync_pattern', action='store_true',
+                            help='regenerate existing days from the current month with the current work patterns and holidays')
+        parser.add_argument('--dry-run', dest='dry_run', action='store_true',
+                            help='show the number of days to be written without writing')
+        parser.add_argument('--offline', action='store_true',
+                            help='use imported holidays without refreshing HOLIDAY_DOWNLOAD_URL')
+
+    def build_calendars(self, start_months: int, end_months: int) -> list:
+        """指定した期間の営業日カレンダを生成します。
 
-        # 初期化
-        objects = []
+        Args:
+            start_months (int): 先頭月の月数
+            end_months (int): 最終月の月数
 
-        # 月内のすべての日をループ
-        for day in range(1, calendar.monthrange(year, month)[1] + 1):
+        Returns:
+            list: 保存前の営業日カレンダのリスト (日付順)
+        """
+        begin = datetime.date(start_months // 12, start_months % 12 + 1, 1)
+        end = datetime.date((end_months + 1) // 12, (end_months + 1) % 12 + 1, 1)
+        return derive_calendars((begin, end))
 
-            # 対象日付
-            date = datetime.datetime(year, month, day)
+    def save_calendars(self, objects: list, dry_run: bool) -> dict:
+        """営業日カレンダを一括で登録または更新します。
 
-            # 祝日に該当するか判定
-            holiday = ''
-            str_date = date.strftime('%Y-%m-%d')
-            national_holiday = holidays.get(str_date, '')
-            if national_holiday:
-                holiday = '休日 (' + national_holiday + ')'
-                pattern = StandardWorkPattern.objects.get(pk=7)
-            else:
-                pattern = StandardWorkPattern.objects.get(pk=date.weekday())
-                if not pattern.attendance:
-                    holiday = '定休日'
-
-            # 営業日レコードを生成
-            objects.append(
-                BusinessCalendar(
-                    date=date,
-                    holiday=holiday,
-                    attendance=pattern.attendance,
-                    begin=pattern.begin,
-                    end=pattern.end,
-                    leave=pattern.leave,
-                    back=pattern.back
-                )
-            )
-            self.stdout.write(self.style.SUCCESS(date.strftime('%Y-%m-%d')))
+        個別に変更された日と、内容が同じ日は書き込みません。
 
-        # 一括作成
-        BusinessCalendar.objects.bulk_create(objects)
+        Args:
+            objects (list): 保存前の営業日カレンダのリスト (日付順)
+            dry_run (bool): 書き込まずに件数だけを数える場合は True
+
+        Returns:
+            dict: 作成、更新、変更なし、個別設定の件数
+        """
+        if not objects:
+            return {'created': 0, 'updated': 0, 'unchanged': 0, 'customized': 0}
+        with transaction.atomic():
+            existing = {
+                row['date']: row for row in BusinessCalendar.objects.filter(
+                    date__gte=objects[0].date, date__lte=objects[-1].date
+                ).values('customized', *CALENDAR_FIELDS)
+            }
+            created = []
+            updated = []
+            counts = {'unchanged': 0, 'customized': 0}
+            for obj in objects:
+                row = existing.get(obj.date)
+                if row is None:
+                    created.append(obj)
+                elif row['customized']:
+                    counts['customized'] += 1
+                elif any(getattr(obj, field) != row[field] for field in CALENDAR_FIELDS):
+                    updated.append(obj)
+                else:
+                    counts['unchanged'] += 1
+            if not dry_run and (created or updated):
+                BusinessCalendar.objects.bulk_create(
+                    created + updated,
+                    update_conflicts=True,
+                    unique_fields=['date'],
+                    update_fields=[field for field in CALENDAR_FIELDS if field != 'date'],
+                )
+                invalidate_reference_data(BusinessCalendar)
+                if updated:
+                    notify_worktime_changed(None, [obj.date for obj in updated])
+        counts['created'] = len(created)
+        counts['updated'] = len(updated)
+        return counts
 
     def handle(self, *args, **options):
         """カスタムコマンドの処理を実行します。
         """
 
-        # 祝日データ (ics) をダウンロード
+        # 祝日データ (ics) を更新 (取得できない場合は取込済の祝日を使用)
         if timecard.settings.HOLIDAY_DOWNLOAD_URL:
-            holidays = self.download_ics(
-                timecard.settings.HOLIDAY_DOWNLOAD_URL, timecard.settings.TIME_ZONE
-            )
-            holidays_dates = list(holidays.keys())
-            holidays_dates.sort(reverse=True)
-            max_holiday = datetime.datetime.strptime(
-                holidays_dates[0], "%Y-%m-%d"
-            )
+            if not options['offline']:
+                try:
+                    if import_holidays(timecard.settings.HOLIDAY_DOWNLOAD_URL) is None:
+                        self.stdout.write(self.style.SUCCESS('Holiday data not modified.'))
+                except (requests.RequestException, ValueError) as e:
+                    self.stdout.write(self.style.WARNING('Holiday download failed: {}'.format(e)))
+            max_holiday = Holiday.objects.aggregate(max_date=Max('date'))['max_date']
+            if max_holiday is None:
+                raise CommandError('No holidays imported. Run import_holidays first.')
             self.stdout.write(self.style.SUCCESS(
-                max_holiday.strftime('Holiday data downloaded up to %Y-%m.')
+                max_holiday.strftime('Holiday data available up to %Y-%m.')
             ))
         else:
-            holidays = {}
-            max_holiday = datetime.datetime.max
+            max_holiday = datetime.date.max
 
         # 現在の日付を取得
         now = datetime.datetime.now()
 
         # 作成対象の先頭月を算出
-        max_created_date = BusinessCalendar.objects.aggregate(max_date=Max('date'))[
-            'max_date'
-        ]
-        if max_created_date is None:
-            start_months = self.get_months(now)
-        else:
-            start_months = self.get_months(max_created_date) + 1
-
-        # 作成対象の最終月を算出
-        months_1 = self.get_months(max_holiday)
-        months_2 = self.get_months(now) + timecard.settings.CALENDAR_MONTHS
-        end_months = min(months_1, months_2)
-
-        # 対象の月をループ処理
-        for months in range(start_months, end_months + 1):
-
-            # 対象の年月を算出
-            year = months // 12
-            month = (months % 12) + 1
-
-            # 対象月のデータを作成
-            self.create_calendar(holidays, year, month)
+        try:
+            if options['month_from']:
+                start_months = self.get_months(datetime.date(*parse_year_month(options['month_from']), 1))
+            elif options['resync_pattern']:
+                start_months = self.get_months(now)
+            else:
+                max_created_date = BusinessCalendar.objects.aggregate(max_date=Max('date'))[
+                    'max_date'
+                ]
+                if max_created_date is None:
+                    start_months = self.get_months(now)
+                else:
+                    start_months = self.get_months(max_created_date) + 1
+
+            # 作成対象の最終月を算出
+            if options['month_to']:
+                end_months = self.get_months(datetime.date(*parse_year_month(options['month_to']), 1))
+            else:
+                months_1 = self.get_months(max_holiday)
+                months_2 = self.get_months(now) + timecard.settings.CALENDAR_MONTHS
+                end_months = min(months_1, months_2)
+        except ValueError as e:
+            raise CommandError(e)
+        if end_months < start_months:
+            self.stdout.write(self.style.SUCCESS('Calendar is up to date.'))
+            return
+
+        # 対象期間のデータを生成して一括登録
+        started = time.perf_counter()
+        objects = self.build_calendars(start_months, end_months)
+        built = time.perf_counter()
+        if not objects:
+            raise CommandError('No StandardWorkPattern is registered. Register the work patterns first.')
+        counts = self.save_calendars(objects, options['dry_run'])
+        saved = time.perf_counter()
+        self.stdout.write(self.style.SUCCESS(
+            '{} to {}: {} days, {} created, {} updated, {} unchanged, {} customized skipped'.format(
+                objects[0].date.strftime('%Y-%m'), objects[-1].date.strftime('%Y-%m'), len(objects),
+                counts['created'], counts['updated'], counts['unchanged'], counts['customized']
+            )
+        ))
+        self.stdout.write(self.style.SUCCESS(
+            'generated in {:.3f} s, written in {:.3f} s'.format(built - started, saved - built)
+        ))
 
         # 完了メッセージ
-        self.stdout.write(self.style.SUCCESS('Calendar created.'))
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS('Dry run, calendar not changed.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Calendar created.'))
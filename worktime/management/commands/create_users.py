@@ -2,14 +2,21 @@
 ユーザ一括登録 の CLI 管理コマンドです。
 """
 import csv
+import os
+import time
 
 from django.contrib.auth.models import User
 from django.core.management.base import BaseCommand
 
+from worktime.accounts import save_users
+
 
 class Command(BaseCommand):
     """ユーザを一括で登録します。
 
+    --bulk を指定すると、パスワードを複数のプロセスでハッシュ化して 1 回のトランザクションで一括登録し、
+    登録済のユーザはパスワードと氏名を更新します。不正な行は最後にまとめて出力します。
+
     Args:
         BaseCommand: 基底コマンド
     """
@@ -22,10 +29,19 @@ class Command(BaseCommand):
             parser: コマンドライン解析クラス
         """
         parser.add_argument('file', type=str)
+        parser.add_argument('--bulk', action='store_true',
+                            help='hash passwords in parallel and upsert all users in one transaction')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='number of processes to hash passwords (bulk mode)')
+        parser.add_argument('--batch-size', dest='batch_size', type=int, default=1000,
+                            help='number of users per bulk insert (bulk mode)')
 
     def handle(self, *args, **options):
         """カスタムコマンドの処理を実行します。
         """
+        if options['bulk']:
+            self.handle_bulk(options)
+            return
 
         # ユーザレコードを生成
         f = open(options['file'], 'r', encoding='utf_8_sig')
@@ -48,3 +64,21 @@ class Command(BaseCommand):
 
         # 完了メッセージ
         self.stdout.write(self.style.SUCCESS('User created.'))
+
+    def handle_bulk(self, options):
+        """ユーザを一括で登録または更新します。
+
+        Args:
+            options: 実行時引数
+        """
+        started = time.perf_counter()
+        created, updated, errors = save_users(options['file'], options['workers'], options['batch_size'])
+        for line, username, message in errors:
+            self.stdout.write(self.style.ERROR(
+                'line {}: {} error ({})'.format(line, username, message)
+            ))
+
+        # 完了メッセージ
+        self.stdout.write(self.style.SUCCESS('{} users created, {} updated, {} errors in {:.1f} s.'.format(
+            created, updated, len(errors), time.perf_counter() - started
+        )))
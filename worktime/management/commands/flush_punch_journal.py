@@ -0,0 +1,45 @@
+"""
+打刻ジャーナルの一括登録 の CLI 管理コマンドです。
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from worktime.journal import flush_punches, get_journal_path
+
+
+class Command(BaseCommand):
+    """PUNCH_JOURNAL に追記された打刻をデータベースに一括登録します。
+
+    起動時には前回停止時に未登録だった打刻も登録します。--interval を指定すると常駐して定期的に登録します。
+
+    Args:
+        BaseCommand: 基底コマンド
+    """
+    help = 'Flush punches appended to PUNCH_JOURNAL into the database.'
+
+    def add_arguments(self, parser):
+        """実行時引数を設定します。
+
+        Args:
+            parser: コマンドライン解析クラス
+        """
+        parser.add_argument('--interval', type=float, default=None,
+                            help='keep running and flush every INTERVAL seconds')
+        parser.add_argument('--batch-size', dest='batch_size', type=int, default=1000,
+                            help='number of punches per bulk insert')
+
+    def handle(self, *args, **options):
+        """カスタムコマンドの処理を実行します。
+        """
+        if get_journal_path() is None:
+            raise CommandError('PUNCH_JOURNAL is not configured.')
+
+        # 未登録の打刻を登録 (常駐する場合は繰り返し)
+        while True:
+            total = flush_punches(options['batch_size'])
+            if total or options['interval'] is None:
+                self.stdout.write(self.style.SUCCESS('{} punches flushed.'.format(total)))
+            if options['interval'] is None:
+                break
+            time.sleep(options['interval'])
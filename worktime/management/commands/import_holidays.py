@@ -0,0 +1,51 @@
+"""
+祝日データ取込 の CLI 管理コマンドです。
+"""
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+import timecard.settings
+from worktime.holidays import import_holidays
+
+
+class Command(BaseCommand):
+    """iCalendar (ics) 形式のファイルまたは URL から祝日を取り込みます。
+
+    URL から取り込む場合は、前回から変更がなければ取り込みません。
+
+    Args:
+        BaseCommand: 基底コマンド
+    """
+    help = 'Import holidays from an ics file or URL (default: HOLIDAY_DOWNLOAD_URL).'
+
+    def add_arguments(self, parser):
+        """実行時引数を設定します。
+
+        Args:
+            parser: コマンドライン解析クラス
+        """
+        parser.add_argument('source', nargs='?', type=str,
+                            help='ics file path or URL')
+        parser.add_argument('--force', action='store_true',
+                            help='download even if the URL is not modified')
+
+    def handle(self, *args, **options):
+        """カスタムコマンドの処理を実行します。
+        """
+        source = options['source'] or timecard.settings.HOLIDAY_DOWNLOAD_URL
+        if not source:
+            raise CommandError('Specify an ics file or URL, or set HOLIDAY_DOWNLOAD_URL.')
+
+        # 取込
+        try:
+            result = import_holidays(source, options['force'])
+        except (requests.RequestException, OSError, ValueError) as e:
+            raise CommandError(e)
+
+        # 完了メッセージ
+        if result is None:
+            self.stdout.write(self.style.SUCCESS('Holiday data not modified.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                '{} holidays imported, {} removed.'.format(*result)
+            ))
@@ -0,0 +1,131 @@
+"""
+月次勤務集計の再計算 の CLI 管理コマンドです。
+"""
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from worktime.materialized import refresh_monthly_summaries
+from worktime.models import (CommandRun, MonthlySummary, TimeOffRequest,
+                             TimeRecord)
+from worktime.reference import get_first_calendar_date
+from worktime.utils import get_users, parse_year_month
+
+
+# 実行記録のコマンド名
+COMMAND_NAME = 'recompute_monthly_summaries'
+
+
+class Command(BaseCommand):
+    """前回の実行以降に入力が変更された月と、未作成の月の月次勤務集計を再計算します。
+
+    参照時にも月次勤務集計は作成されるため、基準日時には集計の計算日時ではなく前回の実行開始日時を使用します。
+
+    Args:
+        BaseCommand: 基底コマンド
+    """
+    help = 'Recompute monthly summaries whose inputs changed since the last run.'
+
+    def add_arguments(self, parser):
+        """実行時引数を設定します。
+
+        Args:
+            parser: コマンドライン解析クラス
+        """
+        parser.add_argument('--from', dest='month_from', type=str,
+                            help='first month to fill missing summaries (YYYY-MM)')
+        parser.add_argument('--all', action='store_true',
+                            help='ignore watermark and recompute every month')
+
+    def get_months(self, year: int, month: int) -> int:
+        """年月の月数を計算します。
+
+        Args:
+            year (int): 西暦年
+            month (int): 月
+
+        Returns:
+            int: 月数
+        """
+        return year * 12 + month - 1
+
+    def get_changed_months(self, model, watermark) -> set:
+        """更新日時が基準日時より後のレコードを含むユーザと年月を取得します。
+
+        Args:
+            model: 打刻記録または休暇申請のモデル
+            watermark: 基準日時
+
+        Returns:
+            set: ユーザ ID と西暦年と月の tuple の set
+        """
+        results = set()
+        for username, month in model.objects.filter(updated_at__gt=watermark).annotate(
+            month=TruncMonth('date')
+        ).values_list('username', 'month').distinct():
+            results.add((username, month.year, month.month))
+        return results
+
+    def handle(self, *args, **options):
+        """カスタムコマンドの処理を実行します。
+        """
+
+        # 実行開始日時 (次回実行時の基準日時)
+        started_at = timezone.now()
+
+        # 締め済の月の範囲を決定
+        today = datetime.datetime.now().date()
+        end_months = self.get_months(today.year, today.month) - 1
+        try:
+            if options['month_from']:
+                start_months = self.get_months(*parse_year_month(options['month_from']))
+            else:
+                min_date = get_first_calendar_date()
+                if min_date is None:
+                    self.stdout.write(self.style.WARNING('Calendar is empty.'))
+                    return
+                start_months = self.get_months(min_date.year, min_date.month)
+        except ValueError as e:
+            raise CommandError(e)
+
+        # 対象のユーザと年月を収集
+        targets = set()
+        usernames = list(get_users(False).keys())
+        watermark = CommandRun.objects.filter(name=COMMAND_NAME).values_list('started_at', flat=True).first()
+        if watermark is not None and not options['all']:
+            # 前回の実行以降に更新された打刻記録と休暇申請の月
+            targets.update(self.get_changed_months(TimeRecord, watermark))
+            targets.update(self.get_changed_months(TimeOffRequest, watermark))
+
+            # 未作成または破棄された月
+            existing = set(MonthlySummary.objects.values_list('username', 'year', 'month'))
+            for months in range(start_months, end_months + 1):
+                for username in usernames:
+                    key = (username, months // 12, months % 12 + 1)
+                    if key not in existing:
+                        targets.add(key)
+        else:
+            for months in range(start_months, end_months + 1):
+                for username in usernames:
+                    targets.add((username, months // 12, months % 12 + 1))
+
+        # 年月ごとに再計算
+        months = {}
+        for username, year, month in targets:
+            if self.get_months(year, month) <= end_months:
+                months.setdefault((year, month), []).append(username)
+        for (year, month), month_usernames in sorted(months.items()):
+            refresh_monthly_summaries(
+                sorted(month_usernames), year, month, started_at
+            )
+            self.stdout.write(self.style.SUCCESS(
+                '{:04d}-{:02d} {} users'.format(year, month, len(month_usernames))
+            ))
+
+        # 次回実行時の基準日時を記録
+        CommandRun.objects.update_or_create(name=COMMAND_NAME, defaults={'started_at': started_at})
+
+        # 完了メッセージ
+        self.stdout.write(self.style.SUCCESS('Monthly summaries recomputed.'))
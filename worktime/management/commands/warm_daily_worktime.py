@@ -0,0 +1,51 @@
+"""
+日次勤務実績の事前作成 の CLI 管理コマンドです。
+"""
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from worktime.materialized import get_monthly_worktimes_bulk
+from worktime.queries import ENGINES
+from worktime.utils import get_users
+
+
+class Command(BaseCommand):
+    """有効な全ユーザの前月と当月の日次勤務実績を作成します。
+
+    勤務表は日次勤務実績から表示します。日付が変わると前日と本日の日次勤務実績は再計算が必要になるため、始業前に毎日実行してください。
+
+    Args:
+        BaseCommand: 基底コマンド
+    """
+    help = 'Precompute daily worktimes of the previous and current month for all users.'
+
+    def add_arguments(self, parser):
+        """実行時引数を設定します。
+
+        Args:
+            parser: コマンドライン解析クラス
+        """
+        parser.add_argument('--engine', choices=ENGINES, default='numpy',
+                            help='worktime calculation engine')
+
+    def handle(self, *args, **options):
+        """カスタムコマンドの処理を実行します。
+        """
+
+        # 対象のユーザと月を決定
+        usernames = list(get_users(True).keys())
+        today = datetime.datetime.now().date()
+        months = today.year * 12 + today.month - 1
+
+        # 前月と当月の日次勤務実績を作成
+        for months in [months - 1, months]:
+            year = months // 12
+            month = (months % 12) + 1
+            get_monthly_worktimes_bulk(usernames, year, month, options['engine'])
+            self.stdout.write(self.style.SUCCESS(
+                '{:04d}-{:02d} {} users'.format(year, month, len(usernames))
+            ))
+
+        # 完了メッセージ
+        self.stdout.write(self.style.SUCCESS('Daily worktime warmed.'))
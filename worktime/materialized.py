@@ -0,0 +1,289 @@
+"""
+日次勤務実績と月次勤務集計の実体化テーブルを管理するモジュールです。
+"""
+import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from worktime.models import DailyWorktime, MonthlySummary
+from worktime.queries import get_records_bulk
+from worktime.reference import get_calendars
+from worktime.rules import SUMMARY_FIELDS, summarize, summarize_hours
+from worktime.utils import get_month_range
+
+# 日次勤務実績として保持する打刻記録の項目
+RECORD_FIELDS = [
+    'date',
+    'attendance',
+    'holiday',
+    'begin',
+    'end',
+    'leave',
+    'back',
+    'begin_record',
+    'end_record',
+    'work',
+    'behind',
+    'early',
+    'overtime',
+    'error',
+]
+
+
+def day_class(date: datetime.date, today: datetime.date) -> int:
+    """日付が過去日、本日、未到来日のいずれかを判定します。
+
+    Args:
+        date (datetime.date): 判定する日付
+        today (datetime.date): 基準日
+
+    Returns:
+        int: 過去日は -1、本日は 0、未到来日は 1
+    """
+    if date < today:
+        return -1
+    if date == today:
+        return 0
+    return 1
+
+
+def is_stale(date: datetime.date, calculated_on: datetime.date, today: datetime.date) -> bool:
+    """計算日以降に日付の区分が変わり、再計算が必要か判定します。
+
+    Args:
+        date (datetime.date): 勤務日
+        calculated_on (datetime.date): 計算日
+        today (datetime.date): 本日
+
+    Returns:
+        bool: 再計算が必要な場合は True
+    """
+    return day_class(date, calculated_on) != day_class(date, today)
+
+
+def to_record(row: dict) -> dict:
+    """日次勤務実績を打刻記録の形式に変換します。
+
+    Args:
+        row (dict): 日次勤務実績
+
+    Returns:
+        dict: 打刻記録
+    """
+    record = {}
+    for field in RECORD_FIELDS:
+        record[field] = row[field]
+    if row['time_off_request_id'] is not None:
+        record['time_off_request_id'] = row['time_off_request_id']
+        record['time_off_accepted'] = row['time_off_accepted']
+    return record
+
+
+def refresh_daily_worktimes(usernames: list, date_range: tuple[datetime.date, datetime.date], engine: str = 'python') -> dict:
+    """指定した複数ユーザと期間の日次勤務実績を再計算して保存します。
+
+    Args:
+        usernames (list): ユーザ ID のリスト
+        date_range (tuple[datetime.date, datetime.date]): 期間 (終了日は範囲に含まれません)
+        engine (str): 勤務実績の計算方法 ('python' または 'numpy')
+
+    Returns:
+        dict: ユーザ ID をキーにした打刻記録のリスト(日付順)の dict
+    """
+    begin, end = date_range
+    today = datetime.datetime.now().date()
+    results = get_records_bulk(usernames, date_range, engine)
+    objects = []
+    dates = set()
+    for username, records in results.items():
+        if not username:
+            continue
+        for record in records:
+            dates.add(record['date'])
+            objects.append(DailyWorktime(
+                username=username,
+                time_off_request_id=record.get('time_off_request_id'),
+                time_off_accepted=record.get('time_off_accepted'),
+                calculated_on=today,
+                **{field: record[field] for field in RECORD_FIELDS}
+            ))
+    with transaction.atomic():
+        # 営業日カレンダから削除された日を除去
+        DailyWorktime.objects.filter(
+            username__in=usernames, date__gte=begin, date__lt=end
+        ).exclude(date__in=dates).delete()
+        DailyWorktime.objects.bulk_create(
+            objects,
+            update_conflicts=True,
+            unique_fields=['username', 'date'],
+            update_fields=RECORD_FIELDS[1:] + [
+                'time_off_request_id',
+                'time_off_accepted',
+                'calculated_on'
+            ]
+        )
+    return results
+
+
+def get_worktimes_bulk(usernames: list, date_range: tuple[datetime.date, datetime.date], engine: str = 'python') -> dict:
+    """指定した複数ユーザと期間の打刻記録を日次勤務実績から取得します。
+
+    日次勤務実績が不足しているユーザや、日付の区分が変わったユーザは再計算して保存します。
+
+    Args:
+        usernames (list): ユーザ ID のリスト
+        date_range (tuple[datetime.date, datetime.date]): 期間 (終了日は範囲に含まれません)
+        engine (str): 再計算する場合の勤務実績の計算方法 ('python' または 'numpy')
+
+    Returns:
+        dict: ユーザ ID をキーにした打刻記録のリスト(日付順)の dict
+    """
+    begin, end = date_range
+    today = datetime.datetime.now().date()
+    days = len(get_calendars(date_range))
+    rows = DailyWorktime.objects.filter(
+        username__in=usernames, date__gte=begin, date__lt=end
+    ).order_by('username', 'date').values()
+
+    # 保存済の日次勤務実績を読み込み
+    results = {username: [] for username in usernames}
+    stale_usernames = set()
+    for row in rows:
+        if is_stale(row['date'], row['calculated_on'], today):
+            stale_usernames.add(row['username'])
+        results[row['username']].append(to_record(row))
+
+    # 不足または古いユーザを再計算
+    for username, records in results.items():
+        if len(records) != days:
+            stale_usernames.add(username)
+    if stale_usernames:
+        results.update(refresh_daily_worktimes(
+            [username for username in usernames if username in stale_usernames],
+            date_range,
+            engine
+        ))
+    return results
+
+
+def get_monthly_worktimes_bulk(usernames: list, year: int, month: int, engine: str = 'python') -> dict:
+    """指定した複数ユーザと年月の打刻記録を日次勤務実績から取得します。
+
+    Args:
+        usernames (list): ユーザ ID のリスト
+        year (int): 西暦年
+        month (int): 月
+        engine (str): 再計算する場合の勤務実績の計算方法 ('python' または 'numpy')
+
+    Returns:
+        dict: ユーザ ID をキーにした打刻記録のリスト(日付順)の dict
+    """
+    return get_worktimes_bulk(usernames, get_month_range(year, month), engine)
+
+
+def get_monthly_worktimes(username: str, year: int, month: int) -> list:
+    """指定したユーザと年月の打刻記録を日次勤務実績から取得します。
+
+    Args:
+        username (str): ユーザ ID
+        year (int): 西暦年
+        month (int): 月
+
+    Returns:
+        list: 打刻記録のリスト(日付順)
+    """
+    return get_monthly_worktimes_bulk([username], year, month)[username]
+
+
+def is_closed_month(year: int, month: int) -> bool:
+    """指定した年月が締め済 (今月より前) か判定します。
+
+    Args:
+        year (int): 西暦年
+        month (int): 月
+
+    Returns:
+        bool: 今月より前の場合は True
+    """
+    today = datetime.datetime.now().date()
+    return (year, month) < (today.year, today.month)
+
+
+def refresh_monthly_summaries(usernames: list, year: int, month: int, calculated_at: datetime.datetime = None) -> dict:
+    """指定した複数ユーザと年月の月次勤務集計を再計算して保存します。日次勤務実績も再計算されます。
+
+    Args:
+        usernames (list): ユーザ ID のリスト
+        year (int): 西暦年
+        month (int): 月
+        calculated_at (datetime.datetime): 計算日時 (省略時は現在日時)
+
+    Returns:
+        dict: ユーザ ID をキーにした集計結果の dict
+    """
+    if calculated_at is None:
+        calculated_at = timezone.now()
+    results = {}
+    objects = []
+    for username, records in refresh_daily_worktimes(usernames, get_month_range(year, month)).items():
+        results[username] = summarize(records)
+        if username:
+            objects.append(MonthlySummary(
+                username=username,
+                year=year,
+                month=month,
+                calculated_at=calculated_at,
+                **{field: results[username][field] for field in SUMMARY_FIELDS}
+            ))
+    MonthlySummary.objects.bulk_create(
+        objects,
+        update_conflicts=True,
+        unique_fields=['username', 'year', 'month'],
+        update_fields=SUMMARY_FIELDS + ['calculated_at']
+    )
+    return results
+
+
+def get_monthly_summaries_bulk(usernames: list, year: int, month: int) -> dict:
+    """指定した複数ユーザと年月の勤務実績の集計を取得します。
+
+    締め済の月は月次勤務集計から取得し、未保存のユーザは計算して保存します。
+    今月以降は常に日次勤務実績から集計します。
+
+    Args:
+        usernames (list): ユーザ ID のリスト
+        year (int): 西暦年
+        month (int): 月
+
+    Returns:
+        dict: ユーザ ID をキーにした集計結果の dict
+    """
+    if not is_closed_month(year, month):
+        results = {}
+        for username, records in get_monthly_worktimes_bulk(usernames, year, month).items():
+            results[username] = summarize(records)
+        return results
+    results = {}
+    for row in MonthlySummary.objects.filter(year=year, month=month, username__in=usernames).values():
+        results[row['username']] = summarize_hours(
+            {field: row[field] for field in SUMMARY_FIELDS}
+        )
+    missing = [username for username in usernames if username not in results]
+    if missing:
+        results.update(refresh_monthly_summaries(missing, year, month))
+    return {username: results[username] for username in usernames}
+
+
+def get_monthly_summary(username: str, year: int, month: int) -> dict:
+    """指定したユーザと年月の勤務実績の集計を取得します。
+
+    Args:
+        username (str): ユーザ ID
+        year (int): 西暦年
+        month (int): 月
+
+    Returns:
+        dict: 集計結果の dict
+    """
+    return get_monthly_summaries_bulk([username], year, month)[username]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worktime', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyWorktime',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('username', models.CharField(max_length=150, verbose_name='ユーザー名')),
+                ('date', models.DateField(verbose_name='日付')),
+                ('attendance', models.BooleanField(verbose_name='営業日')),
+                ('holiday', models.CharField(blank=True, max_length=80, verbose_name='休業理由')),
+                ('begin', models.TimeField(blank=True, null=True, verbose_name='勤務開始')),
+                ('end', models.TimeField(blank=True, null=True, verbose_name='勤務終了')),
+                ('leave', models.TimeField(blank=True, null=True, verbose_name='休憩開始')),
+                ('back', models.TimeField(blank=True, null=True, verbose_name='休憩終了')),
+                ('begin_record', models.TimeField(blank=True, null=True, verbose_name='出勤打刻')),
+                ('end_record', models.TimeField(blank=True, null=True, verbose_name='退勤打刻')),
+                ('time_off_request_id', models.IntegerField(blank=True, null=True, verbose_name='休暇申請 ID')),
+                ('time_off_accepted', models.BooleanField(blank=True, null=True, verbose_name='休暇承認')),
+                ('work', models.BooleanField(verbose_name='出勤')),
+                ('behind', models.IntegerField(verbose_name='遅刻・早退')),
+                ('early', models.IntegerField(verbose_name='早出')),
+                ('overtime', models.IntegerField(verbose_name='残業')),
+                ('error', models.CharField(blank=True, max_length=40, null=True, verbose_name='エラー')),
+                ('calculated_on', models.DateField(verbose_name='計算日')),
+            ],
+            options={
+                'verbose_name': '日次勤務実績',
+                'verbose_name_plural': '日次勤務実績',
+                'constraints': [models.UniqueConstraint(fields=('username', 'date'), name='worktime_dailyworktime_unique_username_date')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worktime', '0002_dailyworktime'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlySummary',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('username', models.CharField(max_length=150, verbose_name='ユーザー名')),
+                ('year', models.IntegerField(verbose_name='年')),
+                ('month', models.IntegerField(verbose_name='月')),
+                ('days', models.IntegerField(verbose_name='日数')),
+                ('attendance_days', models.IntegerField(verbose_name='営業日')),
+                ('work_days', models.IntegerField(verbose_name='出勤日')),
+                ('behind_minutes', models.IntegerField(verbose_name='遅刻・早退時間')),
+                ('behind_count', models.IntegerField(verbose_name='遅刻・早退回数')),
+                ('early_minutes', models.IntegerField(verbose_name='早出時間')),
+                ('early_count', models.IntegerField(verbose_name='早出回数')),
+                ('overtime_minutes', models.IntegerField(verbose_name='残業時間')),
+                ('overtime_count', models.IntegerField(verbose_name='残業回数')),
+                ('time_off_count', models.IntegerField(verbose_name='休暇申請回数')),
+                ('time_off_not_yet_accepted_count', models.IntegerField(verbose_name='承認待ち回数')),
+                ('errors', models.IntegerField(verbose_name='エラー')),
+                ('calculated_at', models.DateTimeField(db_index=True, verbose_name='計算日時')),
+            ],
+            options={
+                'verbose_name': '月次勤務集計',
+                'verbose_name_plural': '月次勤務集計',
+                'indexes': [models.Index(fields=['year', 'month'], name='worktime_ms_year_month_idx')],
+                'constraints': [models.UniqueConstraint(fields=('username', 'year', 'month'), name='worktime_monthlysummary_unique_username_year_month')],
+            },
+        ),
+    ]
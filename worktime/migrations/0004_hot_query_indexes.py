@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:20
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_time_off_requests(apps, schema_editor):
+    """同じユーザと日付の重複した休暇申請がないことを確認します。
+
+    休暇申請は人事データのため自動では削除しません。重複がある場合は一覧を表示して中断するので、
+    システム管理の画面で不要な申請を削除してから再度実行してください。
+    """
+    TimeOffRequest = apps.get_model('worktime', 'TimeOffRequest')
+    duplicates = TimeOffRequest.objects.values('username', 'date').annotate(
+        count=Count('id')
+    ).filter(count__gt=1).order_by('username', 'date')
+    lines = []
+    for duplicate in duplicates:
+        ids = TimeOffRequest.objects.filter(
+            username=duplicate['username'], date=duplicate['date']
+        ).order_by('id').values_list('id', flat=True)
+        lines.append('  {} {}: id {}'.format(
+            duplicate['username'], duplicate['date'].isoformat(), ', '.join(str(id) for id in ids)
+        ))
+    if lines:
+        raise RuntimeError(
+            'Duplicate time off requests exist for the same user and date. '
+            'Delete the unnecessary requests and run migrate again.\n' + '\n'.join(lines)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worktime', '0003_monthlysummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timerecord',
+            index=models.Index(fields=['username', 'date', 'action', 'time'], name='worktime_tr_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timerecord',
+            index=models.Index(fields=['username', 'date', 'time'], name='worktime_tr_user_recent_idx'),
+        ),
+        migrations.RunPython(
+            check_duplicate_time_off_requests, reverse_code=migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='timeoffrequest',
+            constraint=models.UniqueConstraint(fields=('username', 'date'), name='worktime_timeoffrequest_unique_username_date'),
+        ),
+    ]
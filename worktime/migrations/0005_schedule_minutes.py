@@ -0,0 +1,134 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:36
+
+from django.db import migrations, models
+
+# 勤務時間の分数と標準勤務時間の項目 (このマイグレーションの時点の定義)
+MINUTES_FIELDS = ['begin_minutes', 'end_minutes', 'leave_minutes', 'back_minutes', 'standard_minutes']
+
+
+def time_to_minutes(time):
+    """時刻を 0 時からの分数に変換します (時刻がない場合は None)。
+    """
+    if time is None:
+        return None
+    return time.hour * 60 + time.minute
+
+
+def get_schedule_minutes(begin, end, leave, back) -> dict:
+    """勤務時間を 0 時からの分数と標準勤務時間 (分) に変換します。
+    """
+    result = {
+        'begin_minutes': time_to_minutes(begin),
+        'end_minutes': time_to_minutes(end),
+        'leave_minutes': time_to_minutes(leave),
+        'back_minutes': time_to_minutes(back),
+        'standard_minutes': None
+    }
+    if result['begin_minutes'] is not None and result['end_minutes'] is not None:
+        if result['leave_minutes'] is not None and result['back_minutes'] is not None:
+            result['standard_minutes'] = (result['leave_minutes'] - result['begin_minutes']) + \
+                (result['end_minutes'] - result['back_minutes'])
+        else:
+            result['standard_minutes'] = result['end_minutes'] - result['begin_minutes']
+    return result
+
+
+def fill_schedule_minutes(apps, schema_editor):
+    """既存のレコードの勤務時間の分数と標準勤務時間を設定します。
+    """
+    for model_name in ['BusinessCalendar', 'TimeOffPattern', 'TimeOffRequest']:
+        model = apps.get_model('worktime', model_name)
+        objects = []
+        for obj in model.objects.all():
+            for field, value in get_schedule_minutes(obj.begin, obj.end, obj.leave, obj.back).items():
+                setattr(obj, field, value)
+            objects.append(obj)
+        model.objects.bulk_update(objects, MINUTES_FIELDS, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worktime', '0004_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='businesscalendar',
+            name='back_minutes',
+            field=models.IntegerField(blank=True, editable=False, null=True, verbose_name='休憩終了 (分)'),
+        ),
+        migrations.AddField(
+            model_name='businesscalendar',
+            name='begin_minutes',
+            field=models.IntegerField(blank=True, editable=False, null=True, verbose_name='勤務開始 (分)'),
+        ),
+        migrations.AddField(
+            model_name='businesscalendar',
+            name='end_minutes',
+            field=models.IntegerField(blank=True, editable=False, null=True, verbose_name='勤務終了 (分)'),
+        ),
+        migrations.AddField(
+            model_name='businesscalendar',
+            name='leave_minutes',
+            field=models.IntegerField(blank=True, editable=False, null=True, verbose_name='休憩開始 (分)'),
+        ),
+        migrations.AddField(
+            model_name='businesscalendar',
+            name='standard_minutes',
+            field=models.IntegerField(blank=True, editable=False, null=True, verbose_name='標準勤務時間 (分)'),
+        ),
+        migrations.AddField(
+            model_name='timeoffpattern',
+            name='back_minutes',
+            field=models.IntegerField(blank=True, editable=False, null=True, verbose_name='休憩終了 (分)'),
+        ),
+        migrations.AddField(
+            model_name='timeoffpattern',
+            name='begin_minutes',
+            field=models.IntegerField(blank=True, editable=False, null=True, verbose_name='勤務開始 (分)'),
+        ),
+        migrations.AddField(
+            model_name='timeoffpattern',
+            name='end_minutes',
+            field=models.IntegerField(blank=True, editable=False, null=True, verbose_name='勤務終了 (分)'),
+        ),
+        migrations.AddField(
+            model_name='timeoffpattern',
+            name='leave_minutes',
+            field=models.IntegerField(blank=True, editable=False, null=True, verbose_name='休憩開始 (分)'),
+        ),
+        migrations.AddField(
+            model_name='timeoffpattern',
+            name='standard_minutes',
+            field=models.IntegerField(blank=True, editable=False, null=True, verbose_name='標準勤務時間 (分)'),
+        ),
+        migrations.AddField(
+            model_name='timeoffrequest',
+            name='back_minutes',
+            field=models.IntegerField(blank=True, editable=False, null=True, verbose_name='休憩終了 (分)'),
+        ),
+        migrations.AddField(
+            model_name='timeoffrequest',
+            name='begin_minutes',
+            field=models.IntegerField(blank=True, editable=False, null=True, verbose_name='勤務開始 (分)'),
+        ),
+        migrations.AddField(
+            model_name='timeoffrequest',
+            name='end_minutes',
+            field=models.IntegerField(blank=True, editable=False, null=True, verbose_name='勤務終了 (分)'),
+        ),
+        migrations.AddField(
+            model_name='timeoffrequest',
+            name='leave_minutes',
+            field=models.IntegerField(blank=True, editable=False, null=True, verbose_name='休憩開始 (分)'),
+        ),
+        migrations.AddField(
+            model_name='timeoffrequest',
+            name='standard_minutes',
+            field=models.IntegerField(blank=True, editable=False, null=True, verbose_name='標準勤務時間 (分)'),
+        ),
+        migrations.RunPython(
+            fill_schedule_minutes, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worktime', '0005_schedule_minutes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timerecord',
+            index=models.Index(fields=['date', 'time'], name='worktime_tr_date_time_idx'),
+        ),
+    ]
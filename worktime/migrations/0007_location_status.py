@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worktime', '0006_date_time_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timerecord',
+            name='distance',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='距離'),
+        ),
+        migrations.AddField(
+            model_name='timerecord',
+            name='location_status',
+            field=models.CharField(blank=True, choices=[('inside', '圏内'), ('outside', '圏外'), ('low_accuracy', '低精度'), ('unknown', '計算不可')], editable=False, max_length=20, null=True, verbose_name='位置判定'),
+        ),
+        migrations.AddIndex(
+            model_name='timerecord',
+            index=models.Index(fields=['location_status', 'date'], name='worktime_tr_location_idx'),
+        ),
+    ]
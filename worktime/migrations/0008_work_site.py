@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:54
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worktime', '0007_location_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkSite',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='名称')),
+                ('latitude', models.FloatField(validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)], verbose_name='緯度')),
+                ('longitude', models.FloatField(validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)], verbose_name='経度')),
+                ('radius', models.FloatField(validators=[django.core.validators.MinValueValidator(0)], verbose_name='半径 (m)')),
+            ],
+            options={
+                'verbose_name': '勤務場所',
+                'verbose_name_plural': '勤務場所',
+            },
+        ),
+        migrations.AddField(
+            model_name='timerecord',
+            name='site',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='worktime.worksite', verbose_name='勤務場所'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worktime', '0008_work_site'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timerecord',
+            name='idempotency_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, verbose_name='冪等キー'),
+        ),
+        migrations.AddConstraint(
+            model_name='timerecord',
+            constraint=models.UniqueConstraint(fields=('username', 'idempotency_key'), name='worktime_timerecord_unique_username_idempotency_key'),
+        ),
+    ]
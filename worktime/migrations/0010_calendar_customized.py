@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worktime', '0009_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='businesscalendar',
+            name='customized',
+            field=models.BooleanField(default=False, help_text='個別に変更した日は create_calendar で勤務パターンから再生成されません。', verbose_name='個別設定'),
+        ),
+    ]
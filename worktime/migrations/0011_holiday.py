@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worktime', '0010_calendar_customized'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Holiday',
+            fields=[
+                ('date', models.DateField(primary_key=True, serialize=False, verbose_name='日付')),
+                ('name', models.CharField(max_length=100, verbose_name='名称')),
+            ],
+            options={
+                'verbose_name': '祝日',
+                'verbose_name_plural': '祝日',
+            },
+        ),
+        migrations.CreateModel(
+            name='HolidaySource',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=400, unique=True, verbose_name='取得元')),
+                ('etag', models.CharField(blank=True, max_length=200, verbose_name='ETag')),
+                ('last_modified', models.CharField(blank=True, max_length=100, verbose_name='Last-Modified')),
+                ('imported_at', models.DateTimeField(auto_now=True, verbose_name='取込日時')),
+            ],
+            options={
+                'verbose_name': '祝日データの取得元',
+                'verbose_name_plural': '祝日データの取得元',
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worktime', '0011_holiday'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkSchedule',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('display_name', models.CharField(max_length=40, verbose_name='名称')),
+            ],
+            options={
+                'verbose_name': '勤務スケジュール',
+                'verbose_name_plural': '勤務スケジュール',
+            },
+        ),
+        migrations.CreateModel(
+            name='ScheduleAssignment',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('username', models.CharField(max_length=150, verbose_name='ユーザー名')),
+                ('valid_from', models.DateField(verbose_name='適用開始日')),
+                ('valid_to', models.DateField(blank=True, help_text='空欄の場合は期限なしで適用します。', null=True, verbose_name='適用終了日')),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assignments', to='worktime.workschedule', verbose_name='勤務スケジュール')),
+            ],
+            options={
+                'verbose_name': '勤務スケジュールの割当',
+                'verbose_name_plural': '勤務スケジュールの割当',
+                'indexes': [models.Index(fields=['username', 'valid_from'], name='worktime_sa_user_from_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='WorkSchedulePattern',
+            fields=[
+                ('begin_minutes', models.IntegerField(blank=True, editable=False, null=True, verbose_name='勤務開始 (分)')),
+                ('end_minutes', models.IntegerField(blank=True, editable=False, null=True, verbose_name='勤務終了 (分)')),
+                ('leave_minutes', models.IntegerField(blank=True, editable=False, null=True, verbose_name='休憩開始 (分)')),
+                ('back_minutes', models.IntegerField(blank=True, editable=False, null=True, verbose_name='休憩終了 (分)')),
+                ('standard_minutes', models.IntegerField(blank=True, editable=False, null=True, verbose_name='標準勤務時間 (分)')),
+                ('id', models.AutoField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.IntegerField(choices=[(0, '月'), (1, '火'), (2, '水'), (3, '木'), (4, '金'), (5, '土'), (6, '日'), (7, '祝日')], verbose_name='曜日')),
+                ('attendance', models.BooleanField(default=True, verbose_name='勤務日')),
+                ('begin', models.TimeField(blank=True, null=True, verbose_name='勤務開始')),
+                ('end', models.TimeField(blank=True, null=True, verbose_name='勤務終了')),
+                ('leave', models.TimeField(blank=True, null=True, verbose_name='休憩開始')),
+                ('back', models.TimeField(blank=True, null=True, verbose_name='休憩終了')),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='patterns', to='worktime.workschedule', verbose_name='勤務スケジュール')),
+            ],
+            options={
+                'verbose_name': '勤務スケジュールの勤務パターン',
+                'verbose_name_plural': '勤務スケジュールの勤務パターン',
+                'constraints': [models.UniqueConstraint(fields=('schedule', 'day'), name='worktime_workschedulepattern_unique_schedule_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worktime', '0012_work_schedule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommandRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='コマンド')),
+                ('started_at', models.DateTimeField(verbose_name='実行開始日時')),
+            ],
+            options={
+                'verbose_name': '管理コマンドの実行記録',
+                'verbose_name_plural': '管理コマンドの実行記録',
+            },
+        ),
+    ]
@@ -1,15 +1,15 @@
 """
 モデルです。
 """
-from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.utils import dateformat
-from geopy.distance import geodesic
 
 import timecard.settings
-from worktime.utils import display_name
+from worktime.geo import LOCATION_STATUSES, get_locations, judge_locations
+from worktime.rules import MINUTES_FIELDS, get_schedule_minutes
+from worktime.utils import get_display_username
 
 
 class StandardWorkPattern(models.Model):
@@ -59,7 +59,43 @@ class StandardWorkPattern(models.Model):
         verbose_name_plural = "勤務パターン"
 
 
-class TimeOffPattern(models.Model):
+class ScheduleMinutes(models.Model):
+    """勤務時間を分数で保持するモデルの基底クラスです。
+
+    勤務開始、勤務終了、休憩開始、休憩終了の 0 時からの分数と標準勤務時間 (分) を保存時に更新します。
+    bulk_create など save を経由しない保存を行う場合は、事前に update_schedule_minutes を呼び出してください。
+
+    Args:
+        models: 継承するモデル
+    """
+    begin_minutes = models.IntegerField('勤務開始 (分)', blank=True, null=True, editable=False)
+    end_minutes = models.IntegerField('勤務終了 (分)', blank=True, null=True, editable=False)
+    leave_minutes = models.IntegerField('休憩開始 (分)', blank=True, null=True, editable=False)
+    back_minutes = models.IntegerField('休憩終了 (分)', blank=True, null=True, editable=False)
+    standard_minutes = models.IntegerField('標準勤務時間 (分)', blank=True, null=True, editable=False)
+
+    def update_schedule_minutes(self):
+        """勤務時間の分数と標準勤務時間を更新します。
+        """
+        for field, value in get_schedule_minutes(self.begin, self.end, self.leave, self.back).items():
+            setattr(self, field, value)
+
+    def save(self, *args, **kwargs):
+        """勤務時間の分数を更新して保存します。
+        """
+        self.update_schedule_minutes()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'begin', 'end', 'leave', 'back'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | set(MINUTES_FIELDS)
+        super().save(*args, **kwargs)
+
+    class Meta:
+        """メタ情報です。
+        """
+        abstract = True
+
+
+class TimeOffPattern(ScheduleMinutes):
     """休暇パターンのモデルです。
 
     Args:
@@ -107,7 +143,7 @@ class TimeOffPattern(models.Model):
         verbose_name_plural = "休暇パターン"
 
 
-class BusinessCalendar(models.Model):
+class BusinessCalendar(ScheduleMinutes):
     """営業日カレンダのモデルです。
 
     Args:
@@ -126,6 +162,9 @@ class BusinessCalendar(models.Model):
     end = models.TimeField('勤務終了', blank=True, null=True)
     leave = models.TimeField('休憩開始', blank=True, null=True)
     back = models.TimeField('休憩終了', blank=True, null=True)
+    customized = models.BooleanField(
+        '個別設定', default=False, help_text='個別に変更した日は create_calendar で勤務パターンから再生成されません。'
+    )
 
     def clean(self):
         """値の検査
@@ -159,6 +198,259 @@ class BusinessCalendar(models.Model):
         verbose_name_plural = "営業日"
 
 
+class Holiday(models.Model):
+    """祝日のモデルです。
+
+    Args:
+        models: 継承するモデル
+
+    Returns:
+        str: 文字列表現
+    """
+    date = models.DateField('日付', primary_key=True)
+    name = models.CharField('名称', max_length=100)
+
+    def __str__(self):
+        """文字列表現を取得します。
+
+        Returns:
+            str: 文字列表現
+        """
+        return dateformat.format(self.date, 'Y/m/d (D)') + ' ' + self.name
+
+    class Meta:
+        """メタ情報です。
+        """
+        verbose_name = "祝日"
+        verbose_name_plural = "祝日"
+
+
+class HolidaySource(models.Model):
+    """祝日データの取得元のモデルです。
+
+    条件付きで再取得するための ETag と Last-Modified を保持します。
+
+    Args:
+        models: 継承するモデル
+
+    Returns:
+        str: 文字列表現
+    """
+    source = models.CharField('取得元', max_length=400, unique=True)
+    etag = models.CharField('ETag', max_length=200, blank=True)
+    last_modified = models.CharField('Last-Modified', max_length=100, blank=True)
+    imported_at = models.DateTimeField('取込日時', auto_now=True)
+
+    def __str__(self):
+        """文字列表現を取得します。
+
+        Returns:
+            str: 文字列表現
+        """
+        return self.source
+
+    class Meta:
+        """メタ情報です。
+        """
+        verbose_name = "祝日データの取得元"
+        verbose_name_plural = "祝日データの取得元"
+
+
+class WorkSite(models.Model):
+    """勤務場所のモデルです。
+
+    Args:
+        models: 継承するモデル
+
+    Returns:
+        str: 文字列表現
+    """
+    name = models.CharField('名称', max_length=100)
+    latitude = models.FloatField(
+        '緯度', validators=[
+            MinValueValidator(-90), MaxValueValidator(90)
+        ]
+    )
+    longitude = models.FloatField(
+        '経度', validators=[
+            MinValueValidator(-180), MaxValueValidator(180)
+        ]
+    )
+    radius = models.FloatField('半径 (m)', validators=[MinValueValidator(0)])
+
+    def __str__(self):
+        """文字列表現を取得します。
+
+        Returns:
+            str: 文字列表現
+        """
+        return self.name
+
+    class Meta:
+        """メタ情報です。
+        """
+        verbose_name = "勤務場所"
+        verbose_name_plural = "勤務場所"
+
+
+class WorkSchedule(models.Model):
+    """個人別の勤務スケジュールのモデルです。
+
+    曜日 (祝日は 7) ごとの勤務パターンの組で、ScheduleAssignment でユーザに割り当てます。
+
+    Args:
+        models: 継承するモデル
+
+    Returns:
+        str: 文字列表現
+    """
+    id = models.AutoField('ID', primary_key=True)
+    display_name = models.CharField('名称', max_length=40)
+
+    def __str__(self):
+        """文字列表現を取得します。
+
+        Returns:
+            str: 文字列表現
+        """
+        return self.display_name
+
+    class Meta:
+        """メタ情報です。
+        """
+        verbose_name = "勤務スケジュール"
+        verbose_name_plural = "勤務スケジュール"
+
+
+class WorkSchedulePattern(ScheduleMinutes):
+    """勤務スケジュールの曜日ごとの勤務パターンのモデルです。
+
+    勤務パターンのない曜日は営業日カレンダに従います。
+
+    Args:
+        models: 継承するモデル
+
+    Raises:
+        ValidationError: 値の不正
+
+    Returns:
+        str: 文字列表現
+    """
+    id = models.AutoField('ID', primary_key=True)
+    schedule = models.ForeignKey(
+        WorkSchedule, verbose_name='勤務スケジュール', on_delete=models.CASCADE, related_name='patterns'
+    )
+    day = models.IntegerField('曜日', choices=list(enumerate(timecard.settings.DAY_OF_WEEK)))
+    attendance = models.BooleanField('勤務日', default=True)
+    begin = models.TimeField('勤務開始', blank=True, null=True)
+    end = models.TimeField('勤務終了', blank=True, null=True)
+    leave = models.TimeField('休憩開始', blank=True, null=True)
+    back = models.TimeField('休憩終了', blank=True, null=True)
+
+    def clean(self):
+        """値の検査
+
+        Raises:
+            ValidationError: 値の不正
+        """
+        if self.attendance:
+            if (not self.begin) or (not self.end):
+                raise ValidationError("勤務日は勤務開始と勤務終了の時刻は必須です。")
+        else:
+            if self.begin or self.end or self.leave or self.back:
+                raise ValidationError("非勤務日は時刻の指定は出来ません。")
+
+    def __str__(self):
+        """文字列表現を取得します。
+
+        Returns:
+            str: 文字列表現
+        """
+        return timecard.settings.DAY_OF_WEEK[self.day]
+
+    class Meta:
+        """メタ情報です。
+        """
+        verbose_name = "勤務スケジュールの勤務パターン"
+        verbose_name_plural = "勤務スケジュールの勤務パターン"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['schedule', 'day'],
+                name='worktime_workschedulepattern_unique_schedule_day'
+            ),
+        ]
+
+
+class ScheduleAssignment(models.Model):
+    """ユーザへの勤務スケジュールの割当のモデルです。
+
+    同じユーザの割当の有効期間は重複できません。
+
+    Args:
+        models: 継承するモデル
+
+    Raises:
+        ValidationError: 値の不正
+
+    Returns:
+        str: 文字列表現
+    """
+    id = models.AutoField('ID', primary_key=True)
+    username = models.CharField('ユーザー名', max_length=150)
+    schedule = models.ForeignKey(
+        WorkSchedule, verbose_name='勤務スケジュール', on_delete=models.CASCADE, related_name='assignments'
+    )
+    valid_from = models.DateField('適用開始日')
+    valid_to = models.DateField('適用終了日', blank=True, null=True, help_text='空欄の場合は期限なしで適用します。')
+
+    def clean(self):
+        """値の検査
+
+        Raises:
+            ValidationError: 値の不正
+        """
+        if self.valid_from and self.valid_to and self.valid_to < self.valid_from:
+            raise ValidationError("適用終了日は適用開始日以降の日付を指定してください。")
+        if self.username and self.valid_from:
+            overlaps = ScheduleAssignment.objects.filter(username=self.username).exclude(pk=self.pk).filter(
+                models.Q(valid_to__isnull=True) | models.Q(valid_to__gte=self.valid_from)
+            )
+            if self.valid_to:
+                overlaps = overlaps.filter(valid_from__lte=self.valid_to)
+            if overlaps.exists():
+                raise ValidationError("適用期間が他の割当と重複しています。")
+
+    def __str__(self):
+        """文字列表現を取得します。
+
+        Returns:
+            str: 文字列表現
+        """
+        return '{} {} ({}～{})'.format(
+            self.display_username(), self.schedule, self.valid_from, self.valid_to or ''
+        )
+
+    def display_username(self):
+        """氏名を取得します。
+
+        Returns:
+            str: 氏名文字列
+        """
+        return get_display_username(self.username)
+
+    class Meta:
+        """メタ情報です。
+        """
+        verbose_name = "勤務スケジュールの割当"
+        verbose_name_plural = "勤務スケジュールの割当"
+        indexes = [
+            models.Index(
+                fields=['username', 'valid_from'],
+                name='worktime_sa_user_from_idx'
+            ),
+        ]
+
+
 class TimeRecord(models.Model):
     """打刻記録のモデルです。
 
@@ -184,7 +476,15 @@ class TimeRecord(models.Model):
         ]
     )
     accuracy = models.FloatField('誤差', blank=True, null=True)
+    distance = models.FloatField('距離', blank=True, null=True, editable=False)
+    location_status = models.CharField(
+        '位置判定', max_length=20, choices=LOCATION_STATUSES, blank=True, null=True, editable=False
+    )
+    site = models.ForeignKey(
+        WorkSite, verbose_name='勤務場所', blank=True, null=True, editable=False, on_delete=models.SET_NULL, related_name='+'
+    )
     ua = models.TextField('ブラウザ情報', max_length=400, blank=True, null=True)
+    idempotency_key = models.CharField('冪等キー', max_length=64, blank=True, null=True, editable=False)
     created_at = models.DateTimeField('作成日時', auto_now_add=True)
     updated_at = models.DateTimeField('更新日時', auto_now=True)
 
@@ -202,7 +502,7 @@ class TimeRecord(models.Model):
         Returns:
             str: 氏名文字列
         """
-        return display_name(User.objects.filter(username=self.username).first())
+        return get_display_username(self.username)
 
     def location(self) -> str:
         """位置情報の表示を編集します。
@@ -210,30 +510,45 @@ class TimeRecord(models.Model):
         Returns:
             str: 表示情報
         """
-        if self.latitude and self.longitude and self.accuracy:
-            if self.accuracy < timecard.settings.MAX_ACCURACY:
-                origin = timecard.settings.LOCATION_ORIGIN
-                point = (self.latitude, self.longitude)
-                try:
-                    distance = geodesic(origin, point).m
-                except:
-                    return '計算不可'
-                if distance < timecard.settings.MAX_DISTANCE:
-                    return '圏内'
-                else:
-                    return "圏外 {:,d} m (± {:,.1f} m)".format(int(distance), self.accuracy)
-            else:
-                return '低精度'
-        return None
+        return get_locations([self])[0]
+
+    def update_location(self):
+        """位置情報から勤務場所または基点からの距離と位置判定の結果を設定します。
+        """
+        self.distance, self.location_status, self.site_id = judge_locations([self])[0]
 
     class Meta:
         """メタ情報です。
         """
         verbose_name = "打刻記録"
         verbose_name_plural = "打刻記録"
+        indexes = [
+            models.Index(
+                fields=['username', 'date', 'action', 'time'],
+                name='worktime_tr_user_date_idx'
+            ),
+            models.Index(
+                fields=['username', 'date', 'time'],
+                name='worktime_tr_user_recent_idx'
+            ),
+            models.Index(
+                fields=['date', 'time'],
+                name='worktime_tr_date_time_idx'
+            ),
+            models.Index(
+                fields=['location_status', 'date'],
+                name='worktime_tr_location_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['username', 'idempotency_key'],
+                name='worktime_timerecord_unique_username_idempotency_key'
+            ),
+        ]
 
 
-class TimeOffRequest(models.Model):
+class TimeOffRequest(ScheduleMinutes):
     """休暇申請のモデルです。
 
     Args:
@@ -270,10 +585,153 @@ class TimeOffRequest(models.Model):
         Returns:
             str: 氏名文字列
         """
-        return display_name(User.objects.filter(username=self.username).first())
+        return get_display_username(self.username)
 
     class Meta:
         """メタ情報です。
         """
         verbose_name = "休暇申請"
         verbose_name_plural = "休暇申請"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['username', 'date'],
+                name='worktime_timeoffrequest_unique_username_date'
+            ),
+        ]
+
+
+class DailyWorktime(models.Model):
+    """日次勤務実績のモデルです。
+
+    ユーザと日付ごとに勤務実績の計算結果を保持します。打刻記録、休暇申請、営業日カレンダの変更時に再計算されます。
+
+    Args:
+        models: 継承するモデル
+
+    Returns:
+        str: 文字列表現
+    """
+    id = models.AutoField('ID', primary_key=True)
+    username = models.CharField('ユーザー名', max_length=150)
+    date = models.DateField('日付')
+    attendance = models.BooleanField('営業日')
+    holiday = models.CharField('休業理由', max_length=80, blank=True)
+    begin = models.TimeField('勤務開始', blank=True, null=True)
+    end = models.TimeField('勤務終了', blank=True, null=True)
+    leave = models.TimeField('休憩開始', blank=True, null=True)
+    back = models.TimeField('休憩終了', blank=True, null=True)
+    begin_record = models.TimeField('出勤打刻', blank=True, null=True)
+    end_record = models.TimeField('退勤打刻', blank=True, null=True)
+    time_off_request_id = models.IntegerField('休暇申請 ID', blank=True, null=True)
+    time_off_accepted = models.BooleanField('休暇承認', blank=True, null=True)
+    work = models.BooleanField('出勤')
+    behind = models.IntegerField('遅刻・早退')
+    early = models.IntegerField('早出')
+    overtime = models.IntegerField('残業')
+    error = models.CharField('エラー', max_length=40, blank=True, null=True)
+    calculated_on = models.DateField('計算日')
+
+    def __str__(self):
+        """文字列表現を取得します。
+
+        Returns:
+            str: 文字列表現
+        """
+        return dateformat.format(self.date, 'Y/m/d (D)') + ' ' + self.username
+
+    class Meta:
+        """メタ情報です。
+        """
+        verbose_name = "日次勤務実績"
+        verbose_name_plural = "日次勤務実績"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['username', 'date'],
+                name='worktime_dailyworktime_unique_username_date'
+            ),
+        ]
+
+
+class MonthlySummary(models.Model):
+    """月次勤務集計のモデルです。
+
+    ユーザと年月ごとに勤務実績の集計結果を保持します。今月以降の集計は保持しません。
+
+    Args:
+        models: 継承するモデル
+
+    Returns:
+        str: 文字列表現
+    """
+    id = models.AutoField('ID', primary_key=True)
+    username = models.CharField('ユーザー名', max_length=150)
+    year = models.IntegerField('年')
+    month = models.IntegerField('月')
+    days = models.IntegerField('日数')
+    attendance_days = models.IntegerField('営業日')
+    work_days = models.IntegerField('出勤日')
+    behind_minutes = models.IntegerField('遅刻・早退時間')
+    behind_count = models.IntegerField('遅刻・早退回数')
+    early_minutes = models.IntegerField('早出時間')
+    early_count = models.IntegerField('早出回数')
+    overtime_minutes = models.IntegerField('残業時間')
+    overtime_count = models.IntegerField('残業回数')
+    time_off_count = models.IntegerField('休暇申請回数')
+    time_off_not_yet_accepted_count = models.IntegerField('承認待ち回数')
+    errors = models.IntegerField('エラー')
+    calculated_at = models.DateTimeField('計算日時', db_index=True)
+
+    def __str__(self):
+        """文字列表現を取得します。
+
+        Returns:
+            str: 文字列表現
+        """
+        return '{:04d}/{:02d} {}'.format(self.year, self.month, self.username)
+
+    class Meta:
+        """メタ情報です。
+        """
+        verbose_name = "月次勤務集計"
+        verbose_name_plural = "月次勤務集計"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['username', 'year', 'month'],
+                name='worktime_monthlysummary_unique_username_year_month'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['year', 'month'],
+                name='worktime_ms_year_month_idx'
+            ),
+        ]
+
+
+class CommandRun(models.Model):
+    """管理コマンドの実行記録のモデルです。
+
+    前回の実行以降の変更だけを処理するコマンドが、前回の実行開始日時を保持します。
+
+    Args:
+        models: 継承するモデル
+
+    Returns:
+        str: 文字列表現
+    """
+    name = models.CharField('コマンド', max_length=100, unique=True)
+    started_at = models.DateTimeField('実行開始日時')
+
+    def __str__(self):
+        """文字列表現を取得します。
+
+        Returns:
+            str: 文字列表現
+        """
+        return self.name
+
+    class Meta:
+        """メタ情報です。
+        """
+        verbose_name = "管理コマンドの実行記録"
+        verbose_name_plural = "管理コマンドの実行記録"
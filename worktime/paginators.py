@@ -0,0 +1,70 @@
+"""
+件数の多いテーブルの一覧表示に使用するページネータです。
+"""
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimate_table_rows(model) -> int:
+    """データベースの統計情報からテーブルの件数を見積もります。
+
+    Args:
+        model: モデルのクラス
+
+    Returns:
+        int: 見積もった件数 (見積もれない場合は None)
+    """
+    connection = connections[model.objects.db]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [table])
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s', [table]
+            )
+        elif connection.vendor == 'sqlite' and model._meta.pk.get_internal_type() in ('AutoField', 'BigAutoField'):
+            # 自動採番の最大値 (削除された件数だけ多く見積もる)
+            cursor.execute('SELECT MAX({}) FROM {}'.format(
+                connection.ops.quote_name(model._meta.pk.column), connection.ops.quote_name(table)
+            ))
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """件数の多いテーブルで全件の件数計算を省略するページネータです。
+
+    EXACT_COUNT_LIMIT 件までは正確に数え、それを超える場合は絞り込みのない一覧であれば統計情報の見積もりを使用し、
+    絞り込みのある一覧であれば EXACT_COUNT_LIMIT 件までのページを表示します。
+
+    Args:
+        Paginator: 継承するクラス
+    """
+
+    # 正確に数える最大の件数
+    EXACT_COUNT_LIMIT = 100000
+
+    @cached_property
+    def count(self) -> int:
+        """件数を取得します。
+
+        Returns:
+            int: 件数
+        """
+        object_list = self.object_list
+        if not hasattr(object_list, 'query'):
+            return super().count
+        count = object_list.order_by()[:self.EXACT_COUNT_LIMIT + 1].count()
+        if count <= self.EXACT_COUNT_LIMIT:
+            return count
+        if not object_list.query.where:
+            estimated = estimate_table_rows(object_list.model)
+            if estimated is not None:
+                return max(estimated, count)
+        return count
@@ -0,0 +1,167 @@
+"""
+打刻の登録処理です。
+
+打刻にはクライアントが生成した冪等キーを指定できます。同じユーザの同じ冪等キーの打刻は 1 件だけ登録され、
+再送された打刻には最初の登録結果を返します。登録結果は短時間キャッシュされ、再送時はデータベースに問い合わせません。
+"""
+import datetime
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+
+import timecard.settings
+from worktime.caches import KEY_PREFIX
+from worktime.journal import append_punch, get_journal_path
+from worktime.models import TimeRecord
+
+# 打刻の登録結果をキャッシュする時間 (秒)
+IDEMPOTENCY_TIMEOUT = 600
+
+
+def string_to_float(string: str) -> float:
+    """文字列を数値で取得します。
+
+    Args:
+        string (str): 文字列
+
+    Returns:
+        float: 数値
+    """
+    return float(string) if string else None
+
+
+def build_time_record(username: str, cleaned_data: dict) -> TimeRecord:
+    """打刻フォームの入力値から現在時刻の打刻記録を作成します。
+
+    打刻位置の判定結果を設定した保存前のオブジェクトを返します。
+
+    Args:
+        username (str): ユーザ ID
+        cleaned_data (dict): TimeRecordForm の入力値
+
+    Returns:
+        TimeRecord: 打刻記録
+    """
+    now = datetime.datetime.now()
+    record = TimeRecord(
+        date=now.date(),
+        time=now.time(),
+        username=username,
+        action=cleaned_data['action'],
+        latitude=string_to_float(cleaned_data['latitude']),
+        longitude=string_to_float(cleaned_data['longitude']),
+        accuracy=string_to_float(cleaned_data['accuracy']),
+        ua=cleaned_data['ua'],
+        idempotency_key=cleaned_data.get('idempotency_key') or None,
+    )
+    record.update_location()
+    return record
+
+
+def get_punch_result(record: TimeRecord) -> dict:
+    """打刻の登録結果を取得します。
+
+    Args:
+        record (TimeRecord): 登録した打刻記録
+
+    Returns:
+        dict: 登録結果
+    """
+    return {
+        'id': record.id,
+        'action': record.action,
+        'label': timecard.settings.RECORD_ACTIONS.get(record.action),
+        'date': record.date.isoformat(),
+        'time': record.time.strftime('%H:%M:%S'),
+        'location_status': record.location_status,
+    }
+
+
+def get_idempotency_cache_key(username: str, key: str) -> str:
+    """打刻の登録結果のキャッシュキーを取得します。
+
+    Args:
+        username (str): ユーザ ID
+        key (str): 冪等キー
+
+    Returns:
+        str: キャッシュキー
+    """
+    return '{}:punch:{}:{}'.format(KEY_PREFIX, username, key)
+
+
+def find_punch(username: str, key: str) -> dict:
+    """冪等キーに対応する登録済の打刻の結果をキャッシュから取得します。
+
+    Args:
+        username (str): ユーザ ID
+        key (str): 冪等キー
+
+    Returns:
+        dict: 登録結果 (キャッシュにない場合は None)
+    """
+    if not key:
+        return None
+    return cache.get(get_idempotency_cache_key(username, key))
+
+
+async def afind_punch(username: str, key: str) -> dict:
+    """冪等キーに対応する登録済の打刻の結果をキャッシュから取得します (非同期)。
+
+    Args:
+        username (str): ユーザ ID
+        key (str): 冪等キー
+
+    Returns:
+        dict: 登録結果 (キャッシュにない場合は None)
+    """
+    if not key:
+        return None
+    return await cache.aget(get_idempotency_cache_key(username, key))
+
+
+def save_punch(record: TimeRecord) -> tuple[dict, bool]:
+    """打刻記録を登録します。
+
+    同じユーザの同じ冪等キーの打刻が登録済の場合は登録せず、登録済の打刻の結果を返します。
+    PUNCH_JOURNAL を指定した場合はジャーナルに追記し、登録結果の ID は None になります。
+
+    Args:
+        record (TimeRecord): 保存前の打刻記録
+
+    Returns:
+        tuple[dict, bool]: 登録結果と、新たに登録したかどうか
+    """
+    if get_journal_path() is not None:
+        # ジャーナルに追記して応答 (データベースへの登録は flush_punch_journal コマンドで実行)
+        record, created = append_punch(record)
+        result = get_punch_result(record)
+        cache.set(get_idempotency_cache_key(record.username, record.idempotency_key), result, IDEMPOTENCY_TIMEOUT)
+        return result, created
+    if not record.idempotency_key:
+        record.save()
+        return get_punch_result(record), True
+    try:
+        with transaction.atomic():
+            record.save()
+        created = True
+    except IntegrityError:
+        # 同時に再送された打刻やキャッシュから消えた打刻は、一意制約で登録済の打刻を特定
+        record = TimeRecord.objects.get(username=record.username, idempotency_key=record.idempotency_key)
+        created = False
+    result = get_punch_result(record)
+    cache.set(get_idempotency_cache_key(record.username, record.idempotency_key), result, IDEMPOTENCY_TIMEOUT)
+    return result, created
+
+
+async def asave_punch(record: TimeRecord) -> tuple[dict, bool]:
+    """打刻記録を登録します (非同期)。
+
+    Args:
+        record (TimeRecord): 保存前の打刻記録
+
+    Returns:
+        tuple[dict, bool]: 登録結果と、新たに登録したかどうか
+    """
+    return await sync_to_async(save_punch)(record)
@@ -3,10 +3,22 @@
 """
 import datetime
 
-from django.db.models import Count, Max, Min, OuterRef, Q, Subquery
+from django.contrib.auth.models import User
+from django.db.models import (Case, Count, Max, Min, OuterRef, Q, Subquery,
+                              When)
+from django.db.models.functions import ExtractYear
 
-from worktime.models import BusinessCalendar, TimeOffRequest, TimeRecord
-from worktime.rules import worktime_calculation
+import timecard.settings
+from worktime import sql_rules
+from worktime.models import TimeOffRequest, TimeRecord
+from worktime.reference import get_calendars
+from worktime.rules import MINUTES_FIELDS, summarize, worktime_calculation
+from worktime.schedules import apply_schedules
+from worktime.utils import display_name, get_month_range, get_year_range
+from worktime.vectorized import calculate_records
+
+# 勤務実績の計算方法
+ENGINES = ['python', 'numpy']
 
 
 def count_time_off_requests(username: str, date_range: tuple[datetime.date, datetime.date]) -> dict:
@@ -26,34 +38,245 @@ def count_time_off_requests(username: str, date_range: tuple[datetime.date, date
     return results
 
 
-def get_monthly_time_off_requests(username: str, year: int, month: int) -> dict:
-    """指定したユーザと年月の休暇申請を取得します。
+def get_year_expression(field: str):
+    """日付の列から年度を求める式を生成します。
 
     Args:
-        username (str): ユーザ ID
-        year (int): 西暦年
-        month (int): 月
+        field (str): 日付の列名
+
+    Returns:
+        Case: 年度の式
+    """
+    return Case(
+        When(**{field + '__month__gte': timecard.settings.YEAR_FIRST_MONTH}, then=ExtractYear(field)),
+        default=ExtractYear(field) - 1
+    )
+
+
+def count_time_off_requests_by_year(usernames: list, years: list) -> dict:
+    """指定した複数ユーザが指定した年度に申請した休暇申請の数を 1 回の問い合わせで取得します。
+
+    Args:
+        usernames (list): ユーザ ID のリスト
+        years (list): 年度のリスト
+
+    Returns:
+        dict: ユーザ ID と年度と休暇名称の tuple をキーにした申請回数の dict
+    """
+    results = {}
+    if not usernames or not years:
+        return results
+    begin = get_year_range(min(years))[0]
+    end = get_year_range(max(years))[1]
+    for record in TimeOffRequest.objects.filter(date__gte=begin, date__lt=end, username__in=usernames).annotate(
+        year=get_year_expression('date')
+    ).values('username', 'year', 'display_name').annotate(count=Count('id')).order_by():
+        if record['year'] in years:
+            results[(record['username'], record['year'], record['display_name'])] = record['count']
+    return results
+
+
+def get_time_off_matrix(years: list) -> tuple[list, list]:
+    """有効なユーザと休暇名称ごとの休暇申請の数を、指定した年度について 1 回の問い合わせで取得します。
+
+    Args:
+        years (list): 年度のリスト
+
+    Returns:
+        tuple[list, list]: 氏名と年度の順に並べた行のリストと休暇名称のリスト
+            (行は id, name, year, counts を持つ dict で、申請のないユーザと年度の組は含みません)
+    """
+    if not years:
+        return [], []
+    begin = get_year_range(min(years))[0]
+    end = get_year_range(max(years))[1]
+    users = User.objects.filter(is_superuser=False, is_active=True)
+    user = users.filter(username=OuterRef('username'))
+    records = TimeOffRequest.objects.filter(
+        date__gte=begin, date__lt=end, username__in=users.values('username')
+    ).annotate(
+        year=get_year_expression('date'),
+        last_name=Subquery(user.values('last_name')[:1]),
+        first_name=Subquery(user.values('first_name')[:1])
+    ).values('username', 'last_name', 'first_name', 'year', 'display_name').annotate(count=Count('id')).order_by()
+
+    # ユーザと年度ごとに集約
+    rows = {}
+    display_names = set()
+    for record in records:
+        if record['year'] not in years:
+            continue
+        key = (record['username'], record['year'])
+        if key not in rows:
+            rows[key] = {
+                'id': record['username'],
+                'name': display_name(User(
+                    username=record['username'],
+                    last_name=record['last_name'],
+                    first_name=record['first_name']
+                )),
+                'year': record['year'],
+                'counts': {},
+                'order': (record['last_name'], record['first_name'], record['username'], record['year'])
+            }
+        rows[key]['counts'][record['display_name']] = record['count']
+        display_names.add(record['display_name'])
+    entries = sorted(rows.values(), key=lambda row: row['order'])
+    for entry in entries:
+        del entry['order']
+    return entries, sorted(display_names)
+
+
+def build_record(calendar: dict, punch: dict, time_off_request: dict, calculate: bool = True) -> dict:
+    """営業日カレンダと打刻と休暇申請から 1 日分の打刻記録を生成します。
+
+    Args:
+        calendar (dict): 営業日カレンダ
+        punch (dict): 最初の出勤と最後の退勤 (打刻がない場合は None)
+        time_off_request (dict): 休暇申請情報 (申請がない場合は None)
+        calculate (bool): 勤務実績を計算する場合は True
+
+    Returns:
+        dict: 打刻記録 (calculate が True の場合は勤務実績を計算済)
+    """
+    record = dict(calendar)
+    record['begin_record'] = punch['begin_record'] if punch else None
+    record['end_record'] = punch['end_record'] if punch else None
+    apply_time_off_request(record, time_off_request)
+    if calculate:
+        record.update(worktime_calculation(record))
+        remove_schedule_minutes(record)
+    return record
+
+
+def remove_schedule_minutes(record: dict):
+    """計算に使用した勤務時間の分数を打刻記録から除去します。
+
+    Args:
+        record (dict): 打刻記録
+    """
+    for field in MINUTES_FIELDS:
+        record.pop(field, None)
+
+
+def apply_time_off_request(record: dict, time_off_request: dict):
+    """打刻記録に休暇申請を反映します。承認済の場合は勤務時間を休暇パターンで置き換えます。
+
+    Args:
+        record (dict): 打刻記録
+        time_off_request (dict): 休暇申請情報 (申請がない場合は None)
+    """
+    if not time_off_request:
+        return
+    time_off_accepted = time_off_request['accepted']
+    record.update({
+        'time_off_request_id': time_off_request['id'],
+        'time_off_accepted': time_off_accepted,
+        'holiday': '休暇 (' + time_off_request['display_name'] + ')' + ('' if time_off_accepted else ' (承認待ち)')
+    })
+    if time_off_accepted:
+        record.update({
+            'attendance': time_off_request['attendance'],
+            'begin': time_off_request['begin'],
+            'end': time_off_request['end'],
+            'leave': time_off_request['leave'],
+            'back': time_off_request['back']
+        })
+        for field in MINUTES_FIELDS:
+            if field in time_off_request:
+                record[field] = time_off_request[field]
+            else:
+                record.pop(field, None)
+
+
+def get_records_bulk(usernames: list, date_range: tuple[datetime.date, datetime.date], engine: str = 'python') -> dict:
+    """指定した複数ユーザと期間の打刻記録を取得します。承認済の休暇申請は勤務時間の計算に反映されます。
+
+    ユーザ数に関わらず、営業日カレンダ、打刻記録、休暇申請をそれぞれ 1 回の問い合わせで取得します。
+    勤務スケジュールを割り当てたユーザは、割当の索引から求めた個人の勤務時間で計算します。
+    多数のユーザや長い期間を計算する場合は engine に 'numpy' を指定すると一括評価で高速に計算します。
+
+    Args:
+        usernames (list): ユーザ ID のリスト
+        date_range (tuple[datetime.date, datetime.date]): 期間 (終了日は範囲に含まれません)
+        engine (str): 勤務実績の計算方法 ('python' または 'numpy')
+
+    Raises:
+        ValueError: 計算方法の不正
 
     Returns:
-        dict: 日付をキーにした休暇申請情報の dict
+        dict: ユーザ ID をキーにした打刻記録のリスト(日付順)の dict
     """
-    records = TimeOffRequest.objects.filter(date__year=year, date__month=month, username=username).values(
+    if engine not in ENGINES:
+        raise ValueError('Unknown engine: ' + str(engine))
+    begin, end = date_range
+
+    # 営業日カレンダ (勤務スケジュールを割り当てたユーザは個人の勤務時間を適用)
+    calendars = apply_schedules(usernames, get_calendars(date_range))
+
+    # ユーザと日付ごとの最初の出勤と最後の退勤
+    punches = {}
+    for punch in TimeRecord.objects.filter(date__gte=begin, date__lt=end, username__in=usernames).values('username', 'date').annotate(
+        begin_record=Min('time', filter=Q(action='begin')),
+        end_record=Max('time', filter=Q(action='end'))
+    ).order_by():
+        punches[(punch['username'], punch['date'])] = punch
+
+    # ユーザと日付ごとの休暇申請
+    time_off_requests = {}
+    for time_off_request in TimeOffRequest.objects.filter(date__gte=begin, date__lt=end, username__in=usernames).values(
         'id',
         'date',
+        'username',
         'display_name',
         'attendance',
         'begin',
         'end',
         'leave',
         'back',
-        'accepted'
-    )
+        'accepted',
+        *MINUTES_FIELDS
+    ):
+        time_off_requests[(time_off_request['username'], time_off_request['date'])] = time_off_request
+
+    # ユーザごとに打刻記録を生成
     results = {}
-    for record in records:
-        results[record['date']] = record
+    for username in usernames:
+        records = []
+        for calendar in calendars[username]:
+            key = (username, calendar['date'])
+            records.append(build_record(
+                calendar,
+                punches.get(key),
+                time_off_requests.get(key),
+                engine == 'python'
+            ))
+        results[username] = records
+
+    # 勤務実績を一括で計算
+    if engine == 'numpy':
+        calculate_records([record for records in results.values() for record in records])
+        for records in results.values():
+            for record in records:
+                remove_schedule_minutes(record)
     return results
 
 
+def get_monthly_records_bulk(usernames: list, year: int, month: int, engine: str = 'python') -> dict:
+    """指定した複数ユーザと年月の打刻記録を取得します。
+
+    Args:
+        usernames (list): ユーザ ID のリスト
+        year (int): 西暦年
+        month (int): 月
+        engine (str): 勤務実績の計算方法 ('python' または 'numpy')
+
+    Returns:
+        dict: ユーザ ID をキーにした打刻記録のリスト(日付順)の dict
+    """
+    return get_records_bulk(usernames, get_month_range(year, month), engine)
+
+
 def get_monthly_records(username: str, year: int, month: int) -> list:
     """指定したユーザと年月の打刻記録を取得します。承認済の休暇申請は勤務時間の計算に反映されます。
 
@@ -65,42 +288,26 @@ def get_monthly_records(username: str, year: int, month: int) -> list:
     Returns:
         list: 打刻記録のリスト(日付順)
     """
-    subquery = TimeRecord.objects.filter(date=OuterRef('date'), username=username).values('date').annotate(
-        begin_record=Min('time', filter=Q(action='begin')),
-        end_record=Max('time', filter=Q(action='end'))
-    )
-    queryset_records = BusinessCalendar.objects.filter(date__year=year, date__month=month).order_by('date').annotate(
-        begin_record=Subquery(subquery.values('begin_record')),
-        end_record=Subquery(subquery.values('end_record')),
-    ).values(
-        'date',
-        'holiday',
-        'attendance',
-        'begin',
-        'end',
-        'leave',
-        'back',
-        'begin_record',
-        'end_record',
-    )
-    records = list(queryset_records.values())
-    time_off_requests = get_monthly_time_off_requests(username, year, month)
-    for record in records:
-        time_off_request = time_off_requests.get(record['date'])
-        if time_off_request:
-            time_off_accepted = time_off_request['accepted']
-            record.update({
-                'time_off_request_id': time_off_request['id'],
-                'time_off_accepted': time_off_accepted,
-                'holiday': '休暇 (' + time_off_request['display_name'] + ')' + ('' if time_off_accepted else ' (承認待ち)')
-            })
-            if time_off_accepted:
-                record.update({
-                    'attendance': time_off_request['attendance'],
-                    'begin': time_off_request['begin'],
-                    'end': time_off_request['end'],
-                    'leave': time_off_request['leave'],
-                    'back': time_off_request['back']
-                })
-        record.update(worktime_calculation(record))
-    return records
+    return get_monthly_records_bulk([username], year, month)[username]
+
+
+def get_monthly_summaries(usernames: list, year: int, month: int, engine: str = 'python') -> dict:
+    """指定した複数ユーザの年月の勤務実績の集計を取得します。
+
+    engine に 'sql' を指定すると、勤務実績の計算と集計をデータベースで行い、1 回の問い合わせで取得します。
+
+    Args:
+        usernames (list): ユーザ ID のリスト
+        year (int): 西暦年
+        month (int): 月
+        engine (str): 勤務実績の計算方法 ('python'、'numpy' または 'sql')
+
+    Returns:
+        dict: ユーザ ID をキーにした集計結果の dict
+    """
+    if engine == 'sql':
+        return sql_rules.get_monthly_summaries(usernames, year, month)
+    results = {}
+    for username, records in get_monthly_records_bulk(usernames, year, month, engine).items():
+        results[username] = summarize(records)
+    return results
@@ -0,0 +1,247 @@
+"""
+営業日カレンダ、勤務パターン、休暇パターン、勤務場所、勤務スケジュールの参照データをキャッシュから取得する処理です。
+
+参照データはテーブルごとのバージョンでキャッシュされ、データの変更時にシグナル処理でバージョンが更新されます。
+シグナルが発生しない一括更新を行った場合は invalidate_reference_data を呼び出してください。
+
+VIRTUAL_CALENDAR が True の場合、営業日カレンダのない日は勤務パターンと祝日から求めます。
+営業日カレンダのテーブルには勤務パターンと異なる日だけを登録すれば足り、create_calendar による事前の作成は不要です。
+"""
+import datetime
+
+from django.db.models import Min
+
+import timecard.settings
+from worktime import caches
+from worktime.geo import WORK_SITE
+from worktime.models import (BusinessCalendar, Holiday, ScheduleAssignment,
+                             StandardWorkPattern, TimeOffPattern,
+                             TimeOffRequest, TimeRecord, WorkSchedule,
+                             WorkSchedulePattern, WorkSite)
+from worktime.rules import MINUTES_FIELDS, get_schedule_minutes
+from worktime.utils import get_month_range
+
+# 参照データのキャッシュの名前
+BUSINESS_CALENDAR = 'business_calendar'
+STANDARD_WORK_PATTERN = 'standard_work_pattern'
+TIME_OFF_PATTERN = 'time_off_pattern'
+WORK_SCHEDULE = 'work_schedule'
+
+# モデルとキャッシュの名前の対応
+CACHE_NAMES = {
+    BusinessCalendar: BUSINESS_CALENDAR,
+    Holiday: BUSINESS_CALENDAR,
+    StandardWorkPattern: STANDARD_WORK_PATTERN,
+    TimeOffPattern: TIME_OFF_PATTERN,
+    WorkSite: WORK_SITE,
+    WorkSchedule: WORK_SCHEDULE,
+    WorkSchedulePattern: WORK_SCHEDULE,
+    ScheduleAssignment: WORK_SCHEDULE,
+}
+
+# キャッシュする営業日カレンダの項目
+CALENDAR_FIELDS = ['date', 'attendance', 'holiday', 'begin', 'end', 'leave', 'back', *MINUTES_FIELDS]
+
+
+def is_virtual_calendar() -> bool:
+    """営業日カレンダのない日を勤務パターンと祝日から求めるか判定します。
+
+    Returns:
+        bool: 求める場合は True
+    """
+    return bool(getattr(timecard.settings, 'VIRTUAL_CALENDAR', False))
+
+
+def get_first_calendar_date() -> datetime.date:
+    """勤務実績を計算する期間の最初の日付を取得します。
+
+    営業日カレンダの最初の日とし、VIRTUAL_CALENDAR が True の場合は最初の打刻記録と休暇申請の日も含めます。
+
+    Returns:
+        datetime.date: 最初の日付 (対象のデータがない場合は None)
+    """
+    models = [BusinessCalendar]
+    if is_virtual_calendar():
+        models += [TimeRecord, TimeOffRequest]
+    dates = [model.objects.aggregate(min_date=Min('date'))['min_date'] for model in models]
+    dates = [date for date in dates if date is not None]
+    return min(dates) if dates else None
+
+
+def invalidate_reference_data(model):
+    """参照データのキャッシュを無効にします。
+
+    Args:
+        model: 変更されたモデルのクラス
+    """
+    caches.invalidate(CACHE_NAMES[model])
+
+    # 勤務パターンから求めた営業日カレンダも無効にする
+    if model is StandardWorkPattern and is_virtual_calendar():
+        caches.invalidate(BUSINESS_CALENDAR)
+
+
+def get_holidays(begin: datetime.date, end: datetime.date) -> dict:
+    """指定期間の祝日を取得します。
+
+    Args:
+        begin (datetime.date): 開始日
+        end (datetime.date): 終了日 (範囲に含まれません)
+
+    Returns:
+        dict: 日付と名称の dict
+    """
+    return dict(Holiday.objects.filter(date__gte=begin, date__lt=end).values_list('date', 'name'))
+
+
+def get_pattern_values(pattern) -> dict:
+    """勤務パターンから 1 日分の営業日カレンダの値 (日付を除く) を求めます。
+
+    Args:
+        pattern: 勤務パターン (StandardWorkPattern または WorkSchedulePattern)
+
+    Returns:
+        dict: 日付を除く CALENDAR_FIELDS をキーにした dict
+    """
+    return {
+        'attendance': pattern.attendance,
+        'holiday': '' if pattern.attendance else '定休日',
+        'begin': pattern.begin,
+        'end': pattern.end,
+        'leave': pattern.leave,
+        'back': pattern.back,
+        **get_schedule_minutes(pattern.begin, pattern.end, pattern.leave, pattern.back),
+    }
+
+
+def derive_calendar_values(date_range: tuple[datetime.date, datetime.date]) -> list:
+    """指定期間の営業日カレンダの値を勤務パターンと祝日から求めます。
+
+    Args:
+        date_range (tuple[datetime.date, datetime.date]): 期間 (終了日は範囲に含まれません)
+
+    Returns:
+        list: CALENDAR_FIELDS をキーにした dict のリスト (日付順、勤務パターンが未設定の場合は空のリスト)
+    """
+    patterns = get_standard_work_patterns()
+    if any(day not in patterns for day in range(8)):
+        return []
+
+    # 曜日 (祝日は 7) ごとの値
+    templates = {day: get_pattern_values(pattern) for day, pattern in patterns.items()}
+
+    begin, end = date_range
+    holidays = get_holidays(begin, end)
+    results = []
+    date = begin
+    while date < end:
+        national_holiday = holidays.get(date)
+        if national_holiday:
+            values = dict(templates[7], date=date, holiday='休日 (' + national_holiday + ')')
+        else:
+            values = dict(templates[date.weekday()], date=date)
+        results.append(values)
+        date += datetime.timedelta(days=1)
+    return results
+
+
+def derive_calendars(date_range: tuple[datetime.date, datetime.date]) -> list:
+    """指定期間の営業日カレンダを勤務パターンと祝日から求めます。
+
+    Args:
+        date_range (tuple[datetime.date, datetime.date]): 期間 (終了日は範囲に含まれません)
+
+    Returns:
+        list: 保存前の営業日カレンダのリスト (日付順、勤務パターンが未設定の場合は空のリスト)
+    """
+    return [BusinessCalendar(**values) for values in derive_calendar_values(date_range)]
+
+
+def month_key(year: int, month: int) -> str:
+    """月のキャッシュキーを取得します。
+
+    Args:
+        year (int): 西暦年
+        month (int): 月
+
+    Returns:
+        str: YYYY-MM 形式の文字列
+    """
+    return '{:04d}-{:02d}'.format(year, month)
+
+
+def build_calendar_months(keys: list) -> dict:
+    """指定した月の営業日カレンダを 1 回の問い合わせで取得します。
+
+    VIRTUAL_CALENDAR が True の場合、登録されていない日は勤務パターンと祝日から求めます。
+
+    Args:
+        keys (list): YYYY-MM 形式の月のリスト
+
+    Returns:
+        dict: 月と営業日カレンダのリスト(日付順)の dict
+    """
+    months = sorted(keys)
+    begin = get_month_range(*map(int, months[0].split('-')))[0]
+    end = get_month_range(*map(int, months[-1].split('-')))[1]
+    calendars = {
+        calendar['date']: calendar
+        for calendar in BusinessCalendar.objects.filter(date__gte=begin, date__lt=end).values(*CALENDAR_FIELDS)
+    }
+    if is_virtual_calendar():
+        for values in derive_calendar_values((begin, end)):
+            calendars.setdefault(values['date'], values)
+    results = {key: [] for key in keys}
+    for date in sorted(calendars):
+        key = month_key(date.year, date.month)
+        if key in results:
+            results[key].append(calendars[date])
+    return results
+
+
+def get_calendars(date_range: tuple[datetime.date, datetime.date]) -> list:
+    """指定期間の営業日カレンダを取得します。
+
+    Args:
+        date_range (tuple[datetime.date, datetime.date]): 期間 (終了日は範囲に含まれません)
+
+    Returns:
+        list: 営業日カレンダのリスト(日付順、各要素は変更しないでください)
+    """
+    begin, end = date_range
+    if end <= begin:
+        return []
+    last = end - datetime.timedelta(days=1)
+    keys = [
+        month_key(months // 12, months % 12 + 1)
+        for months in range(begin.year * 12 + begin.month - 1, last.year * 12 + last.month)
+    ]
+    months = caches.get_values(BUSINESS_CALENDAR, keys, build_calendar_months)
+    results = []
+    for key in keys:
+        for calendar in months[key]:
+            if begin <= calendar['date'] < end:
+                results.append(calendar)
+    return results
+
+
+def get_standard_work_patterns() -> dict:
+    """勤務パターンを取得します。
+
+    Returns:
+        dict: 曜日 (祝日は 7) と勤務パターンの dict
+    """
+    return caches.get_value(
+        STANDARD_WORK_PATTERN, lambda: {obj.id: obj for obj in StandardWorkPattern.objects.order_by('id')}
+    )
+
+
+def get_time_off_patterns() -> dict:
+    """休暇パターンを取得します。
+
+    Returns:
+        dict: ID と休暇パターンの dict (ID 順)
+    """
+    return caches.get_value(
+        TIME_OFF_PATTERN, lambda: {obj.id: obj for obj in TimeOffPattern.objects.order_by('id')}
+    )
@@ -4,12 +4,67 @@
 import datetime
 from decimal import ROUND_CEILING, ROUND_FLOOR
 
-from worktime.utils import delta, minutes_to_hours
+from worktime.utils import minutes_to_hours, time_to_minutes
+
+# 勤務時間を分数で保持する項目
+MINUTES_FIELDS = [
+    'begin_minutes',
+    'end_minutes',
+    'leave_minutes',
+    'back_minutes',
+    'standard_minutes',
+]
+
+# 集計結果の項目 (分単位)
+SUMMARY_FIELDS = [
+    'days',
+    'attendance_days',
+    'work_days',
+    'behind_minutes',
+    'behind_count',
+    'early_minutes',
+    'early_count',
+    'overtime_minutes',
+    'overtime_count',
+    'time_off_count',
+    'time_off_not_yet_accepted_count',
+    'errors',
+]
+
+
+def get_schedule_minutes(begin: datetime.time, end: datetime.time, leave: datetime.time, back: datetime.time) -> dict:
+    """勤務時間を 0 時からの分数と標準勤務時間 (分) に変換します。
+
+    Args:
+        begin (datetime.time): 勤務開始
+        end (datetime.time): 勤務終了
+        leave (datetime.time): 休憩開始
+        back (datetime.time): 休憩終了
+
+    Returns:
+        dict: MINUTES_FIELDS をキーにした dict (勤務時間がない場合の標準勤務時間は None)
+    """
+    result = {
+        'begin_minutes': time_to_minutes(begin),
+        'end_minutes': time_to_minutes(end),
+        'leave_minutes': time_to_minutes(leave),
+        'back_minutes': time_to_minutes(back),
+        'standard_minutes': None
+    }
+    if result['begin_minutes'] is not None and result['end_minutes'] is not None:
+        if result['leave_minutes'] is not None and result['back_minutes'] is not None:
+            result['standard_minutes'] = (result['leave_minutes'] - result['begin_minutes']) + \
+                (result['end_minutes'] - result['back_minutes'])
+        else:
+            result['standard_minutes'] = result['end_minutes'] - result['begin_minutes']
+    return result
 
 
 def worktime_calculation(obj) -> dict:
     """勤務時間ルールと打刻時間から勤務実績を計算します。
 
+    勤務時間は MINUTES_FIELDS の値があればそれを使用し、なければ時刻から計算します。
+
     Args:
         obj: 打刻記録オブジェクト
 
@@ -78,47 +133,49 @@ def worktime_calculation(obj) -> dict:
         result['error'] = e.args[0]
         return result
 
+    # 打刻時刻 (分)
+    begin_record = obj['begin_record'].hour * 60 + obj['begin_record'].minute
+    end_record = obj['end_record'].hour * 60 + obj['end_record'].minute
+
     # 非営業日の場合はすべて時間外として計算
     if not obj['attendance']:
-        result['overtime'] = delta(obj['begin_record'], obj['end_record'])
+        result['overtime'] = end_record - begin_record
         return result
 
-    # 標準勤務時間と実働時間の算出
-    if obj['leave'] is not None and obj['back'] is not None:
-        section1_total = delta(obj['begin'], obj['leave'])
-        section1_record = max(0, delta(
-            max(obj['begin'], obj['begin_record']),
-            min(obj['end_record'], obj['leave'])
-        ))
-        section2_total = delta(obj['back'], obj['end'])
-        section2_record = max(0, delta(
-            max(obj['back'], obj['begin_record']),
-            min(obj['end_record'], obj['end'])
-        ))
+    # 勤務時間 (分) は保存済の値を優先して使用
+    schedule = obj if obj.get('standard_minutes') is not None else get_schedule_minutes(
+        obj['begin'], obj['end'], obj['leave'], obj['back']
+    )
+    begin = schedule['begin_minutes']
+    end = schedule['end_minutes']
+    leave = schedule['leave_minutes']
+    back = schedule['back_minutes']
+
+    # 実働時間の算出 (組み込み関数の呼び出しを避けるため条件式で最大値と最小値を求める)
+    if leave is not None and back is not None:
+        section1_record = (end_record if end_record < leave else leave) - \
+            (begin_record if begin < begin_record else begin)
+        section2_record = (end_record if end_record < end else end) - \
+            (begin_record if back < begin_record else back)
+        if section2_record < 0:
+            section2_record = 0
     else:
-        section1_total = delta(obj['begin'], obj['end'])
-        section1_record = max(0, delta(
-            max(obj['begin'], obj['begin_record']),
-            min(obj['end_record'], obj['end'])
-        ))
-        section2_total = 0
+        section1_record = (end_record if end_record < end else end) - \
+            (begin_record if begin < begin_record else begin)
         section2_record = 0
+    if section1_record < 0:
+        section1_record = 0
 
     # 不足時間の算出
-    result['behind'] = (section1_total - section1_record) + \
-        (section2_total - section2_record)
+    result['behind'] = schedule['standard_minutes'] - section1_record - section2_record
 
     # 早出時間の算出
-    result['early'] = max(0, delta(
-        obj['begin_record'],
-        min(obj['end_record'], obj['begin'])
-    ))
+    early = (end_record if end_record < begin else begin) - begin_record
+    result['early'] = early if 0 < early else 0
 
     # 残業時間の算出
-    result['overtime'] = max(0, delta(
-        max(obj['end'], obj['begin_record']),
-        obj['end_record']
-    ))
+    overtime = end_record - (begin_record if end < begin_record else end)
+    result['overtime'] = overtime if 0 < overtime else 0
 
     # 結果返却
     return result
@@ -173,6 +230,18 @@ def summarize(objects) -> dict:
                 result['time_off_not_yet_accepted_count'] += 1
 
     # 時間単位の算出
+    return summarize_hours(result)
+
+
+def summarize_hours(result: dict) -> dict:
+    """集計結果に時間単位の値を追加します。
+
+    Args:
+        result: 分単位の集計結果の dict
+
+    Returns:
+        dict: 時間単位の値を追加した集計結果の dict
+    """
     result['behind_hours'] = minutes_to_hours(
         result['behind_minutes'],
         '0.1',
@@ -188,6 +257,4 @@ def summarize(objects) -> dict:
         '0.1',
         ROUND_CEILING
     )
-
-    # 結果返却
     return result
@@ -0,0 +1,186 @@
+"""
+個人別の勤務スケジュールを解決する処理です。
+
+勤務スケジュールは曜日 (祝日は 7) ごとの勤務パターンの組で、ScheduleAssignment で適用期間を指定してユーザに割り当てます。
+割当はユーザごとに適用開始日の順に並べた区間の索引 (ScheduleIndex) に読み込み、参照データとしてキャッシュします。
+ユーザと日付に対応する勤務スケジュールは索引の二分探索で求めるため、日ごとの問い合わせは発生しません。
+
+割当のある日は、営業日カレンダの代わりに勤務スケジュールの勤務パターンを適用します。
+営業日カレンダでは休業日で、全社の勤務パターンではその曜日が営業日の日 (祝日や会社の休業日) は祝日 (7) の勤務パターンを、
+それ以外の日は曜日の勤務パターンを適用します。勤務スケジュールに該当する勤務パターンがない日は営業日カレンダに従います。
+"""
+import bisect
+import datetime
+
+from worktime import caches
+from worktime.models import ScheduleAssignment, WorkSchedulePattern
+from worktime.reference import (WORK_SCHEDULE, get_pattern_values,
+                                get_standard_work_patterns)
+
+# 祝日の勤務パターンの曜日
+HOLIDAY = 7
+
+
+class ScheduleIndex:
+    """ユーザごとの勤務スケジュールの割当を適用開始日の順に保持する区間の索引です。
+
+    Args:
+        assignments (list): ユーザ ID、適用開始日、適用終了日 (期限なしは None)、勤務スケジュール ID のタプルのリスト
+        patterns (dict): 勤務スケジュール ID と、曜日 (祝日は 7) と営業日カレンダの値の dict の dict
+    """
+
+    def __init__(self, assignments: list, patterns: dict):
+        self.patterns = patterns
+        self.starts = {}
+        self.intervals = {}
+        for username, valid_from, valid_to, schedule_id in sorted(assignments, key=lambda row: (row[0], row[1])):
+            self.starts.setdefault(username, []).append(valid_from)
+            self.intervals.setdefault(username, []).append((valid_from, valid_to, schedule_id))
+
+    def lookup(self, username: str, date: datetime.date) -> int:
+        """ユーザと日付に割り当てた勤務スケジュールを取得します。
+
+        Args:
+            username (str): ユーザ ID
+            date (datetime.date): 日付
+
+        Returns:
+            int: 勤務スケジュール ID (割当がない場合は None)
+        """
+        starts = self.starts.get(username)
+        if not starts:
+            return None
+        position = bisect.bisect_right(starts, date) - 1
+        if position < 0:
+            return None
+        valid_to, schedule_id = self.intervals[username][position][1:]
+        if valid_to is not None and valid_to < date:
+            return None
+        return schedule_id
+
+    def find(self, username: str, date_range: tuple[datetime.date, datetime.date]) -> list:
+        """指定期間に重なる割当を取得します。
+
+        Args:
+            username (str): ユーザ ID
+            date_range (tuple[datetime.date, datetime.date]): 期間 (終了日は範囲に含まれません)
+
+        Returns:
+            list: 期間内に切り詰めた開始日、終了日 (範囲に含まれません)、勤務スケジュール ID のタプルのリスト (日付順)
+        """
+        starts = self.starts.get(username)
+        if not starts:
+            return []
+        begin, end = date_range
+        results = []
+        for valid_from, valid_to, schedule_id in self.intervals[username][max(bisect.bisect_right(starts, begin) - 1, 0):]:
+            if end <= valid_from:
+                break
+            start = max(begin, valid_from)
+            stop = end if valid_to is None else min(end, valid_to + datetime.timedelta(days=1))
+            if start < stop:
+                results.append((start, stop, schedule_id))
+        return results
+
+
+def build_schedule_index() -> ScheduleIndex:
+    """すべての割当と勤務スケジュールの勤務パターンから索引を作成します。
+
+    Returns:
+        ScheduleIndex: 索引
+    """
+    patterns = {}
+    for pattern in WorkSchedulePattern.objects.order_by('schedule_id', 'day'):
+        patterns.setdefault(pattern.schedule_id, {})[pattern.day] = get_pattern_values(pattern)
+    assignments = ScheduleAssignment.objects.values_list('username', 'valid_from', 'valid_to', 'schedule_id')
+    return ScheduleIndex(list(assignments), patterns)
+
+
+def get_schedule_index() -> ScheduleIndex:
+    """勤務スケジュールの割当の索引をキャッシュから取得します。
+
+    Returns:
+        ScheduleIndex: 索引 (変更しないでください)
+    """
+    return caches.get_value(WORK_SCHEDULE, build_schedule_index)
+
+
+def get_pattern_days(calendars: list) -> list:
+    """営業日カレンダの各日に適用する勤務パターンの曜日を求めます。
+
+    Args:
+        calendars (list): 営業日カレンダのリスト
+
+    Returns:
+        list: 曜日 (祝日は 7) のリスト
+    """
+    standard_patterns = get_standard_work_patterns()
+    days = []
+    for calendar in calendars:
+        weekday = calendar['date'].weekday()
+        pattern = standard_patterns.get(weekday)
+        if not calendar['attendance'] and (pattern is None or pattern.attendance):
+            days.append(HOLIDAY)
+        else:
+            days.append(weekday)
+    return days
+
+
+def apply_pattern(calendar: dict, values: dict, day: int) -> dict:
+    """営業日カレンダに勤務スケジュールの勤務パターンを適用します。
+
+    Args:
+        calendar (dict): 営業日カレンダ
+        values (dict): 勤務パターンの値 (勤務パターンがない場合は None)
+        day (int): 曜日 (祝日は 7)
+
+    Returns:
+        dict: 適用した営業日カレンダ (勤務パターンがない場合は calendar)
+    """
+    if values is None:
+        return calendar
+    result = dict(calendar, **values)
+    if day == HOLIDAY and not values['attendance']:
+        # 休業理由は営業日カレンダの祝日名などを引き継ぐ
+        result['holiday'] = calendar['holiday']
+    return result
+
+
+def apply_schedules(usernames: list, calendars: list, index: ScheduleIndex = None) -> dict:
+    """ユーザごとの営業日カレンダに勤務スケジュールを適用します。
+
+    同じ勤務スケジュールを適用した日は、ユーザ間で同じ dict を共有します。
+
+    Args:
+        usernames (list): ユーザ ID のリスト
+        calendars (list): 営業日カレンダのリスト (日付順)
+        index (ScheduleIndex): 索引 (省略時はキャッシュから取得)
+
+    Returns:
+        dict: ユーザ ID と営業日カレンダのリストの dict (割当のないユーザは calendars をそのまま使用します)
+    """
+    results = dict.fromkeys(usernames, calendars)
+    if index is None:
+        index = get_schedule_index()
+    if not calendars or not index.intervals:
+        return results
+    dates = [calendar['date'] for calendar in calendars]
+    date_range = (dates[0], dates[-1] + datetime.timedelta(days=1))
+    days = None
+    applied = {}
+    for username in usernames:
+        intervals = index.find(username, date_range)
+        if not intervals:
+            continue
+        if days is None:
+            days = get_pattern_days(calendars)
+        user_calendars = list(calendars)
+        for start, stop, schedule_id in intervals:
+            patterns = index.patterns.get(schedule_id, {})
+            for position in range(bisect.bisect_left(dates, start), bisect.bisect_left(dates, stop)):
+                key = (schedule_id, position)
+                if key not in applied:
+                    applied[key] = apply_pattern(calendars[position], patterns.get(days[position]), days[position])
+                user_calendars[position] = applied[key]
+        results[username] = user_calendars
+    return results
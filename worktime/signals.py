@@ -0,0 +1,273 @@
+"""
+モデルの変更を集計データとキャッシュに反映するシグナル処理です。
+"""
+import datetime
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from worktime.materialized import refresh_daily_worktimes
+from worktime.models import (BusinessCalendar, DailyWorktime, Holiday,
+                             MonthlySummary, ScheduleAssignment,
+                             StandardWorkPattern, TimeOffPattern,
+                             TimeOffRequest, TimeRecord, WorkSchedule,
+                             WorkSchedulePattern, WorkSite)
+from worktime.reference import invalidate_reference_data, is_virtual_calendar
+from worktime.utils import get_month_range, invalidate_user_directory
+
+
+def notify_worktime_changed(usernames: list, dates: list):
+    """勤務実績の計算に使用するデータが変更されたことを通知します。
+
+    トランザクションの確定後に、影響を受ける日次勤務実績だけを再計算し、該当月の月次勤務集計を破棄します。
+    シグナルが発生しない一括更新を行った場合は、この関数を直接呼び出してください。
+
+    Args:
+        usernames (list): ユーザ ID のリスト (全ユーザが対象の場合は None)
+        dates (list): 変更された日付のリスト
+    """
+    dates = sorted(set(dates))
+
+    def refresh():
+        # 月次勤務集計を破棄
+        for year, month in sorted(set((date.year, date.month) for date in dates)):
+            summaries = MonthlySummary.objects.filter(year=year, month=month)
+            if usernames is not None:
+                summaries = summaries.filter(username__in=usernames)
+            summaries.delete()
+
+        # 日次勤務実績を再計算
+        for date in dates:
+            targets = usernames
+            if targets is None:
+                begin, end = get_month_range(date.year, date.month)
+                targets = list(DailyWorktime.objects.filter(
+                    date__gte=begin, date__lt=end
+                ).values_list('username', flat=True).distinct())
+            if targets:
+                refresh_daily_worktimes(
+                    targets, (date, date + datetime.timedelta(days=1))
+                )
+
+    transaction.on_commit(refresh)
+
+
+def discard_worktimes(usernames: list, begin: datetime.date):
+    """指定したユーザの指定日以降の日次勤務実績と月次勤務集計を破棄します。
+
+    勤務スケジュールの割当のように、影響する期間の終わりが定まらない変更に使用します。
+    破棄した日次勤務実績と月次勤務集計は参照時に再計算されます。
+
+    Args:
+        usernames (list): ユーザ ID のリスト (全ユーザが対象の場合は None)
+        begin (datetime.date): 変更の影響を受ける最初の日付 (全期間が対象の場合は None)
+    """
+    def discard():
+        worktimes = DailyWorktime.objects.all()
+        summaries = MonthlySummary.objects.all()
+        if usernames is not None:
+            worktimes = worktimes.filter(username__in=usernames)
+            summaries = summaries.filter(username__in=usernames)
+        if begin is not None:
+            worktimes = worktimes.filter(date__gte=begin)
+            summaries = summaries.filter(Q(year__gt=begin.year) | Q(year=begin.year, month__gte=begin.month))
+        worktimes.delete()
+        summaries.delete()
+
+    transaction.on_commit(discard)
+
+
+def notify_user_date_changed(instance):
+    """ユーザと日付を持つオブジェクトの変更を、変更前と変更後のユーザと日付に通知します。
+
+    Args:
+        instance: 変更されたオブジェクト
+    """
+    keys = {(instance.username, instance.date)}
+    previous = getattr(instance, 'previous', None)
+    if previous is not None:
+        keys.add((previous['username'], previous['date']))
+    for username in sorted(set(username for username, _ in keys)):
+        notify_worktime_changed([username], [date for user, date in keys if user == username])
+
+
+@receiver(pre_save, sender=TimeRecord)
+@receiver(pre_save, sender=TimeOffRequest)
+def user_date_saving(sender, instance, **kwargs):
+    """変更前の打刻記録または休暇申請のユーザと日付を記録します。
+
+    Args:
+        sender: 送信元のモデル
+        instance: 保存するオブジェクト
+    """
+    instance.previous = None
+    if instance.pk is not None:
+        instance.previous = sender.objects.filter(pk=instance.pk).values('username', 'date').first()
+
+
+@receiver(post_save, sender=TimeRecord)
+@receiver(post_delete, sender=TimeRecord)
+def time_record_changed(sender, instance, **kwargs):
+    """打刻記録の変更を通知します。
+
+    Args:
+        sender: 送信元のモデル
+        instance: 変更されたオブジェクト
+    """
+    notify_user_date_changed(instance)
+
+
+@receiver(post_save, sender=TimeOffRequest)
+@receiver(post_delete, sender=TimeOffRequest)
+def time_off_request_changed(sender, instance, **kwargs):
+    """休暇申請の変更を通知します。
+
+    Args:
+        sender: 送信元のモデル
+        instance: 変更されたオブジェクト
+    """
+    notify_user_date_changed(instance)
+
+
+@receiver(post_save, sender=BusinessCalendar)
+@receiver(post_delete, sender=BusinessCalendar)
+def business_calendar_changed(sender, instance, **kwargs):
+    """営業日カレンダの変更を通知します。
+
+    Args:
+        sender: 送信元のモデル
+        instance: 変更されたオブジェクト
+    """
+    notify_worktime_changed(None, [instance.date])
+
+
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def holiday_changed(sender, instance, **kwargs):
+    """勤務パターンと祝日から求める営業日カレンダの変更を通知します。
+
+    Args:
+        sender: 送信元のモデル
+        instance: 変更されたオブジェクト
+    """
+    if is_virtual_calendar():
+        notify_worktime_changed(None, [instance.date])
+
+
+@receiver(post_save, sender=StandardWorkPattern)
+@receiver(post_delete, sender=StandardWorkPattern)
+def standard_work_pattern_changed(sender, instance, **kwargs):
+    """勤務パターンの変更を通知します。
+
+    勤務パターンから求めた営業日カレンダと、勤務スケジュールの祝日の判定は勤務パターンに依存するため、
+    影響を受ける日次勤務実績と月次勤務集計を破棄します。
+
+    Args:
+        sender: 送信元のモデル
+        instance: 変更されたオブジェクト
+    """
+    if is_virtual_calendar():
+        discard_worktimes(None, None)
+        return
+    assignments = list(ScheduleAssignment.objects.values_list('username', 'valid_from'))
+    if assignments:
+        discard_worktimes(
+            sorted(set(username for username, _ in assignments)),
+            min(valid_from for _, valid_from in assignments)
+        )
+
+
+@receiver(pre_save, sender=ScheduleAssignment)
+def schedule_assignment_saving(sender, instance, **kwargs):
+    """変更前の割当のユーザと適用開始日を記録します。
+
+    Args:
+        sender: 送信元のモデル
+        instance: 保存するオブジェクト
+    """
+    instance.previous = None
+    if instance.pk is not None:
+        instance.previous = sender.objects.filter(pk=instance.pk).values('username', 'valid_from').first()
+
+
+@receiver(post_save, sender=ScheduleAssignment)
+@receiver(post_delete, sender=ScheduleAssignment)
+def schedule_assignment_changed(sender, instance, **kwargs):
+    """勤務スケジュールの割当の変更を通知します。
+
+    Args:
+        sender: 送信元のモデル
+        instance: 変更されたオブジェクト
+    """
+    usernames = {instance.username}
+    begin = instance.valid_from
+    previous = getattr(instance, 'previous', None)
+    if previous is not None:
+        usernames.add(previous['username'])
+        begin = min(begin, previous['valid_from'])
+    discard_worktimes(sorted(usernames), begin)
+
+
+@receiver(post_save, sender=WorkSchedulePattern)
+@receiver(post_delete, sender=WorkSchedulePattern)
+def work_schedule_pattern_changed(sender, instance, **kwargs):
+    """勤務スケジュールの勤務パターンの変更を、割り当てたユーザに通知します。
+
+    Args:
+        sender: 送信元のモデル
+        instance: 変更されたオブジェクト
+    """
+    assignments = list(ScheduleAssignment.objects.filter(
+        schedule_id=instance.schedule_id
+    ).values_list('username', 'valid_from'))
+    if assignments:
+        discard_worktimes(
+            sorted(set(username for username, _ in assignments)),
+            min(valid_from for _, valid_from in assignments)
+        )
+
+
+@receiver(post_save, sender=BusinessCalendar)
+@receiver(post_delete, sender=BusinessCalendar)
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+@receiver(post_save, sender=StandardWorkPattern)
+@receiver(post_delete, sender=StandardWorkPattern)
+@receiver(post_save, sender=TimeOffPattern)
+@receiver(post_delete, sender=TimeOffPattern)
+@receiver(post_save, sender=WorkSite)
+@receiver(post_delete, sender=WorkSite)
+@receiver(post_save, sender=WorkSchedule)
+@receiver(post_delete, sender=WorkSchedule)
+@receiver(post_save, sender=WorkSchedulePattern)
+@receiver(post_delete, sender=WorkSchedulePattern)
+@receiver(post_save, sender=ScheduleAssignment)
+@receiver(post_delete, sender=ScheduleAssignment)
+def reference_data_changed(sender, instance, **kwargs):
+    """参照データのキャッシュを無効にします。
+
+    Args:
+        sender: 送信元のモデル
+        instance: 変更されたオブジェクト
+    """
+    invalidate_reference_data(sender)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    """ユーザ一覧のキャッシュを無効にします。
+
+    ログイン時の最終ログイン日時の更新はユーザ一覧に影響しないため無視します。
+
+    Args:
+        sender: 送信元のモデル
+        instance: 変更されたオブジェクト
+        update_fields: 更新された項目
+    """
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    invalidate_user_directory()
@@ -0,0 +1,326 @@
+"""
+勤務時間計算の規則と集計を SQL の式で評価するモジュールです。
+
+worktime.rules.worktime_calculation と summarize を SQLite または PostgreSQL の問い合わせとして実行し、
+日ごとの打刻記録を Python に読み込まずに勤務実績を集計します。
+勤務時間は営業日カレンダと休暇申請に保存済の分数 (MINUTES_FIELDS) を使用します。
+VIRTUAL_CALENDAR が True の場合、営業日カレンダは worktime.reference.get_calendars で求めた値を問い合わせに埋め込みます。
+勤務スケジュールの割当は、割当と勤務スケジュールの勤務パターンのテーブルを結合して
+worktime.schedules と同じ規則で適用します。
+"""
+import datetime
+
+from django.db import NotSupportedError, connection
+
+from worktime.models import (BusinessCalendar, ScheduleAssignment,
+                             StandardWorkPattern, TimeOffRequest, TimeRecord,
+                             WorkSchedulePattern)
+from worktime.reference import get_calendars, is_virtual_calendar
+from worktime.rules import MINUTES_FIELDS, SUMMARY_FIELDS, summarize_hours
+from worktime.utils import get_month_range
+from worktime.vectorized import ERROR_MESSAGES
+
+# SQL で評価できるデータベース
+VENDORS = ['sqlite', 'postgresql']
+
+# 時刻を 0 時からの分数に変換する式
+MINUTES_SQL = {
+    'sqlite': '(CAST(substr({0}, 1, 2) AS integer) * 60 + CAST(substr({0}, 4, 2) AS integer))',
+    'postgresql': '(CAST(EXTRACT(HOUR FROM {0}) AS integer) * 60 + CAST(EXTRACT(MINUTE FROM {0}) AS integer))',
+}
+
+# 日付から曜日 (月曜日が 0) を求める式 (% はパラメータの書式と区別するため %% と記述)
+WEEKDAY_SQL = {
+    'sqlite': "((CAST(strftime('%%w', {0}) AS integer) + 6) %% 7)",
+    'postgresql': '(CAST(EXTRACT(ISODOW FROM CAST({0} AS date)) AS integer) - 1)',
+}
+
+
+def greatest(value1: str, value2: str) -> str:
+    """2 つの値の大きい方を返す式を生成します。
+
+    Args:
+        value1 (str): 1個目の式
+        value2 (str): 2個目の式
+
+    Returns:
+        str: SQL の式
+    """
+    return 'CASE WHEN {0} < {1} THEN {1} ELSE {0} END'.format(value1, value2)
+
+
+def least(value1: str, value2: str) -> str:
+    """2 つの値の小さい方を返す式を生成します。
+
+    Args:
+        value1 (str): 1個目の式
+        value2 (str): 2個目の式
+
+    Returns:
+        str: SQL の式
+    """
+    return 'CASE WHEN {1} < {0} THEN {1} ELSE {0} END'.format(value1, value2)
+
+
+def positive(value: str) -> str:
+    """負の値を 0 にする式を生成します。
+
+    Args:
+        value (str): 式
+
+    Returns:
+        str: SQL の式
+    """
+    return greatest(value, '0')
+
+
+def get_worktime_sql(usernames: list, date_range: tuple[datetime.date, datetime.date], today: datetime.date) -> tuple[str, list]:
+    """ユーザと日付ごとの勤務実績を計算する共通テーブル式を生成します。
+
+    生成する問い合わせは evaluated という名前の共通テーブル式を定義し、
+    username, date, attendance, work, behind, early, overtime, error (エラーコード),
+    time_off_request_id, time_off_accepted の列を持ちます。
+
+    Args:
+        usernames (list): ユーザ ID のリスト
+        date_range (tuple[datetime.date, datetime.date]): 期間 (終了日は範囲に含まれません)
+        today (datetime.date): 本日の日付
+
+    Raises:
+        NotSupportedError: 未対応のデータベース
+
+    Returns:
+        tuple[str, list]: WITH 句と問い合わせのパラメータ
+    """
+    if connection.vendor not in VENDORS:
+        raise NotSupportedError('SQL worktime rules are not supported on ' + connection.vendor)
+    qn = connection.ops.quote_name
+    begin, end = [connection.ops.adapt_datefield_value(date) for date in date_range]
+    today = connection.ops.adapt_datefield_value(today)
+
+    def minutes(column):
+        return MINUTES_SQL[connection.vendor].format(column)
+
+    # 共通テーブル式を一度だけ評価する指定 (SQLite 3.35 以降と PostgreSQL で有効)
+    materialized = ''
+    if connection.vendor == 'postgresql' or (3, 35) <= connection.Database.sqlite_version_info:
+        materialized = 'MATERIALIZED '
+
+    def schedule(column):
+        # 承認済の休暇申請、勤務スケジュール、営業日カレンダの順に適用
+        return 'CASE WHEN r.accepted THEN r.{0} WHEN s.id IS NOT NULL THEN s.{0} ELSE c.{0} END AS {0}'.format(qn(column))
+
+    # 勤務パターンから求める営業日カレンダは共通テーブル式で渡す
+    business_calendar = qn(BusinessCalendar._meta.db_table)
+    calendar = ''
+    calendar_params = []
+    calendars = get_calendars(date_range) if is_virtual_calendar() else []
+    if calendars:
+        row = '(%s, %s, {})'.format(', '.join(['CAST(%s AS integer)'] * len(MINUTES_FIELDS)))
+        calendar = 'calendar ({}, attendance, {}) AS (VALUES {}),\n'.format(
+            qn('date'), ', '.join(MINUTES_FIELDS), ', '.join([row] * len(calendars))
+        )
+        for day in calendars:
+            calendar_params += [connection.ops.adapt_datefield_value(day['date']), day['attendance']]
+            calendar_params += [day[field] for field in MINUTES_FIELDS]
+        business_calendar = 'calendar'
+
+    sql = '''
+WITH users (username) AS (VALUES {users}),
+{calendar}punches AS (
+    SELECT t.username, t.{date},
+        MIN(CASE WHEN t.action = 'begin' THEN t.{time} END) AS begin_record,
+        MAX(CASE WHEN t.action = 'end' THEN t.{time} END) AS end_record
+    FROM {time_record} t
+    WHERE t.{date} >= %s AND t.{date} < %s AND t.username IN (SELECT username FROM users)
+    GROUP BY t.username, t.{date}
+),
+schedules AS {materialized}(
+    SELECT a.username, a.valid_from, a.valid_to, s.*
+    FROM {schedule_assignment} a
+    INNER JOIN {work_schedule_pattern} s ON s.schedule_id = a.schedule_id
+    WHERE a.username IN (SELECT username FROM users) AND a.valid_from < %s AND (a.valid_to IS NULL OR %s <= a.valid_to)
+),
+days AS {materialized}(
+    SELECT u.username, c.{date},
+        {schedule_attendance},
+        {schedule_begin}, {schedule_end}, {schedule_leave}, {schedule_back}, {schedule_standard},
+        p.begin_record, p.end_record,
+        r.id AS time_off_request_id, r.accepted AS time_off_accepted,
+        CASE WHEN c.{date} < %s THEN -1 WHEN c.{date} = %s THEN 0 ELSE 1 END AS day_class
+    FROM users u
+    CROSS JOIN {business_calendar} c
+    LEFT JOIN punches p ON p.username = u.username AND p.{date} = c.{date}
+    LEFT JOIN {time_off_request} r ON r.username = u.username AND r.{date} = c.{date}
+    LEFT JOIN schedules s ON s.username = u.username AND s.valid_from <= c.{date}
+        AND (s.valid_to IS NULL OR c.{date} <= s.valid_to)
+        AND s.{day} = CASE
+            WHEN NOT c.attendance AND COALESCE((SELECT w.attendance FROM {standard_work_pattern} w WHERE w.id = {weekday}), TRUE) THEN 7
+            ELSE {weekday}
+        END
+    WHERE c.{date} >= %s AND c.{date} < %s
+),
+classified AS {materialized}(
+    SELECT username, {date}, attendance, time_off_request_id, time_off_accepted, day_class,
+        (begin_record IS NOT NULL OR end_record IS NOT NULL) AS work,
+        begin_minutes, end_minutes, leave_minutes, back_minutes, standard_minutes,
+        {begin_record_min} AS begin_record_min, {end_record_min} AS end_record_min,
+        (leave_minutes IS NOT NULL AND back_minutes IS NOT NULL) AS split,
+        CASE
+            WHEN day_class < 0 AND begin_record IS NULL AND end_record IS NULL THEN
+                CASE WHEN attendance THEN 1 ELSE 0 END
+            WHEN day_class < 0 AND begin_record IS NOT NULL AND end_record IS NULL THEN 2
+            WHEN day_class <= 0 AND begin_record IS NULL AND end_record IS NOT NULL THEN 3
+            WHEN day_class <= 0 AND begin_record IS NOT NULL AND end_record IS NOT NULL
+                AND end_record < begin_record THEN 4
+            WHEN 0 < day_class AND (begin_record IS NOT NULL OR end_record IS NOT NULL) THEN 5
+            ELSE 0
+        END AS error
+    FROM days
+),
+bounded AS {materialized}(
+    SELECT classified.*,
+        (day_class <= 0 AND begin_record_min IS NOT NULL AND end_record_min IS NOT NULL AND error = 0) AS calculate,
+        {section1_begin_record} AS section1_begin_record,
+        {section2_begin_record} AS section2_begin_record,
+        {section1_end_record} AS section1_end_record,
+        {section2_end_record} AS section2_end_record,
+        {early_end_record} AS early_end_record,
+        {overtime_begin_record} AS overtime_begin_record
+    FROM classified
+),
+evaluated AS (
+    SELECT username, {date}, attendance, work, error, time_off_request_id, time_off_accepted,
+        CASE WHEN calculate AND attendance THEN
+            standard_minutes - {section1_record}
+            - CASE WHEN split THEN {section2_record} ELSE 0 END
+        ELSE 0 END AS behind,
+        CASE WHEN calculate AND attendance THEN {early} ELSE 0 END AS early,
+        CASE
+            WHEN calculate AND attendance THEN {overtime}
+            WHEN calculate THEN end_record_min - begin_record_min
+            ELSE 0
+        END AS overtime
+    FROM bounded
+)'''.format(
+        users=', '.join(['(%s)'] * len(usernames)),
+        materialized=materialized,
+        calendar=calendar,
+        standard_work_pattern=qn(StandardWorkPattern._meta.db_table),
+        schedule_assignment=qn(ScheduleAssignment._meta.db_table),
+        work_schedule_pattern=qn(WorkSchedulePattern._meta.db_table),
+        day=qn('day'),
+        weekday=WEEKDAY_SQL[connection.vendor].format('c.' + qn('date')),
+        schedule_attendance=schedule('attendance'),
+        date=qn('date'),
+        time=qn('time'),
+        time_record=qn(TimeRecord._meta.db_table),
+        business_calendar=business_calendar,
+        time_off_request=qn(TimeOffRequest._meta.db_table),
+        schedule_begin=schedule('begin_minutes'),
+        schedule_end=schedule('end_minutes'),
+        schedule_leave=schedule('leave_minutes'),
+        schedule_back=schedule('back_minutes'),
+        schedule_standard=schedule('standard_minutes'),
+        begin_record_min=minutes('begin_record'),
+        end_record_min=minutes('end_record'),
+        section1_begin_record=greatest('begin_minutes', 'begin_record_min'),
+        section2_begin_record=greatest('back_minutes', 'begin_record_min'),
+        section1_end_record=least('end_record_min', 'CASE WHEN split THEN leave_minutes ELSE end_minutes END'),
+        section2_end_record=least('end_record_min', 'end_minutes'),
+        early_end_record=least('end_record_min', 'begin_minutes'),
+        overtime_begin_record=greatest('end_minutes', 'begin_record_min'),
+        section1_record=positive('section1_end_record - section1_begin_record'),
+        section2_record=positive('section2_end_record - section2_begin_record'),
+        early=positive('early_end_record - begin_record_min'),
+        overtime=positive('end_record_min - overtime_begin_record'),
+    )
+    params = list(usernames) + calendar_params + [begin, end, end, begin, today, today, begin, end]
+    return sql, params
+
+
+def evaluate_worktimes(usernames: list, date_range: tuple[datetime.date, datetime.date], today: datetime.date = None) -> dict:
+    """指定した複数ユーザと期間の勤務実績を SQL で計算します。
+
+    Args:
+        usernames (list): ユーザ ID のリスト
+        date_range (tuple[datetime.date, datetime.date]): 期間 (終了日は範囲に含まれません)
+        today (datetime.date): 本日の日付 (省略時は現在の日付)
+
+    Returns:
+        dict: ユーザ ID をキーにした、日付をキーにした勤務実績の dict の dict
+    """
+    if today is None:
+        today = datetime.datetime.now().date()
+    results = {username: {} for username in usernames}
+    if not usernames:
+        return results
+    sql, params = get_worktime_sql(usernames, date_range, today)
+    with connection.cursor() as cursor:
+        cursor.execute(sql + '''
+SELECT username, {date}, work, behind, early, overtime, error FROM evaluated
+'''.format(date=connection.ops.quote_name('date')), params)
+        for username, date, work, behind, early, overtime, error in cursor.fetchall():
+            if isinstance(date, str):
+                date = datetime.date.fromisoformat(date)
+            results[username][date] = {
+                'work': bool(work),
+                'behind': behind,
+                'early': early,
+                'overtime': overtime,
+                'error': ERROR_MESSAGES[error],
+            }
+    return results
+
+
+def get_summaries(usernames: list, date_range: tuple[datetime.date, datetime.date], today: datetime.date = None) -> dict:
+    """指定した複数ユーザと期間の勤務実績の集計を 1 回の問い合わせで取得します。
+
+    Args:
+        usernames (list): ユーザ ID のリスト
+        date_range (tuple[datetime.date, datetime.date]): 期間 (終了日は範囲に含まれません)
+        today (datetime.date): 本日の日付 (省略時は現在の日付)
+
+    Returns:
+        dict: ユーザ ID をキーにした集計結果の dict
+    """
+    if today is None:
+        today = datetime.datetime.now().date()
+    results = {username: dict.fromkeys(SUMMARY_FIELDS, 0) for username in usernames}
+    if usernames:
+        sql, params = get_worktime_sql(usernames, date_range, today)
+        with connection.cursor() as cursor:
+            cursor.execute(sql + '''
+SELECT username,
+    COUNT(*),
+    SUM(CASE WHEN attendance THEN 1 ELSE 0 END),
+    SUM(CASE WHEN work THEN 1 ELSE 0 END),
+    SUM(CASE WHEN 0 < behind THEN behind ELSE 0 END),
+    SUM(CASE WHEN 0 < behind THEN 1 ELSE 0 END),
+    SUM(CASE WHEN 0 < early THEN early ELSE 0 END),
+    SUM(CASE WHEN 0 < early THEN 1 ELSE 0 END),
+    SUM(CASE WHEN 0 < overtime THEN overtime ELSE 0 END),
+    SUM(CASE WHEN 0 < overtime THEN 1 ELSE 0 END),
+    SUM(CASE WHEN time_off_request_id IS NOT NULL THEN 1 ELSE 0 END),
+    SUM(CASE WHEN time_off_request_id IS NOT NULL AND NOT time_off_accepted THEN 1 ELSE 0 END),
+    SUM(CASE WHEN 0 < error THEN 1 ELSE 0 END)
+FROM evaluated
+GROUP BY username
+''', params)
+            for row in cursor.fetchall():
+                results[row[0]] = {field: int(value) for field, value in zip(SUMMARY_FIELDS, row[1:])}
+    return {username: summarize_hours(result) for username, result in results.items()}
+
+
+def get_monthly_summaries(usernames: list, year: int, month: int) -> dict:
+    """指定した複数ユーザと年月の勤務実績の集計を SQL で取得します。
+
+    Args:
+        usernames (list): ユーザ ID のリスト
+        year (int): 西暦年
+        month (int): 月
+
+    Returns:
+        dict: ユーザ ID をキーにした集計結果の dict
+    """
+    return get_summaries(usernames, get_month_range(year, month))
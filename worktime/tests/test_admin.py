@@ -0,0 +1,101 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+import timecard.settings
+from worktime.models import BusinessCalendar, TimeOffRequest, TimeRecord
+from worktime.paginators import EstimatedCountPaginator
+
+
+class SmallEstimatedCountPaginator(EstimatedCountPaginator):
+    EXACT_COUNT_LIMIT = 3
+
+
+class TestTimeRecordAdmin(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_superuser(username='admin', password='12345678')
+        self.client.login(username='admin', password='12345678')
+
+    def create_records(self, begin, end):
+        for index in range(begin, end):
+            User.objects.get_or_create(username='user{:02d}'.format(index))
+            TimeRecord.objects.create(
+                date=datetime.date(2024, 4, 1) + datetime.timedelta(days=index % 20),
+                time=datetime.time(9, 0, 0),
+                username='user{:02d}'.format(index),
+                action='begin',
+                latitude=35.0 + index * 0.001,
+                longitude=139.0,
+                accuracy=10
+            )
+            TimeOffRequest.objects.create(
+                date=datetime.date(2024, 4, 1) + datetime.timedelta(days=index),
+                username='user{:02d}'.format(index),
+                display_name='有給休暇',
+                attendance=False
+            )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries(self):
+        self.create_records(0, 3)
+        urls = ['/admin/worktime/timerecord/', '/admin/worktime/timeoffrequest/']
+        small = [self.count_queries(url) for url in urls]
+        self.create_records(3, 30)
+        for url, count in zip(urls, small):
+            self.assertLessEqual(self.count_queries(url), count)
+
+    def test_date_hierarchy(self):
+        self.create_records(0, 3)
+        response = self.client.get('/admin/worktime/timerecord/?date__year=2024&date__month=4')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['cl'].result_list), 3)
+
+    def test_estimated_count_paginator(self):
+        self.create_records(0, 5)
+        TimeRecord.objects.filter(username='user00').delete()
+        last_id = TimeRecord.objects.order_by('-id').first().id
+        self.assertEqual(SmallEstimatedCountPaginator(TimeRecord.objects.order_by('id'), 2).count, last_id)
+        self.assertEqual(SmallEstimatedCountPaginator(
+            TimeRecord.objects.filter(action='begin').order_by('id'), 2
+        ).count, 4)
+        self.assertEqual(EstimatedCountPaginator(TimeRecord.objects.order_by('id'), 2).count, 4)
+
+
+class TestBusinessCalendarAdmin(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(setattr, timecard.settings, 'VIRTUAL_CALENDAR', getattr(timecard.settings, 'VIRTUAL_CALENDAR', False))
+        timecard.settings.VIRTUAL_CALENDAR = True
+        User.objects.create_superuser(username='admin', password='12345678')
+        self.client.login(username='admin', password='12345678')
+
+    def test_add(self):
+        response = self.client.get('/admin/worktime/businesscalendar/add/')
+        self.assertContains(response, 'name="date"')
+        response = self.client.post('/admin/worktime/businesscalendar/add/', {
+            'date': '2024-04-01',
+            'attendance': 'on',
+            'holiday': '',
+            'begin': '09:00',
+            'end': '17:00',
+            'leave': '',
+            'back': '',
+        })
+        self.assertEqual(response.status_code, 302)
+        calendar = BusinessCalendar.objects.get(date=datetime.date(2024, 4, 1))
+        self.assertEqual(calendar.begin, datetime.time(9, 0))
+        self.assertTrue(calendar.customized)
+
+        # 登録済の日は日付を変更不可
+        response = self.client.get('/admin/worktime/businesscalendar/2024-04-01/change/')
+        self.assertNotContains(response, 'name="date"')
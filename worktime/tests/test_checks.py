@@ -0,0 +1,17 @@
+from django.test import SimpleTestCase, override_settings
+
+from worktime.checks import check_shared_cache
+
+
+class TestChecks(SimpleTestCase):
+    @override_settings(DEBUG=False, CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_local_cache(self):
+        self.assertEqual([error.id for error in check_shared_cache(None)], ['worktime.E001'])
+
+    @override_settings(DEBUG=True, CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_local_cache_debug(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+    @override_settings(DEBUG=False, CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}})
+    def test_shared_cache(self):
+        self.assertEqual(check_shared_cache(None), [])
@@ -0,0 +1,70 @@
+import datetime
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+import timecard.settings
+from worktime.models import BusinessCalendar, StandardWorkPattern
+
+
+class TestCreateCalendar(TestCase):
+    fixtures = ['standard-work-pattern.json']
+
+    def setUp(self):
+        self.addCleanup(setattr, timecard.settings, 'HOLIDAY_DOWNLOAD_URL', timecard.settings.HOLIDAY_DOWNLOAD_URL)
+        timecard.settings.HOLIDAY_DOWNLOAD_URL = None
+
+    def create_calendar(self, *args) -> str:
+        stdout = StringIO()
+        call_command('create_calendar', '--from', '2024-01', '--to', '2024-02', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_create_calendar(self):
+        output = self.create_calendar()
+        self.assertIn('60 days, 60 created, 0 updated, 0 unchanged', output)
+        self.assertEqual(BusinessCalendar.objects.count(), 60)
+        monday = BusinessCalendar.objects.get(date=datetime.date(2024, 1, 1))
+        self.assertTrue(monday.attendance)
+        self.assertEqual(monday.begin, datetime.time(9, 0))
+        self.assertEqual(monday.standard_minutes, 420)
+        self.assertEqual(BusinessCalendar.objects.get(date=datetime.date(2024, 1, 6)).holiday, '定休日')
+
+        # 再実行しても書き込まない
+        output = self.create_calendar()
+        self.assertIn('0 created, 0 updated, 60 unchanged', output)
+
+    def test_create_calendar_resync(self):
+        self.create_calendar()
+
+        # 個別に変更した日は勤務パターンの変更を反映しない
+        customized = BusinessCalendar.objects.get(date=datetime.date(2024, 1, 2))
+        customized.attendance = False
+        customized.holiday = '臨時休業'
+        customized.begin = customized.end = customized.leave = customized.back = None
+        customized.customized = True
+        customized.save()
+        pattern = StandardWorkPattern.objects.get(id=1)
+        pattern.end = datetime.time(18, 0)
+        pattern.save()
+        output = self.create_calendar('--dry-run')
+        self.assertIn('0 created, 8 updated', output)
+        self.assertFalse(BusinessCalendar.objects.filter(end=datetime.time(18, 0)).exists())
+
+        output = self.create_calendar()
+        self.assertIn('0 created, 8 updated, 51 unchanged, 1 customized skipped', output)
+        tuesdays = BusinessCalendar.objects.filter(end=datetime.time(18, 0))
+        self.assertEqual(tuesdays.count(), 8)
+        self.assertEqual(tuesdays.first().standard_minutes, 480)
+        self.assertEqual(BusinessCalendar.objects.get(date=datetime.date(2024, 1, 2)).holiday, '臨時休業')
+
+    def test_create_calendar_dry_run(self):
+        output = self.create_calendar('--dry-run')
+        self.assertIn('60 created', output)
+        self.assertFalse(BusinessCalendar.objects.exists())
+
+    def test_create_calendar_without_pattern(self):
+        StandardWorkPattern.objects.all().delete()
+        with self.assertRaisesMessage(CommandError, 'No StandardWorkPattern is registered.'):
+            self.create_calendar()
+        self.assertFalse(BusinessCalendar.objects.exists())
@@ -0,0 +1,75 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class TestCreateUsers(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        User.objects.create_user('user01', password='old', last_name='旧姓', first_name='一郎', is_active=False)
+
+    def write_csv(self, name, lines):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf_8_sig') as f:
+            f.write('\n'.join(lines) + '\n')
+        return path
+
+    def call(self, *args) -> str:
+        stdout = StringIO()
+        call_command(*args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_create_users_bulk(self):
+        path = self.write_csv('users.csv', [
+            'user01,pass01,山田,一郎',
+            'user02,pass02,佐藤,二郎',
+            '',
+            'user03,pass03,鈴木',
+            'user 04,pass04,高橋,四郎',
+            'user02,pass05,田中,五郎',
+            'user06,pass06,伊藤,六郎',
+        ])
+        for workers in ('1', '2'):
+            output = self.call('create_users', path, '--bulk', '--workers', workers, '--batch-size', '2')
+            self.assertIn('line 4: user03 error', output)
+            self.assertIn('line 5: user 04 error', output)
+            self.assertIn('line 6: user02 error (Duplicate username in the file.)', output)
+        self.assertIn('0 users created, 3 updated, 3 errors', output)
+        self.assertLess(output.index('line 4:'), output.index('line 5:'))
+        self.assertLess(output.index('line 5:'), output.index('line 6:'))
+
+        # 登録済のユーザはパスワードと氏名だけを更新
+        user = User.objects.get(username='user01')
+        self.assertTrue(user.check_password('pass01'))
+        self.assertEqual((user.last_name, user.first_name, user.is_active), ('山田', '一郎', False))
+        self.assertTrue(User.objects.get(username='user02').check_password('pass02'))
+        self.assertTrue(User.objects.get(username='user06').is_active)
+        self.assertEqual(User.objects.count(), 3)
+
+    def test_create_users_bulk_output(self):
+        path = self.write_csv('users.csv', ['user01,pass01,山田,一郎', 'user02,pass02,佐藤,二郎'])
+        self.assertIn('1 users created, 1 updated, 0 errors', self.call('create_users', path, '--bulk', '--workers', '1'))
+
+    def test_change_user_password_bulk(self):
+        User.objects.create_user('user02', password='old')
+        path = self.write_csv('passwords.csv', ['user01,new01', 'user02,new02', 'user03,new03', 'user04', 'user01,new05'])
+        output = self.call('change_user_password', '--file', path, '--workers', '2', '--batch-size', '2')
+        self.assertIn('line 3: user03 error (User does not exist.)', output)
+        self.assertIn('line 4: user04 error', output)
+        self.assertIn('line 5: user01 error (Duplicate username in the file.)', output)
+        self.assertIn('2 passwords changed, 3 errors', output)
+        self.assertLess(output.index('line 3:'), output.index('line 4:'))
+        self.assertLess(output.index('line 4:'), output.index('line 5:'))
+        self.assertTrue(User.objects.get(username='user01').check_password('new01'))
+        self.assertTrue(User.objects.get(username='user02').check_password('new02'))
+
+    def test_change_user_password(self):
+        self.assertIn('Password changed successfully.', self.call('change_user_password', 'user01', 'new01'))
+        self.assertTrue(User.objects.get(username='user01').check_password('new01'))
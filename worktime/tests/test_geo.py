@@ -0,0 +1,136 @@
+import datetime
+import random
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from geopy.distance import geodesic
+
+import timecard.settings
+from worktime.geo import (SiteIndex, get_distances, get_locations,
+                          haversine_distances)
+from worktime.models import TimeRecord, WorkSite
+
+
+class TestGeo(TestCase):
+    def setUp(self):
+        self.settings = (
+            timecard.settings.LOCATION_ORIGIN, timecard.settings.MAX_ACCURACY, timecard.settings.MAX_DISTANCE
+        )
+        timecard.settings.LOCATION_ORIGIN = (35.681236, 139.767125)
+        timecard.settings.MAX_ACCURACY = 100
+        timecard.settings.MAX_DISTANCE = 50
+
+    def tearDown(self):
+        (
+            timecard.settings.LOCATION_ORIGIN, timecard.settings.MAX_ACCURACY, timecard.settings.MAX_DISTANCE
+        ) = self.settings
+
+    def test_haversine_distances(self):
+        origin = (35.681236, 139.767125)
+        points = [(35.689487, 139.691706), (34.702485, 135.495951), (43.068661, 141.350755)]
+        distances = haversine_distances([p[0] for p in points], [p[1] for p in points], origin)
+        for point, distance in zip(points, distances):
+            self.assertAlmostEqual(distance / geodesic(origin, point).m, 1, delta=0.006)
+
+    def test_get_distances_threshold(self):
+        rng = random.Random(0)
+        origin = (rng.uniform(-80, 80), rng.uniform(-180, 180))
+        for threshold in (50, 1000, 100000):
+            points = []
+            for _ in range(2000):
+                scale = threshold * rng.uniform(0.98, 1.02) / 111000
+                points.append((
+                    max(-90, min(90, origin[0] + rng.uniform(-1, 1) * scale)),
+                    origin[1] + rng.uniform(-1, 1) * scale
+                ))
+            for point, distance in zip(points, get_distances(points, origin, threshold)):
+                self.assertEqual(distance < threshold, geodesic(origin, point).m < threshold, point)
+
+    def test_get_locations(self):
+        records = [
+            TimeRecord(latitude=35.681236, longitude=139.767125, accuracy=10),
+            TimeRecord(latitude=35.689487, longitude=139.691706, accuracy=10),
+            TimeRecord(latitude=35.681236, longitude=139.767125, accuracy=500),
+            TimeRecord(latitude=None, longitude=None, accuracy=None),
+        ]
+        locations = get_locations(records)
+        self.assertEqual(locations[0], '圏内')
+        self.assertTrue(locations[1].startswith('圏外 6,'))
+        self.assertEqual(locations[2], '低精度')
+        self.assertIsNone(locations[3])
+        self.assertEqual([record.location() for record in records], locations)
+
+    def test_stored_location(self):
+        record = TimeRecord(latitude=35.689487, longitude=139.691706, accuracy=10)
+        record.update_location()
+        self.assertEqual(record.location_status, 'outside')
+        record.distance = 12345.6
+        self.assertEqual(record.location(), '圏外 12,345 m (± 10.0 m)')
+
+    def test_backfill_locations(self):
+        points = [(35.681236, 139.767125, 10), (35.689487, 139.691706, 10), (35.681236, 139.767125, 500), (None, None, None)]
+        for index in range(25):
+            latitude, longitude, accuracy = points[index % len(points)]
+            TimeRecord.objects.create(
+                date=datetime.date(2024, 4, 1),
+                time=datetime.time(9, 0, 0),
+                username='user01',
+                action='begin',
+                latitude=latitude,
+                longitude=longitude,
+                accuracy=accuracy
+            )
+        call_command('backfill_locations', '--chunk-size', '4', stdout=StringIO())
+        for record in TimeRecord.objects.all():
+            distance, status = record.distance, record.location_status
+            record.update_location()
+            self.assertEqual((distance, status), (record.distance, record.location_status))
+        self.assertEqual(TimeRecord.objects.filter(location_status='outside', date__gte=datetime.date(2024, 4, 1)).count(), 6)
+
+
+class TestSiteIndex(TestCase):
+    def brute_force(self, sites, latitude, longitude):
+        matches = []
+        for site_id, site_latitude, site_longitude, radius in sites:
+            distance = geodesic((latitude, longitude), (site_latitude, site_longitude)).m
+            matches.append((distance >= radius, distance, site_id))
+        outside, distance, site_id = min(matches)
+        return site_id, not outside
+
+    def test_match(self):
+        rng = random.Random(0)
+        for center in ((35.68, 139.76), (69.65, 18.96), (-33.87, 151.21)):
+            sites = []
+            for site_id in range(100):
+                sites.append((
+                    site_id,
+                    center[0] + rng.uniform(-0.3, 0.3),
+                    center[1] + rng.uniform(-0.3, 0.3),
+                    rng.choice([50, 100, 300, 2000])
+                ))
+            index = SiteIndex(sites)
+            points = []
+            for _ in range(100):
+                site = rng.choice(sites)
+                scale = rng.choice([0.0005, 0.005, 0.05, 1.0])
+                points.append((site[1] + rng.uniform(-scale, scale), site[2] + rng.uniform(-scale, scale)))
+            matches = index.match([point[0] for point in points], [point[1] for point in points])
+            for point, (site_id, distance, inside) in zip(points, matches):
+                self.assertEqual((site_id, inside), self.brute_force(sites, *point), point)
+
+    def test_empty(self):
+        self.assertEqual(SiteIndex([]).match([35.0], [139.0]), [None])
+
+    def test_judge_locations_with_sites(self):
+        self.addCleanup(setattr, timecard.settings, 'MAX_ACCURACY', timecard.settings.MAX_ACCURACY)
+        timecard.settings.MAX_ACCURACY = 100
+        tokyo = WorkSite.objects.create(name='東京', latitude=35.681236, longitude=139.767125, radius=100)
+        WorkSite.objects.create(name='大阪', latitude=34.702485, longitude=135.495951, radius=200)
+        record = TimeRecord(latitude=35.6815, longitude=139.7672, accuracy=10)
+        record.update_location()
+        self.assertEqual((record.location_status, record.site_id), ('inside', tokyo.id))
+        record = TimeRecord(latitude=35.689487, longitude=139.691706, accuracy=10)
+        record.update_location()
+        self.assertEqual((record.location_status, record.site_id), ('outside', tokyo.id))
+        self.assertAlmostEqual(record.distance, 6900, delta=100)
@@ -0,0 +1,100 @@
+import datetime
+import os
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+import requests
+from django.core.management import call_command
+from django.test import TestCase
+
+import timecard.settings
+from worktime.holidays import import_holidays, parse_ics
+from worktime.models import BusinessCalendar, Holiday, HolidaySource
+from worktime.reference import get_holidays
+
+ICS = '''BEGIN:VCALENDAR\r
+VERSION:2.0\r
+BEGIN:VEVENT\r
+DTSTART;VALUE=DATE:20240101\r
+DTEND;VALUE=DATE:20240102\r
+SUMMARY:元日\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+DTSTART:20240107T150000Z\r
+SUMMARY:成人\r
+ の日\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+DTSTART;TZID=Asia/Tokyo:20240211T000000\r
+SUMMARY:建国記念の日\\, 振替\r
+END:VEVENT\r
+END:VCALENDAR\r
+'''
+
+
+class TestHolidays(TestCase):
+    def write_ics(self, text: str) -> str:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'holidays.ics')
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        return path
+
+    def test_parse_ics(self):
+        self.assertEqual(list(parse_ics(ICS.splitlines(keepends=True), 'Asia/Tokyo')), [
+            (datetime.date(2024, 1, 1), '元日'),
+            (datetime.date(2024, 1, 8), '成人の日'),
+            (datetime.date(2024, 2, 11), '建国記念の日, 振替'),
+        ])
+
+    def test_import_file(self):
+        self.assertEqual(import_holidays(self.write_ics(ICS)), (3, 0))
+        self.assertEqual(get_holidays(datetime.date(2024, 1, 1), datetime.date(2024, 2, 1)), {
+            datetime.date(2024, 1, 1): '元日',
+            datetime.date(2024, 1, 8): '成人の日',
+        })
+
+        # 取り込んだ期間にない祝日は削除
+        moved = ICS.replace('20240107T150000Z', '20240114T150000Z')
+        self.assertEqual(import_holidays(self.write_ics(moved)), (3, 1))
+        self.assertEqual(Holiday.objects.get(name='成人の日').date, datetime.date(2024, 1, 15))
+
+    def test_import_url_conditional(self):
+        url = 'https://example.com/holidays.ics'
+        response = mock.MagicMock(status_code=200, encoding='utf-8', headers={'ETag': '"v1"'})
+        response.__enter__.return_value = response
+        response.iter_lines.return_value = iter(ICS.splitlines())
+        with mock.patch('worktime.holidays.requests.get', return_value=response) as get:
+            self.assertEqual(import_holidays(url), (3, 0))
+            self.assertEqual(get.call_args.kwargs['headers'], {})
+        self.assertEqual(HolidaySource.objects.get(source=url).etag, '"v1"')
+
+        # 変更がなければ取り込まない
+        response.status_code = 304
+        with mock.patch('worktime.holidays.requests.get', return_value=response) as get:
+            self.assertIsNone(import_holidays(url))
+            self.assertEqual(get.call_args.kwargs['headers'], {'If-None-Match': '"v1"'})
+
+    def test_import_url_encoding(self):
+        url = 'https://example.com/holidays.ics'
+        for content_type, encoding in [('text/calendar', 'utf-8'), ('text/calendar; charset=Shift_JIS', 'shift_jis')]:
+            response = requests.Response()
+            response.status_code = 200
+            response.headers['Content-Type'] = content_type
+            response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+            response.raw = BytesIO(ICS.encode(encoding))
+            with mock.patch('worktime.holidays.requests.get', return_value=response):
+                import_holidays(url, force=True)
+            self.assertEqual(Holiday.objects.get(date=datetime.date(2024, 1, 1)).name, '元日')
+
+    def test_create_calendar_offline(self):
+        self.addCleanup(setattr, timecard.settings, 'HOLIDAY_DOWNLOAD_URL', timecard.settings.HOLIDAY_DOWNLOAD_URL)
+        timecard.settings.HOLIDAY_DOWNLOAD_URL = 'https://example.com/holidays.ics'
+        call_command('loaddata', 'standard-work-pattern.json', verbosity=0)
+        call_command('import_holidays', self.write_ics(ICS), stdout=StringIO())
+        call_command('create_calendar', '--offline', '--from', '2024-01', '--to', '2024-01', stdout=StringIO())
+        calendar = BusinessCalendar.objects.get(date=datetime.date(2024, 1, 8))
+        self.assertFalse(calendar.attendance)
+        self.assertEqual(calendar.holiday, '休日 (成人の日)')
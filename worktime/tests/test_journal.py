@@ -0,0 +1,93 @@
+import io
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+import timecard.settings
+from worktime import journal
+from worktime.models import TimeRecord
+
+
+class TestPunchJournal(TestCase):
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(self.close_journal)
+        self.addCleanup(setattr, timecard.settings, 'PUNCH_JOURNAL', getattr(timecard.settings, 'PUNCH_JOURNAL', None))
+        timecard.settings.PUNCH_JOURNAL = os.path.join(directory.name, 'journal.sqlite3')
+        user = User.objects.create(username='user01', password='12345678')
+        self.client.force_login(user)
+
+    def close_journal(self):
+        connection = getattr(journal.connections, 'connection', None)
+        if connection is not None:
+            connection.close()
+            del journal.connections.connection
+
+    def test_punch_journal(self):
+        data = {'action': 'begin', 'idempotency_key': 'key01'}
+        response = self.client.post('/worktime/api/record/', data, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNone(response.json()['id'])
+        self.assertFalse(TimeRecord.objects.exists())
+        self.assertEqual(journal.count_punches(), 1)
+
+        # 再送はジャーナルに追記しない
+        cache.clear()
+        retry = self.client.post('/worktime/api/record/', data, content_type='application/json')
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.json(), response.json())
+        self.assertEqual(journal.count_punches(), 1)
+
+        # 冪等キーのない打刻はキーを設定して追記
+        response = self.client.post('/worktime/record/', {'action': 'end'})
+        self.assertRedirects(response, '/worktime/record/')
+        self.assertEqual(journal.count_punches(), 2)
+
+        self.assertEqual(journal.flush_punches(), 2)
+        self.assertEqual(journal.count_punches(), 0)
+        records = TimeRecord.objects.filter(username='user01').order_by('action')
+        self.assertEqual([record.action for record in records], ['begin', 'end'])
+        self.assertEqual(records[0].idempotency_key, 'key01')
+        self.assertTrue(records[1].idempotency_key)
+        self.assertEqual(journal.flush_punches(), 0)
+
+    def test_punch_journal_replay(self):
+        self.client.post('/worktime/api/record/', {'action': 'begin', 'idempotency_key': 'key01'})
+        entries = journal.read_punches(10)
+        journal.flush_punches()
+
+        # 登録後にジャーナルから削除する前に停止した場合の再実行
+        connection = journal.get_connection(timecard.settings.PUNCH_JOURNAL)
+        for _, record in entries:
+            connection.execute(
+                'INSERT INTO punch (username, idempotency_key, data) VALUES (?, ?, ?)',
+                (record.username, record.idempotency_key, journal.to_entry(record))
+            )
+        self.assertEqual(journal.count_punches(), 1)
+        call_command('flush_punch_journal', stdout=io.StringIO())
+        self.assertEqual(journal.count_punches(), 0)
+        self.assertEqual(TimeRecord.objects.filter(username='user01').count(), 1)
+
+    def test_punch_journal_retry_after_flush(self):
+        data = {'action': 'begin', 'idempotency_key': 'key01'}
+        response = self.client.post('/worktime/api/record/', data, content_type='application/json')
+        journal.flush_punches()
+
+        # ジャーナルから削除された後の再送は登録済の打刻を返す
+        cache.clear()
+        retry = self.client.post('/worktime/api/record/', data, content_type='application/json')
+        self.assertEqual(retry.status_code, 200)
+        record = TimeRecord.objects.get(username='user01')
+        self.assertEqual(retry.json(), dict(response.json(), id=record.id))
+        self.assertEqual(journal.count_punches(), 0)
+
+    def test_flush_punch_journal_not_configured(self):
+        timecard.settings.PUNCH_JOURNAL = None
+        with self.assertRaises(CommandError):
+            call_command('flush_punch_journal')
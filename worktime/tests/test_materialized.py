@@ -0,0 +1,181 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from worktime.materialized import (get_monthly_summary, get_monthly_worktimes,
+                                   is_stale)
+from worktime.models import (BusinessCalendar, DailyWorktime, MonthlySummary,
+                             TimeOffRequest, TimeRecord)
+from worktime.queries import get_monthly_records
+from worktime.rules import summarize
+from worktime.utils import get_month_range
+
+
+class TestDailyWorktime(TestCase):
+    def setUp(self):
+        for day in range(1, 32):
+            BusinessCalendar.objects.create(
+                date=datetime.date(2024, 1, day),
+                attendance=True,
+                holiday='',
+                begin=datetime.time(9, 0, 0),
+                end=datetime.time(17, 0, 0)
+            )
+        TimeRecord.objects.create(
+            date=datetime.date(2024, 1, 4), time=datetime.time(9, 30, 0), username='user01', action='begin'
+        )
+        TimeRecord.objects.create(
+            date=datetime.date(2024, 1, 4), time=datetime.time(18, 0, 0), username='user01', action='end'
+        )
+
+    def test_is_stale(self):
+        date = datetime.date(2024, 1, 10)
+        self.assertFalse(is_stale(date, datetime.date(2024, 1, 11), datetime.date(2024, 2, 1)))
+        self.assertTrue(is_stale(date, datetime.date(2024, 1, 10), datetime.date(2024, 1, 11)))
+        self.assertTrue(is_stale(date, datetime.date(2024, 1, 9), datetime.date(2024, 1, 10)))
+        self.assertFalse(is_stale(date, datetime.date(2024, 1, 8), datetime.date(2024, 1, 9)))
+
+    def test_materialize_on_read(self):
+        records = get_monthly_worktimes('user01', 2024, 1)
+        self.assertEqual(records, get_monthly_records('user01', 2024, 1))
+        self.assertEqual(DailyWorktime.objects.filter(username='user01').count(), 31)
+        with self.assertNumQueries(2):
+            self.assertEqual(get_monthly_worktimes('user01', 2024, 1), records)
+
+    def test_refresh_on_time_record_change(self):
+        get_monthly_worktimes('user01', 2024, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            TimeRecord.objects.create(
+                date=datetime.date(2024, 1, 5), time=datetime.time(9, 0, 0), username='user01', action='begin'
+            )
+        row = DailyWorktime.objects.get(username='user01', date=datetime.date(2024, 1, 5))
+        self.assertEqual(row.begin_record, datetime.time(9, 0, 0))
+        self.assertEqual(row.error, '退勤がありません')
+
+    def test_refresh_on_time_record_move(self):
+        get_monthly_worktimes('user01', 2024, 1)
+        record = TimeRecord.objects.get(date=datetime.date(2024, 1, 4), action='end')
+        record.date = datetime.date(2024, 1, 5)
+        with self.captureOnCommitCallbacks(execute=True):
+            record.save()
+
+        # 変更前の日付も再計算
+        row = DailyWorktime.objects.get(username='user01', date=datetime.date(2024, 1, 4))
+        self.assertIsNone(row.end_record)
+        self.assertEqual(row.error, '退勤がありません')
+        self.assertEqual(get_monthly_records('user01', 2024, 1)[3]['error'], '退勤がありません')
+        self.assertEqual(
+            DailyWorktime.objects.get(username='user01', date=datetime.date(2024, 1, 5)).end_record,
+            datetime.time(18, 0, 0)
+        )
+
+    def test_refresh_on_time_off_request_change(self):
+        get_monthly_worktimes('user01', 2024, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            TimeOffRequest.objects.create(
+                date=datetime.date(2024, 1, 8),
+                username='user01',
+                display_name='有給休暇',
+                attendance=False,
+                accepted=True
+            )
+        row = DailyWorktime.objects.get(username='user01', date=datetime.date(2024, 1, 8))
+        self.assertFalse(row.attendance)
+        self.assertIsNone(row.error)
+        self.assertEqual(get_monthly_worktimes('user01', 2024, 1)[7]['time_off_accepted'], True)
+
+    def test_refresh_on_business_calendar_change(self):
+        get_monthly_worktimes('user01', 2024, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            BusinessCalendar.objects.filter(date=datetime.date(2024, 1, 31)).delete()
+        self.assertEqual(DailyWorktime.objects.filter(username='user01').count(), 30)
+
+    def test_backfill_command(self):
+        call_command('backfill_daily_worktime', '--from', '2024-01', '--to', '2024-01', stdout=StringIO())
+        self.assertEqual(DailyWorktime.objects.filter(username='user01').count(), 31)
+
+    def test_warm_command(self):
+        User.objects.create(username='user01')
+        User.objects.create(username='user02')
+        today = datetime.datetime.now().date()
+        begin, end = get_month_range(today.year, today.month)
+        date = begin
+        while date < end:
+            BusinessCalendar.objects.create(date=date, attendance=False, holiday='休日')
+            date += datetime.timedelta(days=1)
+        call_command('warm_daily_worktime', stdout=StringIO())
+        self.assertEqual(DailyWorktime.objects.filter(date__gte=begin).count(), (end - begin).days * 2)
+
+
+class TestMonthlySummary(TestCase):
+    def setUp(self):
+        for day in range(1, 32):
+            BusinessCalendar.objects.create(
+                date=datetime.date(2024, 1, day),
+                attendance=True,
+                holiday='',
+                begin=datetime.time(9, 0, 0),
+                end=datetime.time(17, 0, 0)
+            )
+        TimeRecord.objects.create(
+            date=datetime.date(2024, 1, 4), time=datetime.time(9, 30, 0), username='user01', action='begin'
+        )
+        TimeRecord.objects.create(
+            date=datetime.date(2024, 1, 4), time=datetime.time(18, 0, 0), username='user01', action='end'
+        )
+
+    def test_store_closed_month(self):
+        summary = get_monthly_summary('user01', 2024, 1)
+        self.assertEqual(summary, summarize(get_monthly_records('user01', 2024, 1)))
+        self.assertEqual(MonthlySummary.objects.filter(username='user01').count(), 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_monthly_summary('user01', 2024, 1), summary)
+
+    def test_current_month_is_not_stored(self):
+        today = datetime.date.today()
+        get_monthly_summary('user01', today.year, today.month)
+        self.assertFalse(MonthlySummary.objects.exists())
+
+    def test_invalidate_on_time_record_change(self):
+        get_monthly_summary('user01', 2024, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            TimeRecord.objects.filter(date=datetime.date(2024, 1, 4), action='end').delete()
+        self.assertFalse(MonthlySummary.objects.exists())
+        self.assertEqual(get_monthly_summary('user01', 2024, 1)['errors'], 31)
+
+    def test_recompute_command_watermark(self):
+        User.objects.create(username='user01')
+        call_command('recompute_monthly_summaries', '--from', '2024-01', stdout=StringIO())
+        self.assertEqual(MonthlySummary.objects.get(username='user01', year=2024, month=1).work_days, 1)
+
+        # シグナルを経由しない更新は更新日時で検出
+        TimeRecord.objects.create(
+            date=datetime.date(2024, 1, 5), time=datetime.time(9, 0, 0), username='user01', action='begin'
+        )
+        TimeRecord.objects.create(
+            date=datetime.date(2024, 1, 5), time=datetime.time(17, 0, 0), username='user01', action='end'
+        )
+        stdout = StringIO()
+        call_command('recompute_monthly_summaries', '--from', '2024-01', stdout=stdout)
+        self.assertIn('2024-01 1 users', stdout.getvalue())
+        self.assertEqual(MonthlySummary.objects.get(username='user01', year=2024, month=1).work_days, 2)
+
+    def test_recompute_command_watermark_after_read(self):
+        User.objects.create(username='user01')
+        User.objects.create(username='user02')
+        call_command('recompute_monthly_summaries', '--from', '2024-01', stdout=StringIO())
+
+        # シグナルを経由しない更新のあとに、参照時に別の月次勤務集計が作成されても検出
+        TimeRecord.objects.bulk_create([
+            TimeRecord(date=datetime.date(2024, 1, 5), time=datetime.time(9, 0, 0), username='user01', action='begin'),
+            TimeRecord(date=datetime.date(2024, 1, 5), time=datetime.time(17, 0, 0), username='user01', action='end'),
+        ])
+        MonthlySummary.objects.filter(username='user02').delete()
+        get_monthly_summary('user02', 2024, 1)
+        stdout = StringIO()
+        call_command('recompute_monthly_summaries', '--from', '2024-01', stdout=stdout)
+        self.assertIn('2024-01 1 users', stdout.getvalue())
+        self.assertEqual(MonthlySummary.objects.get(username='user01', year=2024, month=1).work_days, 2)
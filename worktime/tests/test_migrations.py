@@ -0,0 +1,35 @@
+import datetime
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class TestDuplicateTimeOffRequests(TransactionTestCase):
+    before = [('worktime', '0003_monthlysummary')]
+    after = [('worktime', '0004_hot_query_indexes')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_duplicates_stop_migration(self):
+        apps = self.migrate(self.before)
+        TimeOffRequest = apps.get_model('worktime', 'TimeOffRequest')
+        for accepted in (False, True):
+            TimeOffRequest.objects.create(
+                date=datetime.date(2024, 1, 4), username='user01', display_name='有給休暇',
+                attendance=False, accepted=accepted
+            )
+        with self.assertRaisesMessage(RuntimeError, 'user01 2024-01-04: id'):
+            self.migrate(self.after)
+
+        # 重複を解消すれば適用でき、申請は削除されない
+        TimeOffRequest.objects.filter(accepted=False).delete()
+        apps = self.migrate(self.after)
+        self.assertEqual(apps.get_model('worktime', 'TimeOffRequest').objects.count(), 1)
@@ -0,0 +1,200 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+import timecard.settings
+from worktime.models import BusinessCalendar, TimeOffRequest, TimeRecord
+from worktime.queries import (count_time_off_requests,
+                              count_time_off_requests_by_year,
+                              get_monthly_records, get_monthly_records_bulk,
+                              get_monthly_summaries, get_time_off_matrix)
+from worktime.rules import summarize
+from worktime.utils import get_year_range
+
+
+class TestMonthlyQueries(TestCase):
+    def setUp(self):
+        for day in range(1, 32):
+            date = datetime.date(2024, 1, day)
+            if date.weekday() < 5:
+                BusinessCalendar.objects.create(
+                    date=date,
+                    attendance=True,
+                    holiday='',
+                    begin=datetime.time(9, 0, 0),
+                    end=datetime.time(17, 0, 0),
+                    leave=datetime.time(12, 0, 0),
+                    back=datetime.time(13, 0, 0)
+                )
+            else:
+                BusinessCalendar.objects.create(
+                    date=date, attendance=False, holiday='定休日'
+                )
+        for day in (4, 5, 9, 10, 13):
+            date = datetime.date(2024, 1, day)
+            TimeRecord.objects.create(
+                date=date, time=datetime.time(8, 50, 0), username='user01', action='begin'
+            )
+            TimeRecord.objects.create(
+                date=date, time=datetime.time(9, 10, 0), username='user01', action='begin'
+            )
+            TimeRecord.objects.create(
+                date=date, time=datetime.time(18, 30, 0), username='user01', action='end'
+            )
+        TimeRecord.objects.create(
+            date=datetime.date(2024, 1, 4), time=datetime.time(10, 0, 0), username='user02', action='begin'
+        )
+        TimeRecord.objects.create(
+            date=datetime.date(2024, 1, 5), time=datetime.time(16, 0, 0), username='user02', action='end'
+        )
+        TimeOffRequest.objects.create(
+            date=datetime.date(2024, 1, 11),
+            username='user01',
+            display_name='有給休暇',
+            attendance=False,
+            accepted=True
+        )
+        TimeOffRequest.objects.create(
+            date=datetime.date(2024, 1, 12),
+            username='user02',
+            display_name='午前休',
+            attendance=True,
+            begin=datetime.time(13, 0, 0),
+            end=datetime.time(17, 0, 0),
+            accepted=False
+        )
+
+    def test_get_monthly_records_time_off_request(self):
+        records = get_monthly_records('user01', 2024, 1)
+        self.assertEqual(len(records), 31)
+        record = records[10]
+        self.assertEqual(record['holiday'], '休暇 (有給休暇)')
+        self.assertFalse(record['attendance'])
+        self.assertIsNone(record['error'])
+
+    def test_get_monthly_records_punches(self):
+        record = get_monthly_records('user01', 2024, 1)[3]
+        self.assertEqual(record, {
+            'date': datetime.date(2024, 1, 4),
+            'attendance': True,
+            'holiday': '',
+            'begin': datetime.time(9, 0, 0),
+            'end': datetime.time(17, 0, 0),
+            'leave': datetime.time(12, 0, 0),
+            'back': datetime.time(13, 0, 0),
+            'begin_record': datetime.time(8, 50, 0),
+            'end_record': datetime.time(18, 30, 0),
+            'work': True,
+            'behind': 0,
+            'early': 10,
+            'overtime': 90,
+            'error': None
+        })
+
+    def test_get_monthly_records_bulk(self):
+        usernames = ['user01', 'user02', 'user03']
+        with self.assertNumQueries(3):
+            results = get_monthly_records_bulk(usernames, 2024, 1)
+        self.assertEqual(list(results.keys()), usernames)
+        for username in usernames:
+            self.assertEqual(
+                results[username], get_monthly_records(username, 2024, 1)
+            )
+        self.assertEqual(results['user02'][3]['error'], '退勤がありません')
+        self.assertEqual(results['user02'][11]['holiday'], '休暇 (午前休) (承認待ち)')
+
+    def test_get_monthly_summaries_equals_monthly_records(self):
+        usernames = ['user01', 'user02', 'user03']
+        self.assertEqual(
+            get_monthly_summaries(usernames, 2024, 1),
+            {
+                username: summarize(get_monthly_records(username, 2024, 1))
+                for username in usernames
+            }
+        )
+
+    def test_get_monthly_summaries_num_queries(self):
+        with self.assertNumQueries(3):
+            get_monthly_summaries(['user01'], 2024, 1)
+        with self.assertNumQueries(3):
+            get_monthly_summaries(['user01', 'user02', 'user03'], 2024, 1)
+
+
+class TestTimeOffRequestCounts(TestCase):
+    def setUp(self):
+        timecard.settings.YEAR_FIRST_MONTH = 4
+        for username, date, display_name in [
+            ('user01', datetime.date(2024, 3, 29), '有給休暇'),
+            ('user01', datetime.date(2024, 4, 1), '有給休暇'),
+            ('user01', datetime.date(2025, 3, 31), '有給休暇'),
+            ('user01', datetime.date(2025, 3, 28), '午前休'),
+            ('user02', datetime.date(2024, 5, 1), '有給休暇'),
+            ('user03', datetime.date(2024, 5, 1), '有給休暇'),
+        ]:
+            TimeOffRequest.objects.create(
+                date=date, username=username, display_name=display_name, attendance=False
+            )
+
+    def test_count_by_year(self):
+        with self.assertNumQueries(1):
+            counts = count_time_off_requests_by_year(['user01', 'user02'], [2023, 2024])
+        self.assertEqual(counts, {
+            ('user01', 2023, '有給休暇'): 1,
+            ('user01', 2024, '有給休暇'): 2,
+            ('user01', 2024, '午前休'): 1,
+            ('user02', 2024, '有給休暇'): 1,
+        })
+
+    def test_count_by_year_equals_count(self):
+        counts = count_time_off_requests_by_year(['user01'], [2024])
+        for display_name, count in count_time_off_requests('user01', get_year_range(2024)).items():
+            self.assertEqual(counts[('user01', 2024, display_name)], count)
+
+    def test_count_by_year_empty(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(count_time_off_requests_by_year([], [2024]), {})
+
+
+class TestTimeOffMatrix(TestCase):
+    def setUp(self):
+        timecard.settings.YEAR_FIRST_MONTH = 4
+        User.objects.create(username='user01', last_name='山田', first_name='太郎')
+        User.objects.create(username='user02', last_name='佐藤')
+        User.objects.create(username='user03', is_active=False)
+        User.objects.create(username='admin', is_superuser=True)
+        for username, date, display_name in [
+            ('user01', datetime.date(2023, 5, 1), '有給休暇'),
+            ('user01', datetime.date(2024, 3, 29), '有給休暇'),
+            ('user01', datetime.date(2024, 4, 1), '午前休'),
+            ('user02', datetime.date(2024, 5, 1), '有給休暇'),
+            ('user02', datetime.date(2024, 5, 2), '有給休暇'),
+            ('user03', datetime.date(2024, 5, 1), '有給休暇'),
+            ('admin', datetime.date(2024, 5, 1), '特別休暇'),
+        ]:
+            TimeOffRequest.objects.create(
+                date=date, username=username, display_name=display_name, attendance=False
+            )
+
+    def test_single_year(self):
+        with self.assertNumQueries(1):
+            entries, display_names = get_time_off_matrix([2024])
+        self.assertEqual(display_names, ['午前休', '有給休暇'])
+        self.assertEqual(entries, [
+            {'id': 'user02', 'name': '佐藤', 'year': 2024, 'counts': {'有給休暇': 2}},
+            {'id': 'user01', 'name': '山田 太郎', 'year': 2024, 'counts': {'午前休': 1}},
+        ])
+
+    def test_multi_year(self):
+        with self.assertNumQueries(1):
+            entries, display_names = get_time_off_matrix([2023, 2024])
+        self.assertEqual(display_names, ['午前休', '有給休暇'])
+        self.assertEqual([(entry['id'], entry['year']) for entry in entries], [
+            ('user02', 2024), ('user01', 2023), ('user01', 2024)
+        ])
+        self.assertEqual(entries[1]['counts'], {'有給休暇': 2})
+
+    def test_equals_count(self):
+        entries, _ = get_time_off_matrix([2024])
+        for entry in entries:
+            self.assertEqual(entry['counts'], count_time_off_requests(entry['id'], get_year_range(2024)))
@@ -0,0 +1,148 @@
+import datetime
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+import timecard.settings
+from worktime import caches
+from worktime.forms import TimeOffRequestForm
+from worktime.materialized import get_monthly_summary, get_monthly_worktimes
+from worktime.models import (BusinessCalendar, DailyWorktime, Holiday,
+                             MonthlySummary, StandardWorkPattern,
+                             TimeOffPattern, TimeRecord)
+from worktime.queries import get_monthly_records
+from worktime.reference import (BUSINESS_CALENDAR, get_calendars,
+                                get_standard_work_patterns,
+                                get_time_off_patterns)
+
+
+class TestReferenceData(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        caches.local_values.clear()
+        caches.hits.clear()
+        caches.misses.clear()
+        date = datetime.date(2024, 3, 25)
+        while date < datetime.date(2024, 5, 10):
+            BusinessCalendar.objects.create(
+                date=date,
+                attendance=date.weekday() < 5,
+                holiday='' if date.weekday() < 5 else '定休日',
+                begin=datetime.time(9, 0, 0),
+                end=datetime.time(17, 30, 0)
+            )
+            date += datetime.timedelta(days=1)
+        TimeOffPattern.objects.create(id=2, display_name='午前休', attendance=True)
+        TimeOffPattern.objects.create(id=1, display_name='有給休暇', attendance=False)
+
+    def test_calendars(self):
+        date_range = (datetime.date(2024, 3, 30), datetime.date(2024, 5, 2))
+        with self.assertNumQueries(1):
+            calendars = get_calendars(date_range)
+        self.assertEqual(calendars[0]['date'], datetime.date(2024, 3, 30))
+        self.assertEqual(calendars[-1]['date'], datetime.date(2024, 5, 1))
+        self.assertEqual(len(calendars), 33)
+        self.assertEqual(calendars[0]['standard_minutes'], 510)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_calendars(date_range), calendars)
+            self.assertEqual(len(get_calendars((datetime.date(2024, 4, 1), datetime.date(2024, 5, 1)))), 30)
+        self.assertEqual(caches.get_statistics()[BUSINESS_CALENDAR], {'hits': 4, 'misses': 3})
+
+    def test_calendars_empty_range(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(get_calendars((datetime.date(2024, 4, 1), datetime.date(2024, 4, 1))), [])
+
+    def test_calendar_invalidate(self):
+        date_range = (datetime.date(2024, 4, 1), datetime.date(2024, 5, 1))
+        get_calendars(date_range)
+        calendar = BusinessCalendar.objects.get(date=datetime.date(2024, 4, 1))
+        calendar.attendance = False
+        calendar.holiday = '臨時休業'
+        calendar.save()
+        self.assertEqual(get_calendars(date_range)[0]['holiday'], '臨時休業')
+
+    def test_time_off_patterns(self):
+        self.assertEqual(list(get_time_off_patterns()), [1, 2])
+        with self.assertNumQueries(0):
+            form = TimeOffRequestForm()
+        self.assertEqual(form.fields['pattern_id'].choices, [(1, '有給休暇'), (2, '午前休')])
+        TimeOffPattern.objects.filter(id=2).first().delete()
+        self.assertEqual(list(get_time_off_patterns()), [1])
+
+    def test_standard_work_patterns(self):
+        for weekday in range(8):
+            StandardWorkPattern.objects.create(id=weekday, attendance=weekday < 5)
+        self.assertEqual(len(get_standard_work_patterns()), 8)
+        with self.assertNumQueries(0):
+            self.assertFalse(get_standard_work_patterns()[7].attendance)
+        pattern = StandardWorkPattern.objects.get(id=7)
+        pattern.attendance = True
+        pattern.save()
+        self.assertTrue(get_standard_work_patterns()[7].attendance)
+
+
+class TestVirtualCalendar(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        caches.local_values.clear()
+        self.addCleanup(setattr, timecard.settings, 'VIRTUAL_CALENDAR', getattr(timecard.settings, 'VIRTUAL_CALENDAR', False))
+        timecard.settings.VIRTUAL_CALENDAR = True
+        call_command('loaddata', 'standard-work-pattern.json', verbosity=0)
+        Holiday.objects.create(date=datetime.date(2024, 4, 29), name='昭和の日')
+        BusinessCalendar.objects.create(date=datetime.date(2024, 4, 2), attendance=False, holiday='臨時休業', customized=True)
+
+    def test_virtual_calendar(self):
+        calendars = {calendar['date']: calendar for calendar in get_calendars(
+            (datetime.date(2024, 4, 1), datetime.date(2024, 5, 1))
+        )}
+        self.assertEqual(len(calendars), 30)
+        self.assertTrue(calendars[datetime.date(2024, 4, 1)]['attendance'])
+        self.assertEqual(calendars[datetime.date(2024, 4, 1)]['standard_minutes'], 420)
+        self.assertEqual(calendars[datetime.date(2024, 4, 2)]['holiday'], '臨時休業')
+        self.assertEqual(calendars[datetime.date(2024, 4, 6)]['holiday'], '定休日')
+        self.assertEqual(calendars[datetime.date(2024, 4, 29)]['holiday'], '休日 (昭和の日)')
+
+        # 過去や将来の任意の期間を求められる
+        self.assertEqual(len(get_calendars((datetime.date(1999, 12, 1), datetime.date(2031, 1, 1)))), 11354)
+
+        # 登録済の日だけを使用
+        timecard.settings.VIRTUAL_CALENDAR = False
+        caches.invalidate(BUSINESS_CALENDAR)
+        self.assertEqual(len(get_calendars((datetime.date(2024, 4, 1), datetime.date(2024, 5, 1)))), 1)
+
+    def test_virtual_calendar_invalidate(self):
+        date_range = (datetime.date(2024, 4, 1), datetime.date(2024, 4, 2))
+        self.assertEqual(get_calendars(date_range)[0]['end'], datetime.time(17, 0))
+        pattern = StandardWorkPattern.objects.get(id=0)
+        pattern.end = datetime.time(18, 0)
+        pattern.save()
+        self.assertEqual(get_calendars(date_range)[0]['end'], datetime.time(18, 0))
+        Holiday.objects.create(date=datetime.date(2024, 4, 1), name='創立記念日')
+        self.assertFalse(get_calendars(date_range)[0]['attendance'])
+
+    def test_virtual_calendar_pattern_change(self):
+        TimeRecord.objects.create(date=datetime.date(2024, 4, 1), time=datetime.time(9, 0), username='user01', action='begin')
+        TimeRecord.objects.create(date=datetime.date(2024, 4, 1), time=datetime.time(17, 0), username='user01', action='end')
+        self.assertEqual(get_monthly_records('user01', 2024, 4)[0]['overtime'], 0)
+        self.assertEqual(get_monthly_worktimes('user01', 2024, 4)[0]['overtime'], 0)
+        get_monthly_summary('user01', 2024, 4)
+
+        # 勤務パターンの変更は打刻記録のキャッシュ、日次勤務実績、月次勤務集計に反映
+        pattern = StandardWorkPattern.objects.get(id=0)
+        pattern.end = datetime.time(16, 0)
+        pattern.save()
+        record = get_monthly_records('user01', 2024, 4)[0]
+        self.assertEqual((record['end'], record['overtime']), (datetime.time(16, 0), 60))
+        self.assertEqual(get_monthly_worktimes('user01', 2024, 4)[0]['overtime'], 60)
+        self.assertFalse(MonthlySummary.objects.exists())
+        self.assertEqual(get_monthly_summary('user01', 2024, 4)['overtime_minutes'], 60)
+
+    def test_virtual_calendar_backfill(self):
+        BusinessCalendar.objects.all().delete()
+        TimeRecord.objects.create(date=datetime.date(2024, 4, 1), time=datetime.time(9, 0), username='user01', action='begin')
+        stdout = StringIO()
+        call_command('backfill_daily_worktime', '--to', '2024-04', stdout=stdout)
+        self.assertIn('2024-04 1 users', stdout.getvalue())
+        self.assertEqual(DailyWorktime.objects.filter(username='user01').count(), 30)
@@ -2,7 +2,8 @@ import datetime
 
 from django.test import TestCase
 
-from worktime.rules import worktime_calculation
+from worktime.models import BusinessCalendar
+from worktime.rules import get_schedule_minutes, worktime_calculation
 
 
 class TestWorktimeCalculationRulesValidations(TestCase):
@@ -169,3 +170,42 @@ class TestWorktimeCalculationRulesCalculations(TestCase):
         result1 = worktime_calculation(obj1)
         result2 = worktime_calculation(obj2)
         self.assertEqual(result1['behind']-result2['behind'], 60)
+
+    def test_stored_minutes(self):
+        obj1 = self.get_attendance()
+        obj1['begin_record'] = datetime.time(9, 30, 0)
+        obj1['end_record'] = datetime.time(18, 0, 0)
+        obj2 = dict(obj1, **get_schedule_minutes(obj1['begin'], obj1['end'], obj1['leave'], obj1['back']))
+        self.assertEqual(obj2['standard_minutes'], 420)
+        self.assertEqual(
+            worktime_calculation(obj1),
+            worktime_calculation(obj2)
+        )
+
+
+class TestScheduleMinutes(TestCase):
+    def test_schedule_minutes(self):
+        self.assertEqual(
+            get_schedule_minutes(datetime.time(9, 0, 0), datetime.time(17, 30, 0), None, None), {
+                'begin_minutes': 540, 'end_minutes': 1050, 'leave_minutes': None, 'back_minutes': None, 'standard_minutes': 510
+            }
+        )
+        self.assertIsNone(get_schedule_minutes(None, None, None, None)['standard_minutes'])
+
+    def test_sync_on_save(self):
+        calendar = BusinessCalendar.objects.create(
+            date=datetime.date(2024, 1, 4),
+            attendance=True,
+            begin=datetime.time(9, 0, 0),
+            end=datetime.time(17, 0, 0),
+            leave=datetime.time(12, 0, 0),
+            back=datetime.time(13, 0, 0)
+        )
+        calendar.refresh_from_db()
+        self.assertEqual(calendar.standard_minutes, 420)
+        calendar.leave = None
+        calendar.back = None
+        calendar.save(update_fields=['leave', 'back'])
+        calendar.refresh_from_db()
+        self.assertEqual(calendar.leave_minutes, None)
+        self.assertEqual(calendar.standard_minutes, 480)
@@ -0,0 +1,180 @@
+import datetime
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+
+from worktime import caches
+from worktime.materialized import get_monthly_worktimes
+from worktime.models import (BusinessCalendar, DailyWorktime,
+                             ScheduleAssignment, TimeRecord, WorkSchedule,
+                             WorkSchedulePattern)
+from worktime.queries import get_monthly_records, get_records_bulk
+from worktime.schedules import ScheduleIndex, get_schedule_index
+
+
+def create_schedule(display_name, begin, end, days=range(5)):
+    """指定した曜日に勤務する勤務スケジュールを作成します。
+    """
+    schedule = WorkSchedule.objects.create(display_name=display_name)
+    for day in range(8):
+        if day in days:
+            WorkSchedulePattern.objects.create(schedule=schedule, day=day, attendance=True, begin=begin, end=end)
+        else:
+            WorkSchedulePattern.objects.create(schedule=schedule, day=day, attendance=False)
+    return schedule
+
+
+def create_calendar(year, month):
+    """勤務パターンから 1 か月分の営業日カレンダを作成します。
+    """
+    call_command('loaddata', 'standard-work-pattern.json', verbosity=0)
+    date = datetime.date(year, month, 1)
+    while date.month == month:
+        attendance = date.weekday() < 5
+        BusinessCalendar.objects.create(
+            date=date,
+            attendance=attendance,
+            holiday='' if attendance else '定休日',
+            begin=datetime.time(9, 0, 0) if attendance else None,
+            end=datetime.time(17, 0, 0) if attendance else None,
+            leave=datetime.time(12, 0, 0) if attendance else None,
+            back=datetime.time(13, 0, 0) if attendance else None
+        )
+        date += datetime.timedelta(days=1)
+
+
+class TestScheduleIndex(TestCase):
+    def setUp(self):
+        self.index = ScheduleIndex([
+            ('user01', datetime.date(2024, 4, 1), None, 2),
+            ('user01', datetime.date(2024, 1, 1), datetime.date(2024, 1, 31), 1),
+            ('user02', datetime.date(2024, 1, 10), datetime.date(2024, 1, 20), 1),
+        ], {1: {}, 2: {}})
+
+    def test_lookup(self):
+        self.assertIsNone(self.index.lookup('user01', datetime.date(2023, 12, 31)))
+        self.assertEqual(self.index.lookup('user01', datetime.date(2024, 1, 1)), 1)
+        self.assertEqual(self.index.lookup('user01', datetime.date(2024, 1, 31)), 1)
+        self.assertIsNone(self.index.lookup('user01', datetime.date(2024, 2, 1)))
+        self.assertEqual(self.index.lookup('user01', datetime.date(2030, 1, 1)), 2)
+        self.assertIsNone(self.index.lookup('user03', datetime.date(2024, 1, 15)))
+
+    def test_find(self):
+        self.assertEqual(self.index.find('user01', (datetime.date(2024, 1, 15), datetime.date(2024, 5, 1))), [
+            (datetime.date(2024, 1, 15), datetime.date(2024, 2, 1), 1),
+            (datetime.date(2024, 4, 1), datetime.date(2024, 5, 1), 2),
+        ])
+        self.assertEqual(self.index.find('user02', (datetime.date(2024, 2, 1), datetime.date(2024, 3, 1))), [])
+        self.assertEqual(self.index.find('user03', (datetime.date(2024, 1, 1), datetime.date(2024, 2, 1))), [])
+
+    def test_overlap(self):
+        schedule = WorkSchedule.objects.create(display_name='早番')
+        ScheduleAssignment.objects.create(
+            username='user01', schedule=schedule, valid_from=datetime.date(2024, 1, 1), valid_to=datetime.date(2024, 1, 31)
+        )
+        with self.assertRaises(ValidationError):
+            ScheduleAssignment(username='user01', schedule=schedule, valid_from=datetime.date(2024, 1, 31)).clean()
+        with self.assertRaises(ValidationError):
+            ScheduleAssignment(
+                username='user01', schedule=schedule, valid_from=datetime.date(2024, 2, 10), valid_to=datetime.date(2024, 2, 1)
+            ).clean()
+        ScheduleAssignment(username='user01', schedule=schedule, valid_from=datetime.date(2024, 2, 1)).clean()
+        ScheduleAssignment(username='user02', schedule=schedule, valid_from=datetime.date(2024, 1, 1)).clean()
+
+
+class TestWorkSchedule(TestCase):
+    def setUp(self):
+        create_calendar(2024, 1)
+        BusinessCalendar.objects.filter(date=datetime.date(2024, 1, 8)).update(
+            attendance=False, holiday='休日 (成人の日)', begin=None, end=None, leave=None, back=None,
+            begin_minutes=None, end_minutes=None, leave_minutes=None, back_minutes=None, standard_minutes=None
+        )
+        self.late = create_schedule('遅番', datetime.time(13, 0, 0), datetime.time(21, 0, 0), days=[2, 3, 4, 5, 6])
+        ScheduleAssignment.objects.create(
+            username='user01', schedule=self.late, valid_from=datetime.date(2024, 1, 10), valid_to=datetime.date(2024, 1, 20)
+        )
+        for username in ('user01', 'user02'):
+            TimeRecord.objects.create(
+                date=datetime.date(2024, 1, 13), time=datetime.time(13, 0, 0), username=username, action='begin'
+            )
+            TimeRecord.objects.create(
+                date=datetime.date(2024, 1, 13), time=datetime.time(21, 30, 0), username=username, action='end'
+            )
+
+    def test_records(self):
+        results = get_records_bulk(['user01', 'user02'], (datetime.date(2024, 1, 1), datetime.date(2024, 2, 1)))
+        user01 = {record['date']: record for record in results['user01']}
+        user02 = {record['date']: record for record in results['user02']}
+
+        # 割当の期間外は営業日カレンダに従う
+        self.assertEqual(user01[datetime.date(2024, 1, 9)], user02[datetime.date(2024, 1, 9)])
+        self.assertEqual(user01[datetime.date(2024, 1, 22)]['begin'], datetime.time(9, 0, 0))
+
+        # 割当の期間内は個人の勤務パターンに従う
+        self.assertFalse(user01[datetime.date(2024, 1, 15)]['attendance'])
+        self.assertEqual(user01[datetime.date(2024, 1, 15)]['holiday'], '定休日')
+        self.assertEqual(user01[datetime.date(2024, 1, 10)]['begin'], datetime.time(13, 0, 0))
+        self.assertIsNone(user01[datetime.date(2024, 1, 10)]['leave'])
+        saturday = user01[datetime.date(2024, 1, 13)]
+        self.assertTrue(saturday['attendance'])
+        self.assertEqual((saturday['behind'], saturday['overtime']), (0, 30))
+        self.assertFalse(user02[datetime.date(2024, 1, 13)]['attendance'])
+        self.assertEqual(user02[datetime.date(2024, 1, 13)]['overtime'], 510)
+        self.assertEqual(
+            get_records_bulk(['user01'], (datetime.date(2024, 1, 1), datetime.date(2024, 2, 1)), 'numpy')['user01'],
+            results['user01']
+        )
+
+    def test_holiday(self):
+        ScheduleAssignment.objects.create(username='user02', schedule=self.late, valid_from=datetime.date(2024, 1, 1))
+        records = get_records_bulk(['user02'], (datetime.date(2024, 1, 1), datetime.date(2024, 2, 1)))['user02']
+
+        # 営業日カレンダの祝日は祝日の勤務パターンを適用し、休業理由を引き継ぐ
+        self.assertFalse(records[7]['attendance'])
+        self.assertEqual(records[7]['holiday'], '休日 (成人の日)')
+
+        # 勤務パターンのない曜日は営業日カレンダに従う
+        WorkSchedulePattern.objects.filter(schedule=self.late, day=2).delete()
+        records = get_records_bulk(['user02'], (datetime.date(2024, 1, 1), datetime.date(2024, 2, 1)))['user02']
+        self.assertEqual(records[2]['begin'], datetime.time(9, 0, 0))
+        self.assertEqual(records[3]['begin'], datetime.time(13, 0, 0))
+
+
+class TestWorkScheduleCache(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        caches.local_values.clear()
+        create_calendar(2024, 1)
+        self.late = create_schedule('遅番', datetime.time(13, 0, 0), datetime.time(21, 0, 0))
+
+    def test_index_cached(self):
+        get_schedule_index()
+        with self.assertNumQueries(0):
+            get_schedule_index()
+
+    def test_invalidate_assignment(self):
+        self.assertEqual(get_monthly_records('user01', 2024, 1)[9]['begin'], datetime.time(9, 0, 0))
+        self.assertEqual(len(get_monthly_worktimes('user01', 2024, 1)), 31)
+        assignment = ScheduleAssignment.objects.create(
+            username='user01', schedule=self.late, valid_from=datetime.date(2024, 1, 10)
+        )
+        self.assertEqual(get_monthly_records('user01', 2024, 1)[9]['begin'], datetime.time(13, 0, 0))
+        self.assertEqual(DailyWorktime.objects.filter(username='user01').count(), 9)
+        self.assertEqual(get_monthly_worktimes('user01', 2024, 1)[9]['begin'], datetime.time(13, 0, 0))
+
+        # 変更前の期間も再計算
+        assignment.valid_from = datetime.date(2024, 1, 20)
+        assignment.save()
+        self.assertEqual(get_monthly_records('user01', 2024, 1)[9]['begin'], datetime.time(9, 0, 0))
+        self.assertEqual(get_monthly_worktimes('user01', 2024, 1)[9]['begin'], datetime.time(9, 0, 0))
+
+    def test_invalidate_pattern(self):
+        ScheduleAssignment.objects.create(username='user01', schedule=self.late, valid_from=datetime.date(2024, 1, 1))
+        self.assertEqual(get_monthly_worktimes('user01', 2024, 1)[1]['end'], datetime.time(21, 0, 0))
+        pattern = WorkSchedulePattern.objects.get(schedule=self.late, day=1)
+        pattern.end = datetime.time(22, 0, 0)
+        pattern.save()
+        self.assertEqual(get_monthly_records('user01', 2024, 1)[1]['end'], datetime.time(22, 0, 0))
+        self.assertEqual(get_monthly_worktimes('user01', 2024, 1)[1]['end'], datetime.time(22, 0, 0))
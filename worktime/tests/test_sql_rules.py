@@ -0,0 +1,151 @@
+import datetime
+import random
+
+from django.core.management import call_command
+from django.test import TestCase
+
+import timecard.settings
+
+from worktime.models import (BusinessCalendar, ScheduleAssignment,
+                             TimeOffRequest, TimeRecord, WorkSchedule,
+                             WorkSchedulePattern)
+from worktime.queries import get_monthly_summaries, get_records_bulk
+from worktime.rules import summarize
+from worktime.sql_rules import evaluate_worktimes, get_summaries
+
+
+class TestSqlRules(TestCase):
+    def random_time(self, rng, hours):
+        return datetime.time(rng.choice(hours), rng.randrange(60), rng.randrange(60))
+
+    def setUp(self):
+        rng = random.Random(0)
+        today = datetime.datetime.now().date()
+        self.usernames = ['user{:02d}'.format(i) for i in range(6)]
+        self.date_range = (today - datetime.timedelta(days=20), today + datetime.timedelta(days=5))
+        date = self.date_range[0]
+        while date < self.date_range[1]:
+            if date.weekday() < 5:
+                split = rng.random() < 0.7
+                BusinessCalendar.objects.create(
+                    date=date,
+                    attendance=True,
+                    holiday='',
+                    begin=datetime.time(9, 0, 0),
+                    end=datetime.time(17, 30, 0),
+                    leave=datetime.time(12, 0, 0) if split else None,
+                    back=datetime.time(13, 0, 0) if split else None
+                )
+            else:
+                BusinessCalendar.objects.create(date=date, attendance=False, holiday='定休日')
+            for username in self.usernames:
+                if rng.random() < 0.8:
+                    TimeRecord.objects.create(
+                        date=date, time=self.random_time(rng, range(7, 14)), username=username, action='begin'
+                    )
+                if rng.random() < 0.8:
+                    TimeRecord.objects.create(
+                        date=date, time=self.random_time(rng, range(8, 22)), username=username, action='end'
+                    )
+                if rng.random() < 0.1:
+                    accepted = rng.random() < 0.7
+                    if rng.random() < 0.5:
+                        TimeOffRequest.objects.create(
+                            date=date, username=username, display_name='有給休暇', attendance=False, accepted=accepted
+                        )
+                    else:
+                        TimeOffRequest.objects.create(
+                            date=date,
+                            username=username,
+                            display_name='午前休',
+                            attendance=True,
+                            begin=datetime.time(13, 0, 0),
+                            end=datetime.time(17, 30, 0),
+                            accepted=accepted
+                        )
+            date += datetime.timedelta(days=1)
+
+    def test_evaluate_worktimes(self):
+        expected = get_records_bulk(self.usernames, self.date_range)
+        actual = evaluate_worktimes(self.usernames, self.date_range)
+        for username in self.usernames:
+            self.assertEqual(len(actual[username]), len(expected[username]))
+            for record in expected[username]:
+                self.assertEqual(actual[username][record['date']], {
+                    'work': record['work'],
+                    'behind': record['behind'],
+                    'early': record['early'],
+                    'overtime': record['overtime'],
+                    'error': record['error'],
+                }, record)
+
+    def test_summaries(self):
+        records = get_records_bulk(self.usernames + ['nobody'], self.date_range)
+        with self.assertNumQueries(1):
+            actual = get_summaries(self.usernames + ['nobody'], self.date_range)
+        for username in self.usernames + ['nobody']:
+            self.assertEqual(actual[username], summarize(records[username]))
+
+    def test_monthly_summaries_engine(self):
+        today = datetime.datetime.now().date()
+        self.assertEqual(
+            get_monthly_summaries(self.usernames, today.year, today.month, 'sql'),
+            get_monthly_summaries(self.usernames, today.year, today.month)
+        )
+
+    def test_virtual_calendar(self):
+        self.addCleanup(setattr, timecard.settings, 'VIRTUAL_CALENDAR', getattr(timecard.settings, 'VIRTUAL_CALENDAR', False))
+        timecard.settings.VIRTUAL_CALENDAR = True
+        call_command('loaddata', 'standard-work-pattern.json', verbosity=0)
+        BusinessCalendar.objects.filter(date__gte=self.date_range[0] + datetime.timedelta(days=10)).delete()
+        expected = get_records_bulk(self.usernames, self.date_range)
+        actual = evaluate_worktimes(self.usernames, self.date_range)
+        for username in self.usernames:
+            self.assertEqual(len(actual[username]), (self.date_range[1] - self.date_range[0]).days)
+            for record in expected[username]:
+                self.assertEqual(actual[username][record['date']], {
+                    'work': record['work'],
+                    'behind': record['behind'],
+                    'early': record['early'],
+                    'overtime': record['overtime'],
+                    'error': record['error'],
+                }, record)
+
+    def test_work_schedule(self):
+        call_command('loaddata', 'standard-work-pattern.json', verbosity=0)
+        schedule = WorkSchedule.objects.create(display_name='遅番')
+        for day in range(8):
+            if day in (1, 2, 3, 5, 6):
+                WorkSchedulePattern.objects.create(
+                    schedule=schedule, day=day, attendance=True,
+                    begin=datetime.time(13, 0, 0), end=datetime.time(21, 0, 0),
+                    leave=datetime.time(17, 0, 0), back=datetime.time(17, 30, 0)
+                )
+            elif day != 4:
+                WorkSchedulePattern.objects.create(schedule=schedule, day=day, attendance=False)
+        ScheduleAssignment.objects.create(
+            username=self.usernames[0], schedule=schedule, valid_from=self.date_range[0] + datetime.timedelta(days=3)
+        )
+        ScheduleAssignment.objects.create(
+            username=self.usernames[1], schedule=schedule, valid_from=self.date_range[0],
+            valid_to=self.date_range[0] + datetime.timedelta(days=12)
+        )
+        expected = get_records_bulk(self.usernames, self.date_range)
+        actual = evaluate_worktimes(self.usernames, self.date_range)
+        for username in self.usernames:
+            for record in expected[username]:
+                self.assertEqual(actual[username][record['date']], {
+                    'work': record['work'],
+                    'behind': record['behind'],
+                    'early': record['early'],
+                    'overtime': record['overtime'],
+                    'error': record['error'],
+                }, record)
+        self.assertEqual(
+            get_summaries(self.usernames, self.date_range),
+            {username: summarize(records) for username, records in expected.items()}
+        )
+
+    def test_no_users(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(get_summaries([], self.date_range), {})
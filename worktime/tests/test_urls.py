@@ -5,6 +5,7 @@ from worktime.views import (PasswordChange, ReadmeView, TimeOffListView,
                             TimeOffRequestView, TimeOffStatusView,
                             TimeRecordCalendarView, TimeRecordSummaryView,
                             TimeRecordView, UserLogin, UserLogout,
+                            api_record, api_record_summary_all,
                             time_off_accept, time_off_cancel)
 
 
@@ -80,3 +81,15 @@ class TestUrls(TestCase):
             resolve(reverse('worktime:readme')).func.view_class,
             ReadmeView
         )
+
+    def test_api_record_url(self):
+        self.assertEqual(
+            resolve(reverse('worktime:api_record')).func,
+            api_record
+        )
+
+    def test_api_record_summary_all_url(self):
+        self.assertEqual(
+            resolve(reverse('worktime:api_record_summary_all')).func,
+            api_record_summary_all
+        )
@@ -2,11 +2,15 @@ import datetime
 from decimal import ROUND_CEILING, Decimal
 
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
 
 import timecard.settings
+from worktime import caches
+from worktime.models import TimeRecord
 from worktime.utils import (delta, display_name, get_first_day_of_year,
-                            get_users, get_year_range, minutes_to_hours)
+                            get_month_range, get_user_directory, get_users,
+                            get_year_range, minutes_to_hours)
 
 
 class TestUserUtils(TestCase):
@@ -57,6 +61,58 @@ class TestUserUtils(TestCase):
         )
 
 
+class TestUserDirectory(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        caches.local_values.clear()
+        User.objects.create(username='user02', first_name='太郎', last_name='山田')
+        User.objects.create(username='user01', first_name='花子', last_name='佐藤')
+        User.objects.create(username='user03', is_active=False)
+        User.objects.create(username='staff01', is_staff=True)
+        User.objects.create(username='admin', is_superuser=True)
+
+    def test_get_users_cached(self):
+        expected = {
+            'staff01': 'staff01', 'user01': '佐藤 花子', 'user02': '山田 太郎', 'user03': 'user03 *'
+        }
+        self.assertEqual(get_users(False), expected)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_users(False), expected)
+            self.assertEqual(get_users(True, ['user01', 'user03']), {'user01': '佐藤 花子'})
+            self.assertTrue(get_user_directory()['staff01']['is_staff'])
+
+    def test_invalidate_on_save(self):
+        get_users(False)
+        user = User.objects.get(username='user03')
+        user.is_active = True
+        user.last_name = '鈴木'
+        user.save()
+        self.assertEqual(list(get_users(True)), ['staff01', 'user01', 'user02', 'user03'])
+
+    def test_invalidate_on_delete(self):
+        get_users(False)
+        User.objects.get(username='user01').delete()
+        self.assertNotIn('user01', get_users(False))
+
+    def test_ignore_last_login(self):
+        get_users(False)
+        user = User.objects.get(username='user01')
+        user.last_login = datetime.datetime(2024, 4, 1, tzinfo=datetime.timezone.utc)
+        user.save(update_fields=['last_login'])
+        with self.assertNumQueries(0):
+            get_users(False)
+
+    def test_display_username(self):
+        record = TimeRecord.objects.create(
+            date=datetime.date(2024, 4, 1), time=datetime.time(9, 0, 0), username='user02', action='begin'
+        )
+        get_users(False)
+        with self.assertNumQueries(0):
+            self.assertEqual(record.display_username(), '山田 太郎')
+        record.username = 'nobody'
+        self.assertIsNone(record.display_username())
+
+
 class TestDateTimeUtils(TestCase):
     def test_get_first_day_of_year_1(self):
         timecard.settings.YEAR_FIRST_MONTH = 1
@@ -102,6 +158,20 @@ class TestDateTimeUtils(TestCase):
             )
         )
 
+    def test_get_month_range(self):
+        self.assertEqual(
+            get_month_range(2024, 2), (
+                datetime.date(2024, 2, 1),
+                datetime.date(2024, 3, 1)
+            )
+        )
+        self.assertEqual(
+            get_month_range(2024, 12), (
+                datetime.date(2024, 12, 1),
+                datetime.date(2025, 1, 1)
+            )
+        )
+
     def test_delta(self):
         self.assertEqual(
             delta(
@@ -0,0 +1,102 @@
+import datetime
+import random
+
+from django.test import TestCase
+
+from worktime.models import BusinessCalendar, TimeOffRequest, TimeRecord
+from worktime.queries import get_records_bulk
+from worktime.rules import worktime_calculation
+from worktime.vectorized import calculate_records
+
+
+class TestVectorizedWorktimeCalculation(TestCase):
+    def random_time(self, rng, hours):
+        if rng.random() < 0.2:
+            return None
+        return datetime.time(rng.choice(hours), rng.randrange(60), rng.randrange(60), rng.choice([0, 500000]))
+
+    def random_record(self, rng, today):
+        record = {
+            'date': today + datetime.timedelta(days=rng.choice([-2, -1, 0, 1, 2])),
+            'holiday': '',
+            'attendance': rng.random() < 0.7,
+            'begin': None,
+            'end': None,
+            'leave': None,
+            'back': None,
+            'begin_record': self.random_time(rng, range(6, 20)),
+            'end_record': self.random_time(rng, range(6, 24)),
+        }
+        if record['attendance'] or rng.random() < 0.5:
+            record['begin'] = datetime.time(rng.choice([8, 9, 10]), rng.choice([0, 30]))
+            record['end'] = datetime.time(rng.choice([15, 17, 18]), rng.choice([0, 30]))
+            if rng.random() < 0.6:
+                record['leave'] = datetime.time(12, 0)
+                record['back'] = datetime.time(13, rng.choice([0, 15]))
+        if rng.random() < 0.05 and record['begin_record'] is not None:
+            # 同じ分の中で出勤と退勤の順序が逆
+            record['end_record'] = record['begin_record'].replace(second=0, microsecond=0)
+        return record
+
+    def test_identical_to_scalar(self):
+        rng = random.Random(0)
+        today = datetime.datetime.now().date()
+        records = [self.random_record(rng, today) for _ in range(5000)]
+        expected = []
+        for record in records:
+            expected.append(dict(record, **worktime_calculation(record)))
+        calculate_records(records, today)
+        for actual, record in zip(records, expected):
+            self.assertEqual(actual, record)
+            for field in ['work', 'behind', 'early', 'overtime']:
+                self.assertIs(type(actual[field]), type(record[field]))
+
+    def test_empty(self):
+        records = []
+        calculate_records(records)
+        self.assertEqual(records, [])
+
+
+class TestRecordsBulkEngine(TestCase):
+    def setUp(self):
+        today = datetime.datetime.now().date()
+        self.date_range = (today - datetime.timedelta(days=10), today + datetime.timedelta(days=5))
+        date = self.date_range[0]
+        while date < self.date_range[1]:
+            BusinessCalendar.objects.create(
+                date=date,
+                attendance=date.weekday() < 5,
+                holiday='' if date.weekday() < 5 else '定休日',
+                begin=datetime.time(9, 0, 0) if date.weekday() < 5 else None,
+                end=datetime.time(17, 0, 0) if date.weekday() < 5 else None,
+                leave=datetime.time(12, 0, 0) if date.weekday() < 5 else None,
+                back=datetime.time(13, 0, 0) if date.weekday() < 5 else None
+            )
+            date += datetime.timedelta(days=1)
+        for days in range(1, 8):
+            TimeRecord.objects.create(
+                date=today - datetime.timedelta(days=days), time=datetime.time(8, 50 + days, 0), username='user01', action='begin'
+            )
+            if days != 3:
+                TimeRecord.objects.create(
+                    date=today - datetime.timedelta(days=days), time=datetime.time(16 + days % 3, 30, 0), username='user01', action='end'
+                )
+        TimeOffRequest.objects.create(
+            date=today - datetime.timedelta(days=8),
+            username='user01',
+            display_name='午前休',
+            attendance=True,
+            begin=datetime.time(13, 0, 0),
+            end=datetime.time(17, 0, 0),
+            accepted=True
+        )
+
+    def test_numpy_engine(self):
+        self.assertEqual(
+            get_records_bulk(['user01', 'user02'], self.date_range, 'numpy'),
+            get_records_bulk(['user01', 'user02'], self.date_range, 'python')
+        )
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            get_records_bulk(['user01'], self.date_range, 'fortran')
@@ -1,5 +1,13 @@
+import datetime
+
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+import timecard.settings
+from worktime.models import TimeOffPattern, TimeOffRequest, TimeRecord
 
 
 class TestNotLoggedInView(TestCase):
@@ -76,9 +84,19 @@ class TestNotLoggedInView(TestCase):
         response = self.client.get('/worktime/api/record/summary/')
         self.assertEqual(response.status_code, 403)
 
+    def test_not_logged_in_api_record_summary_all_status_code(self):
+        response = self.client.get('/worktime/api/record/summary/all/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_not_logged_in_api_record_status_code(self):
+        response = self.client.post('/worktime/api/record/', {'action': 'begin'})
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(TimeRecord.objects.exists())
+
 
 class TestUserLoggedInView(TestCase):
     def setUp(self):
+        cache.clear()
         user = User.objects.create(
             username='user01', password='12345678', email='user01@example.com'
         )
@@ -116,6 +134,118 @@ class TestUserLoggedInView(TestCase):
         response = self.client.get('/worktime/record/')
         self.assertEqual(response.status_code, 200)
 
+    def test_user_record_location(self):
+        self.addCleanup(setattr, timecard.settings, 'LOCATION_ORIGIN', timecard.settings.LOCATION_ORIGIN)
+        origin = timecard.settings.LOCATION_ORIGIN = (35.681236, 139.767125)
+        response = self.client.post('/worktime/record/', {
+            'action': 'begin',
+            'latitude': str(origin[0]),
+            'longitude': str(origin[1]),
+            'accuracy': '10',
+            'ua': 'test'
+        })
+        self.assertRedirects(response, '/worktime/record/')
+        record = TimeRecord.objects.get(username='user01')
+        self.assertEqual(record.location_status, 'inside')
+        self.assertAlmostEqual(record.distance, 0)
+
+    def test_user_api_record(self):
+        response = self.client.post('/worktime/api/record/', {
+            'action': 'begin',
+            'latitude': '',
+            'longitude': '',
+            'accuracy': '',
+            'ua': 'test'
+        })
+        self.assertEqual(response.status_code, 201)
+        record = TimeRecord.objects.get(username='user01')
+        self.assertEqual(response.json(), {
+            'id': record.id,
+            'action': 'begin',
+            'label': '出勤',
+            'date': record.date.isoformat(),
+            'time': record.time.strftime('%H:%M:%S'),
+            'location_status': None,
+        })
+        self.assertEqual(record.ua, 'test')
+
+    def test_user_api_record_json(self):
+        self.addCleanup(setattr, timecard.settings, 'LOCATION_ORIGIN', timecard.settings.LOCATION_ORIGIN)
+        origin = timecard.settings.LOCATION_ORIGIN = (35.681236, 139.767125)
+        response = self.client.post('/worktime/api/record/', {
+            'action': 'end',
+            'latitude': origin[0],
+            'longitude': origin[1],
+            'accuracy': 10,
+            'ua': None
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['location_status'], 'inside')
+        record = TimeRecord.objects.get(username='user01')
+        self.assertEqual(record.action, 'end')
+        self.assertAlmostEqual(record.distance, 0)
+
+    def test_user_api_record_invalid(self):
+        for data, content_type in [
+            ({'ua': 'test'}, 'application/x-www-form-urlencoded'),
+            ({'action': 'lunch'}, 'application/json'),
+            ({'action': 'begin', 'latitude': 'north'}, 'application/json'),
+            (['begin'], 'application/json'),
+        ]:
+            with self.subTest(data=data):
+                if content_type == 'application/json':
+                    response = self.client.post('/worktime/api/record/', data, content_type=content_type)
+                else:
+                    response = self.client.post('/worktime/api/record/', data)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('errors', response.json())
+        self.assertFalse(TimeRecord.objects.exists())
+
+    def test_user_record_idempotency_key(self):
+        data = {'action': 'begin', 'ua': 'test', 'idempotency_key': 'key01'}
+        for _ in range(2):
+            response = self.client.post('/worktime/record/', data, follow=True)
+            self.assertEqual(
+                [str(message) for message in response.context['messages']], ['出勤の打刻が完了しました']
+            )
+        self.assertEqual(TimeRecord.objects.filter(username='user01').count(), 1)
+
+        # 画面の表示ごとに異なる冪等キー
+        keys = set(
+            self.client.get('/worktime/record/').context['form'].initial['idempotency_key'] for _ in range(2)
+        )
+        self.assertEqual(len(keys), 2)
+
+    def test_user_api_record_idempotency_key(self):
+        data = {'action': 'begin', 'idempotency_key': 'key01'}
+        first = self.client.post('/worktime/api/record/', data, content_type='application/json')
+        self.assertEqual(first.status_code, 201)
+
+        # 再送はキャッシュから応答し、データベースに書き込まない
+        with CaptureQueriesContext(connection) as context:
+            retry = self.client.post('/worktime/api/record/', data, content_type='application/json')
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.json(), first.json())
+        self.assertFalse([query for query in context.captured_queries if 'worktime_timerecord' in query['sql']])
+
+        # キャッシュから消えた場合は一意制約で登録済の打刻を返す
+        cache.clear()
+        retry = self.client.post(
+            '/worktime/api/record/', {'action': 'begin'}, HTTP_IDEMPOTENCY_KEY='key01'
+        )
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(TimeRecord.objects.filter(username='user01').count(), 1)
+
+        # 異なる冪等キーは別の打刻
+        response = self.client.post('/worktime/api/record/', {'action': 'end', 'idempotency_key': 'key02'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(TimeRecord.objects.filter(username='user01').count(), 2)
+
+    def test_user_api_record_get_status_code(self):
+        response = self.client.get('/worktime/api/record/')
+        self.assertEqual(response.status_code, 405)
+
     def test_user_record_calendar_status_code(self):
         response = self.client.get('/worktime/record/calendar/')
         self.assertEqual(response.status_code, 200)
@@ -136,6 +266,10 @@ class TestUserLoggedInView(TestCase):
         response = self.client.get('/worktime/api/record/summary/')
         self.assertEqual(response.status_code, 403)
 
+    def test_user_api_record_summary_all_status_code(self):
+        response = self.client.get('/worktime/api/record/summary/all/')
+        self.assertEqual(response.status_code, 403)
+
 
 class TestStaffLoggedInView(TestCase):
     def setUp(self):
@@ -198,6 +332,10 @@ class TestStaffLoggedInView(TestCase):
         response = self.client.get('/worktime/api/record/summary/')
         self.assertEqual(response.status_code, 200)
 
+    def test_staff_api_record_summary_all_status_code(self):
+        response = self.client.get('/worktime/api/record/summary/all/')
+        self.assertEqual(response.status_code, 200)
+
 
 class TestStaffAndSuperUserLoggedInView(TestCase):
     def setUp(self):
@@ -260,3 +398,116 @@ class TestStaffAndSuperUserLoggedInView(TestCase):
     def test_superuser_api_record_summary_status_code(self):
         response = self.client.get('/worktime/api/record/summary/')
         self.assertEqual(response.status_code, 200)
+
+    def test_superuser_api_record_summary_all_status_code(self):
+        response = self.client.get('/worktime/api/record/summary/all/')
+        self.assertEqual(response.status_code, 200)
+
+
+class TestTimeOffRequestView(TestCase):
+    def setUp(self):
+        user = User.objects.create(
+            username='user01', password='12345678', email='user01@example.com'
+        )
+        self.client.force_login(user)
+        TimeOffPattern.objects.create(
+            id=1, display_name='有給休暇', attendance=False
+        )
+
+    def test_duplicate_request(self):
+        data = {'request_date': '2024-01-04', 'pattern_id': '1', 'contact': ''}
+        response = self.client.post('/worktime/time_off/request/', data)
+        self.assertRedirects(response, '/worktime/time_off/request/')
+        response = self.client.post('/worktime/time_off/request/', data)
+        self.assertEqual(response.status_code, 200)
+        self.assertFormError(
+            response.context['form'], 'request_date', '指定した日には既に申請が存在します'
+        )
+        self.assertEqual(TimeOffRequest.objects.filter(username='user01').count(), 1)
+
+
+class TestTimeOffListView(TestCase):
+    # 休暇承認画面の問い合わせ回数の上限
+    QUERY_BUDGET = 5
+
+    def setUp(self):
+        timecard.settings.YEAR_FIRST_MONTH = 4
+        user = User.objects.create(
+            username='staff01', password='12345678', email='staff01@example.com', is_staff=True
+        )
+        self.client.force_login(user)
+
+    def create_requests(self, users, days):
+        for i in range(users):
+            User.objects.get_or_create(username='user{:02d}'.format(i), last_name='氏名{:02d}'.format(i))
+            for day in range(days):
+                TimeOffRequest.objects.get_or_create(
+                    date=datetime.date(2024, 3, 1) + datetime.timedelta(days=day * 7),
+                    username='user{:02d}'.format(i),
+                    display_name='有給休暇',
+                    attendance=False
+                )
+
+    def get_num_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/worktime/time_off/list/')
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response
+
+    def test_query_budget(self):
+        self.create_requests(1, 1)
+        num_queries, _ = self.get_num_queries()
+        self.assertLessEqual(num_queries, self.QUERY_BUDGET)
+        self.create_requests(20, 10)
+        self.assertEqual(self.get_num_queries()[0], num_queries)
+
+    def test_counts(self):
+        self.create_requests(2, 10)
+        _, response = self.get_num_queries()
+        entries = response.context['entries']
+        self.assertEqual(len(entries), 20)
+        for entry in entries:
+            # 3 月の申請は前年度
+            self.assertEqual(entry['year'], 2023 if entry['date'].month == 3 else 2024)
+            self.assertEqual(entry['count'], 5)
+        self.assertEqual(response.context['users'], {'user00': '氏名00', 'user01': '氏名01'})
+
+
+class TestTimeOffStatusView(TestCase):
+    def setUp(self):
+        timecard.settings.YEAR_FIRST_MONTH = 4
+        user = User.objects.create(
+            username='staff01', password='12345678', email='staff01@example.com', is_staff=True
+        )
+        self.client.force_login(user)
+
+    def create_requests(self, users):
+        for i in range(users):
+            username = 'user{:02d}'.format(i)
+            User.objects.get_or_create(username=username)
+            for date, display_name in [(datetime.date(2023, 5, 1), '有給休暇'), (datetime.date(2024, 5, 1), '午前休')]:
+                TimeOffRequest.objects.get_or_create(
+                    date=date, username=username, display_name=display_name, attendance=False
+                )
+
+    def get_num_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response
+
+    def test_query_count(self):
+        self.create_requests(1)
+        num_queries, _ = self.get_num_queries('/worktime/time_off/status/?year=2024')
+        self.create_requests(20)
+        self.assertEqual(self.get_num_queries('/worktime/time_off/status/?year=2024')[0], num_queries)
+
+    def test_span(self):
+        self.create_requests(2)
+        _, response = self.get_num_queries('/worktime/time_off/status/?year=2024')
+        self.assertEqual(len(response.context['entries']), 2)
+        self.assertEqual(response.context['display_names'], ['午前休'])
+        _, response = self.get_num_queries('/worktime/time_off/status/?year=2024&span=2')
+        self.assertEqual(len(response.context['entries']), 4)
+        self.assertEqual(response.context['display_names'], ['午前休', '有給休暇'])
+        self.assertContains(response, '2023～2024年度 休暇集計')
@@ -7,7 +7,9 @@ from worktime.views import (PasswordChange, ReadmeView, TimeOffListView,
                             TimeOffRequestView, TimeOffStatusView,
                             TimeRecordCalendarView, TimeRecordSummaryView,
                             TimeRecordView, UserLogin, UserLogout,
-                            api_record_summary, api_users_list,
+                            api_record, api_record_summary,
+                            api_record_summary_all,
+                            api_users_list,
                             time_off_accept, time_off_cancel)
 
 # アプリケーション名
@@ -31,5 +33,8 @@ urlpatterns = [
     path('record/summary/', TimeRecordSummaryView.as_view(), name='record_summary'),
     path('readme/', ReadmeView.as_view(), name='readme'),
     path('api/users/list/', api_users_list, name='api_users_list'),
+    path('api/record/', api_record, name='api_record'),
     path('api/record/summary/', api_record_summary, name='api_record_summary'),
+    path('api/record/summary/all/', api_record_summary_all,
+         name='api_record_summary_all'),
 ]
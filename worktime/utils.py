@@ -2,11 +2,13 @@
 ユーティリティメソッドです。
 """
 import datetime
+import functools
 from decimal import Decimal
 
 from django.contrib.auth.models import User
 
 import timecard.settings
+from worktime import caches
 
 
 def display_name(user) -> str:
@@ -25,25 +27,81 @@ def display_name(user) -> str:
     return user.username
 
 
-def get_users(active: bool) -> dict:
+# ユーザ一覧のキャッシュの名前
+USER_DIRECTORY = 'user_directory'
+
+
+def build_user_directory() -> dict:
+    """データベースからユーザ一覧を作成します。
+
+    Returns:
+        dict: ユーザ ID とユーザ情報の dict (有効なユーザ、姓、名、ユーザ ID の順)
+    """
+    directory = {}
+    for user in User.objects.order_by('-is_active', 'last_name', 'first_name', 'username'):
+        directory[user.username] = {
+            'name': display_name(user),
+            'is_active': user.is_active,
+            'is_staff': user.is_staff,
+            'is_superuser': user.is_superuser,
+        }
+    return directory
+
+
+def get_user_directory() -> dict:
+    """キャッシュされたユーザ一覧を取得します。
+
+    ユーザが変更されるとシグナル処理によりキャッシュが無効になります。
+
+    Returns:
+        dict: ユーザ ID とユーザ情報 (name, is_active, is_staff, is_superuser) の dict (変更しないでください)
+    """
+    return caches.get_value(USER_DIRECTORY, build_user_directory)
+
+
+def invalidate_user_directory():
+    """キャッシュされたユーザ一覧を無効にします。
+    """
+    caches.invalidate(USER_DIRECTORY)
+
+
+def get_display_username(username: str) -> str:
+    """ユーザ ID に対応する氏名を取得します。
+
+    Args:
+        username (str): ユーザ ID
+
+    Returns:
+        str: 氏名文字列 (ユーザが存在しない場合は None)
+    """
+    user = get_user_directory().get(username)
+    if user is None:
+        return None
+    return user['name']
+
+
+def get_users(active: bool, usernames: list = None) -> dict:
     """存在するユーザの ID と表示形式の文字列の dict を取得します。
 
     Args:
         active (bool): 有効なユーザのみ取得する場合は True
+        usernames (list): 取得するユーザ ID のリスト (省略時は全ユーザ)
 
     Returns:
         dict: ユーザ ID と表示形式の文字列の dict
     """
-    if active:
-        users = User.objects.filter(is_superuser=False, is_active=True)
-    else:
-        users = User.objects.filter(is_superuser=False)
+    if usernames is not None:
+        usernames = set(usernames)
     results = {}
-    for user in users.order_by('-is_active', 'last_name', 'first_name', 'username'):
-        if user.is_active:
-            results[user.username] = display_name(user)
+    for username, user in get_user_directory().items():
+        if user['is_superuser'] or (active and not user['is_active']):
+            continue
+        if usernames is not None and username not in usernames:
+            continue
+        if user['is_active']:
+            results[username] = user['name']
         else:
-            results[user.username] = display_name(user) + ' *'
+            results[username] = user['name'] + ' *'
     return results
 
 
@@ -92,6 +150,37 @@ def get_year_range(year: int) -> tuple[datetime.date, datetime.date]:
     return datetime.date(year, first_month, 1), datetime.date(year + 1, first_month, 1)
 
 
+def get_month_range(year: int, month: int) -> tuple[datetime.date, datetime.date]:
+    """指定した年月の期間を取得します。
+
+    Args:
+        year (int): 西暦年
+        month (int): 月
+
+    Returns:
+        tuple[datetime.date,datetime.date]: 指定した月の最初の日と翌月の最初の日
+    """
+    if month == 12:
+        return datetime.date(year, 12, 1), datetime.date(year + 1, 1, 1)
+    return datetime.date(year, month, 1), datetime.date(year, month + 1, 1)
+
+
+def parse_year_month(text: str) -> tuple[int, int]:
+    """YYYY-MM 形式の文字列を西暦年と月に変換します。
+
+    Args:
+        text (str): YYYY-MM 形式の文字列
+
+    Raises:
+        ValueError: 形式の不正
+
+    Returns:
+        tuple[int, int]: 西暦年と月
+    """
+    day = datetime.datetime.strptime(text, '%Y-%m')
+    return day.year, day.month
+
+
 def delta(time1: datetime.time, time2: datetime.time) -> int:
     """時刻の差を分で取得します。
 
@@ -107,6 +196,37 @@ def delta(time1: datetime.time, time2: datetime.time) -> int:
     return seconds2 - seconds1
 
 
+def time_to_minutes(time: datetime.time) -> int:
+    """時刻を 0 時からの分数に変換します。
+
+    Args:
+        time (datetime.time): 時刻
+
+    Returns:
+        int: 0 時からの分数 (時刻がない場合は None)
+    """
+    if time is None:
+        return None
+    return time.hour * 60 + time.minute
+
+
+# 1 時間の分数
+MINUTES_PER_HOUR = Decimal(60)
+
+
+@functools.lru_cache
+def get_quantum(quantize: str) -> Decimal:
+    """精度の文字列を Decimal に変換します。
+
+    Args:
+        quantize (str): 精度
+
+    Returns:
+        Decimal: 精度
+    """
+    return Decimal(quantize)
+
+
 def minutes_to_hours(minutes: int, quantize: str, rounding_mode) -> Decimal:
     """整数の分から時間の単位に変換します。
 
@@ -118,4 +238,4 @@ def minutes_to_hours(minutes: int, quantize: str, rounding_mode) -> Decimal:
     Returns:
         Decimal: 時間単位の値
     """
-    return (Decimal(minutes) / Decimal(60)).quantize(Decimal(quantize), rounding=rounding_mode)
+    return (Decimal(minutes) / MINUTES_PER_HOUR).quantize(get_quantum(quantize), rounding=rounding_mode)
@@ -0,0 +1,192 @@
+"""
+勤務時間計算の規則を NumPy の配列演算で一括評価するモジュールです。
+
+worktime.rules.worktime_calculation と同一の結果を、多数のユーザと日付の組について一括で計算します。
+"""
+import datetime
+import operator
+
+import numpy
+
+# 時刻がないことを表す値
+NO_TIME = -1
+
+# エラーコードに対応するエラーメッセージ (worktime_calculation と同一)
+ERROR_MESSAGES = [
+    None,
+    '打刻がありません',
+    '退勤がありません',
+    '出勤がありません',
+    '出勤と退勤の順序が不正です',
+    '未来日の打刻です',
+]
+
+
+def to_minutes(time: datetime.time) -> int:
+    """時刻を 0 時からの分数に変換します。
+
+    Args:
+        time (datetime.time): 時刻
+
+    Returns:
+        int: 0 時からの分数 (時刻がない場合は NO_TIME)
+    """
+    if time is None:
+        return NO_TIME
+    return time.hour * 60 + time.minute
+
+
+def to_microseconds(time: datetime.time) -> int:
+    """時刻を 0 時からのマイクロ秒数に変換します。
+
+    Args:
+        time (datetime.time): 時刻
+
+    Returns:
+        int: 0 時からのマイクロ秒数 (時刻がない場合は NO_TIME)
+    """
+    if time is None:
+        return NO_TIME
+    return ((time.hour * 60 + time.minute) * 60 + time.second) * 1000000 + time.microsecond
+
+
+def evaluate(attendance, day_class, begin, end, leave, back, begin_record, end_record, begin_order=None, end_order=None) -> dict:
+    """勤務時間ルールと打刻時間から勤務実績を一括で計算します。
+
+    時刻はすべて 0 時からの分数の配列で指定し、時刻がない要素は NO_TIME とします。
+    営業日 (attendance が True) の要素は begin と end が必須です。
+
+    Args:
+        attendance: 営業日の場合は True の配列
+        day_class: 過去日は -1、本日は 0、未到来日は 1 の配列
+        begin: 始業時刻の配列
+        end: 終業時刻の配列
+        leave: 休憩開始時刻の配列
+        back: 休憩終了時刻の配列
+        begin_record: 最初の出勤時刻の配列
+        end_record: 最後の退勤時刻の配列
+        begin_order: 出勤と退勤の順序の判定に使用する出勤時刻の配列 (省略時は begin_record)
+        end_order: 出勤と退勤の順序の判定に使用する退勤時刻の配列 (省略時は end_record)
+
+    Returns:
+        dict: work, behind, early, overtime, error (エラーコード) の配列の dict
+    """
+    attendance = numpy.asarray(attendance, dtype=bool)
+    day_class = numpy.asarray(day_class, dtype=numpy.int8)
+    begin = numpy.asarray(begin, dtype=numpy.int64)
+    end = numpy.asarray(end, dtype=numpy.int64)
+    leave = numpy.asarray(leave, dtype=numpy.int64)
+    back = numpy.asarray(back, dtype=numpy.int64)
+    begin_record = numpy.asarray(begin_record, dtype=numpy.int64)
+    end_record = numpy.asarray(end_record, dtype=numpy.int64)
+    begin_order = begin_record if begin_order is None else numpy.asarray(begin_order, dtype=numpy.int64)
+    end_order = end_record if end_order is None else numpy.asarray(end_order, dtype=numpy.int64)
+
+    # 打刻の有無と日付の区分
+    has_begin = begin_record != NO_TIME
+    has_end = end_record != NO_TIME
+    work = has_begin | has_end
+    past = day_class < 0
+    future = 0 < day_class
+
+    # データチェック
+    error = numpy.zeros(attendance.shape, dtype=numpy.int8)
+    error[past & ~work & attendance] = 1
+    error[past & has_begin & ~has_end] = 2
+    error[~future & ~has_begin & has_end] = 3
+    error[~future & has_begin & has_end & (end_order < begin_order)] = 4
+    error[future & work] = 5
+    calculate = ~future & has_begin & has_end & (error == 0)
+
+    # 非営業日の場合はすべて時間外として計算
+    holiday = calculate & ~attendance
+    overtime = numpy.where(holiday, end_record - begin_record, 0)
+
+    # 標準勤務時間と実働時間の算出
+    business = calculate & attendance
+    split = (leave != NO_TIME) & (back != NO_TIME)
+    section1_end = numpy.where(split, leave, end)
+    section1_total = section1_end - begin
+    section1_record = numpy.maximum(0, numpy.minimum(end_record, section1_end) - numpy.maximum(begin, begin_record))
+    section2_total = numpy.where(split, end - back, 0)
+    section2_record = numpy.where(split, numpy.maximum(0, numpy.minimum(end_record, end) - numpy.maximum(back, begin_record)), 0)
+
+    # 不足時間、早出時間、残業時間の算出
+    behind = numpy.where(business, (section1_total - section1_record) + (section2_total - section2_record), 0)
+    early = numpy.where(business, numpy.maximum(0, numpy.minimum(end_record, begin) - begin_record), 0)
+    overtime = numpy.where(business, numpy.maximum(0, end_record - numpy.maximum(end, begin_record)), overtime)
+
+    # 結果返却
+    return {
+        'work': work,
+        'behind': behind,
+        'early': early,
+        'overtime': overtime,
+        'error': error,
+    }
+
+
+class Memo(dict):
+    """変換結果を値ごとに記憶する dict です。
+
+    打刻記録の時刻や日付は同じ値が繰り返し現れるため、変換関数の呼び出しを値の種類数に抑えます。
+
+    Args:
+        func: 変換関数
+    """
+
+    def __init__(self, func):
+        super().__init__()
+        self.func = func
+
+    def __missing__(self, key):
+        value = self[key] = self.func(key)
+        return value
+
+
+def calculate_records(records: list, today: datetime.date = None):
+    """打刻記録のリストの勤務実績を一括で計算し、各打刻記録に結果を追加します。
+
+    Args:
+        records (list): 休暇申請を反映済の打刻記録のリスト
+        today (datetime.date): 本日の日付 (省略時は現在の日付)
+    """
+    if not records:
+        return
+    if today is None:
+        today = datetime.datetime.now().date()
+
+    # 項目ごとの配列に変換
+    def column(field, converter):
+        return list(map(converter, map(operator.itemgetter(field), records)))
+
+    day_classes = Memo(lambda date: (date > today) - (date < today)).__getitem__
+    minutes = Memo(to_minutes).__getitem__
+    microseconds = Memo(to_microseconds).__getitem__
+    results = evaluate(
+        column('attendance', bool),
+        column('date', day_classes),
+        column('begin', minutes),
+        column('end', minutes),
+        column('leave', minutes),
+        column('back', minutes),
+        column('begin_record', minutes),
+        column('end_record', minutes),
+        column('begin_record', microseconds),
+        column('end_record', microseconds),
+    )
+
+    # 各打刻記録に結果を追加
+    columns = zip(
+        results['work'].tolist(),
+        results['behind'].tolist(),
+        results['early'].tolist(),
+        results['overtime'].tolist(),
+        map(ERROR_MESSAGES.__getitem__, results['error'].tolist())
+    )
+    for record, (work, behind, early, overtime, error) in zip(records, columns):
+        record['work'] = work
+        record['behind'] = behind
+        record['early'] = early
+        record['overtime'] = overtime
+        record['error'] = error
@@ -2,18 +2,24 @@
 ビュー定義です。
 """
 import datetime
+import json
+import uuid
 from functools import wraps
 
+from asgiref.sync import sync_to_async
+
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import AccessMixin, LoginRequiredMixin
 from django.contrib.auth.views import LoginView, LogoutView, PasswordChangeView
+from django.db import IntegrityError, transaction
 from django.db.models import Q
 from django.http import HttpResponseForbidden
 from django.http.response import JsonResponse
 from django.shortcuts import redirect
 from django.urls import reverse, reverse_lazy
 from django.utils import dateformat
+from django.views.decorators.http import require_POST
 from django.views.generic import FormView, TemplateView
 
 import timecard.settings
@@ -21,8 +27,15 @@ from worktime.forms import (CustomAuthenticationForm, CustomPasswordChangeForm,
                             TimeOffListForm, TimeOffRequestForm,
                             TimeOffStatusForm, TimeRecordCalendarForm,
                             TimeRecordForm, TimeRecordSummaryForm)
-from worktime.models import TimeOffPattern, TimeOffRequest, TimeRecord
-from worktime.queries import count_time_off_requests, get_monthly_records
+from worktime.models import TimeOffRequest, TimeRecord
+from worktime.materialized import (get_monthly_summaries_bulk,
+                                   get_monthly_summary, get_monthly_worktimes)
+from worktime.punches import (afind_punch, asave_punch, build_time_record,
+                              find_punch, save_punch)
+from worktime.queries import (count_time_off_requests,
+                              count_time_off_requests_by_year,
+                              get_time_off_matrix)
+from worktime.reference import get_time_off_patterns
 from worktime.rules import summarize
 from worktime.utils import (display_name, get_first_day_of_year, get_users,
                             get_year_range)
@@ -73,6 +86,15 @@ class TimeRecordView(LoginRequiredMixin, FormView):
     template_name = 'worktime/record.html'
     success_url = reverse_lazy('worktime:record')
 
+    def get_initial(self):
+        """初期値の返却
+
+        画面の表示ごとに冪等キーを生成し、同じ画面からの再送を 1 件の打刻として扱います。
+        """
+        initial = super().get_initial()
+        initial['idempotency_key'] = uuid.uuid4().hex
+        return initial
+
     def get_context_data(self, *args, **kwargs):
         """コンテキストの返却
         """
@@ -87,36 +109,14 @@ class TimeRecordView(LoginRequiredMixin, FormView):
         context["actions"] = timecard.settings.RECORD_ACTIONS
         return context
 
-    def string_to_float(self, string: str) -> float:
-        """文字列を数値で取得します。
-
-        Args:
-            string (str): 文字列
-
-        Returns:
-            float: 数値
-        """
-        return float(string) if string else None
-
     def form_valid(self, form):
         """バリデーション成功
         """
-        now = datetime.datetime.now()
-        action = form.cleaned_data['action']
-        TimeRecord.objects.create(
-            date=now.date(),
-            time=now.time(),
-            username=self.request.user.username,
-            action=action,
-            latitude=self.string_to_float(form.cleaned_data['latitude']),
-            longitude=self.string_to_float(form.cleaned_data['longitude']),
-            accuracy=self.string_to_float(form.cleaned_data['accuracy']),
-            ua=form.cleaned_data['ua'],
-        )
-        messages.success(
-            self.request,
-            timecard.settings.RECORD_ACTIONS.get(action) + 'の打刻が完了しました'
-        )
+        username = self.request.user.username
+        result = find_punch(username, form.cleaned_data['idempotency_key'])
+        if result is None:
+            result, _ = save_punch(build_time_record(username, form.cleaned_data))
+        messages.success(self.request, result['label'] + 'の打刻が完了しました')
         return super().form_valid(form)
 
 
@@ -141,21 +141,27 @@ class TimeOffListView(StaffRequiredMixin, FormView):
         ).order_by('date')
         entries = []
         for record in records:
-            year = get_first_day_of_year(record['date']).year
-            year_range = get_year_range(year)
-            counts = count_time_off_requests(record['username'], year_range)
             entries.append({
                 'id': record['id'],
-                'year': year,
+                'year': get_first_day_of_year(record['date']).year,
                 'date': record['date'],
                 'username': record['username'],
                 'display_name': record['display_name'],
                 'created_at': record['created_at'],
-                'count': counts.get(record['display_name'], 0),
                 'contact': record['contact']
             })
+
+        # 申請者と年度ごとの申請回数を一括で取得
+        usernames = sorted(set(entry['username'] for entry in entries))
+        counts = count_time_off_requests_by_year(
+            usernames, sorted(set(entry['year'] for entry in entries))
+        )
+        for entry in entries:
+            entry['count'] = counts.get(
+                (entry['username'], entry['year'], entry['display_name']), 0
+            )
         context['entries'] = entries
-        context['users'] = get_users(False)
+        context['users'] = get_users(False, usernames)
         return context
 
 
@@ -180,22 +186,17 @@ class TimeOffStatusView(StaffRequiredMixin, FormView):
             first_day_of_year.year + 1
         )
         context['current_year'] = first_day_of_year.year
-        context['entries'] = []
-        display_names = []
-        for id, name in get_users(True).items():
-            counts = count_time_off_requests(
-                id, get_year_range(context['year'])
-            )
-            for display_name in counts.keys():
-                if not display_name in display_names:
-                    display_names.append(display_name)
-            if 0 < len(counts):
-                context['entries'].append({
-                    'id': id,
-                    'name': name,
-                    'counts': counts
-                })
-        context['display_names'] = sorted(display_names)
+
+        # 複数年度の比較 (span に指定した年数分の年度を表示年度まで集計)
+        try:
+            span = min(max(int(self.request.GET.get('span', 1)), 1), 10)
+        except ValueError:
+            span = 1
+        context['span'] = span
+        context['first_year'] = context['year'] - span + 1
+        context['entries'], context['display_names'] = get_time_off_matrix(
+            list(range(context['first_year'], context['year'] + 1))
+        )
         return context
 
 
@@ -224,26 +225,24 @@ class TimeOffRequestView(LoginRequiredMixin, FormView):
         """バリデーション成功
         """
         request_date = form.cleaned_data['request_date']
-        records = TimeOffRequest.objects.filter(
-            date=request_date, username=self.request.user.username)
-        if records.exists():
+        pattern = get_time_off_patterns()[int(form.cleaned_data['pattern_id'])]
+        try:
+            with transaction.atomic():
+                TimeOffRequest.objects.create(
+                    date=request_date,
+                    username=self.request.user.username,
+                    display_name=pattern.display_name,
+                    contact=form.cleaned_data['contact'],
+                    attendance=pattern.attendance,
+                    begin=pattern.begin,
+                    end=pattern.end,
+                    leave=pattern.leave,
+                    back=pattern.back,
+                    accepted=False
+                )
+        except IntegrityError:
             form.add_error('request_date', '指定した日には既に申請が存在します')
             return self.form_invalid(form)
-        pattern = TimeOffPattern.objects.get(
-            id=form.cleaned_data['pattern_id']
-        )
-        TimeOffRequest.objects.create(
-            date=request_date,
-            username=self.request.user.username,
-            display_name=pattern.display_name,
-            contact=form.cleaned_data['contact'],
-            attendance=pattern.attendance,
-            begin=pattern.begin,
-            end=pattern.end,
-            leave=pattern.leave,
-            back=pattern.back,
-            accepted=False
-        )
         messages.success(
             self.request,
             dateformat.format(request_date, 'Y/m/d (D)') +
@@ -270,7 +269,7 @@ class TimeRecordCalendarView(LoginRequiredMixin, FormView):
         today = datetime.datetime.today()
         context['year'] = int(self.request.GET.get('year', today.year))
         context['month'] = int(self.request.GET.get('month', today.month))
-        context['entries'] = get_monthly_records(
+        context['entries'] = get_monthly_worktimes(
             context['username'], context['year'], context['month']
         )
         context['summary'] = summarize(context['entries'])
@@ -434,6 +433,80 @@ def api_record_summary(request):
     today = datetime.datetime.today()
     year = int(request.GET.get('year', today.year))
     month = int(request.GET.get('month', today.month))
-    records = get_monthly_records(id, year, month)
-    summary = summarize(records)
-    return JsonResponse(summary)
+    return JsonResponse(get_monthly_summary(id, year, month))
+
+
+@staff_required
+def api_record_summary_all(request):
+    """有効な全ユーザの指定した年月の打刻記録のサマリを取得
+
+    Args:
+        request: リクエスト情報
+
+    Returns:
+        json レスポンス
+    """
+    today = datetime.datetime.today()
+    year = int(request.GET.get('year', today.year))
+    month = int(request.GET.get('month', today.month))
+    users = get_users(True)
+    summaries = get_monthly_summaries_bulk(list(users.keys()), year, month)
+    entries = []
+    for id, name in users.items():
+        entries.append({
+            'id': id,
+            'name': name,
+            'summary': summaries[id]
+        })
+    return JsonResponse({'entries': entries})
+
+
+@require_POST
+async def api_record(request):
+    """打刻を登録 (非同期)
+
+    打刻画面と同じ項目を form または JSON 形式で受け取り、登録した打刻を JSON で返します。
+    画面の再表示やリダイレクトを行わないため、キオスク端末やモバイルアプリからの打刻に使用します。
+    冪等キーは idempotency_key 項目または Idempotency-Key ヘッダで指定し、再送時は最初の登録結果を返します。
+
+    Args:
+        request: リクエスト情報
+
+    Returns:
+        json レスポンス
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'errors': {'__all__': ['Unauthorized']}}, status=401)
+
+    # 入力値の検証
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            return JsonResponse({'errors': {'__all__': ['Invalid JSON']}}, status=400)
+        data = {key: '' if value is None else str(value) for key, value in data.items()}
+    else:
+        data = request.POST.dict()
+    if not data.get('idempotency_key'):
+        data['idempotency_key'] = request.headers.get('Idempotency-Key', '')
+    form = TimeRecordForm(data)
+    if form.is_valid() and form.cleaned_data['action'] not in timecard.settings.RECORD_ACTIONS:
+        form.add_error('action', 'Unknown action')
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+
+    # 再送された打刻
+    result = await afind_punch(user.username, form.cleaned_data['idempotency_key'])
+    if result is not None:
+        return JsonResponse(result, status=200)
+
+    # 登録
+    try:
+        record = await sync_to_async(build_time_record)(user.username, form.cleaned_data)
+    except ValueError:
+        return JsonResponse({'errors': {'__all__': ['Invalid location']}}, status=400)
+    result, created = await asave_punch(record)
+    return JsonResponse(result, status=201 if created else 200)